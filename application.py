@@ -17,8 +17,9 @@ from ehp.core.services import (
     # registration_router,
     root_router,
 )
-from ehp.db.db_manager import get_db_manager
+from ehp.db.db_manager import get_db_manager, skip_db_manager
 from ehp.utils.authentication import needs_api_key
+from ehp.utils.request import ORJSONResponse
 
 
 logger = logging.getLogger(__name__)
@@ -28,6 +29,7 @@ app = FastAPI(
     title=settings.APP_NAME,
     description=settings.APP_DESCRIPTION,
     version=settings.APP_VERSION,
+    default_response_class=ORJSONResponse,
     dependencies=[Depends(needs_api_key), Depends(get_db_manager)],
 )
 
@@ -54,6 +56,7 @@ async def process_after_request(request: Request, call_next: Any) -> Any:
 
 
 @app.get("/openapi.json")
+@skip_db_manager
 async def get_open_api_endpoint() -> JSONResponse:
     # auth: str = Depends(needs_api_key)
     if settings.DEBUG:
@@ -70,6 +73,7 @@ async def get_open_api_endpoint() -> JSONResponse:
 
 @app.get("/docs")
 @app.get("/redoc")
+@skip_db_manager
 async def get_documentation() -> Any:
     # auth: str = Depends(needs_api_key)
     if settings.DEBUG:
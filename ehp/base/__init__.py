@@ -1,20 +1,31 @@
-from .redis_storage import get_redis_client
+from .redis_storage import get_async_redis_client, get_redis_client
 from .session import (
     create_redis_session,
+    create_redis_session_async,
     get_from_redis_session,
+    get_from_redis_session_async,
     redirect_to,
     remove_from_redis_session,
+    remove_from_redis_session_async,
+    ResolvedSession,
     SessionData,
     write_to_redis_session,
+    write_to_redis_session_async,
 )
 
 
 __all__ = [
     "create_redis_session",
+    "create_redis_session_async",
+    "get_async_redis_client",
     "get_from_redis_session",
+    "get_from_redis_session_async",
     "get_redis_client",
     "redirect_to",
     "remove_from_redis_session",
+    "remove_from_redis_session_async",
+    "ResolvedSession",
     "SessionData",
     "write_to_redis_session",
+    "write_to_redis_session_async",
 ]
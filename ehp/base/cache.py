@@ -0,0 +1,227 @@
+import asyncio
+from itertools import chain
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import orjson
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from ehp.base.redis_storage import get_async_redis_client
+
+
+_logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "cache:resp:"
+TAG_PREFIX = "cache:tag:"
+# Counter of each tag, bumped by every invalidation of the tag.
+TAG_VERSION_PREFIX = "cache:tagver:"
+LOCK_PREFIX = "cache:lock:"
+
+# Session.info entry collecting the tags written by the current transaction.
+_TAGS_KEY = "ehp_cache_tags"
+
+# KEYS: entry key, tag set keys, then the tag version keys when checked.
+# ARGV: entry value, entry ttl, the tag versions read before the value was
+# built. Nothing is stored if a tag was invalidated since (returns 0).
+# Tag sets live at least as long as the longest entry they reference.
+_STORE_SCRIPT = """
+local tags = #ARGV - 2
+if tags == 0 then
+    tags = #KEYS - 1
+end
+for i = 1, #ARGV - 2 do
+    if (redis.call('GET', KEYS[1 + tags + i]) or '0') ~= ARGV[2 + i] then
+        return 0
+    end
+end
+redis.call('SET', KEYS[1], ARGV[1], 'EX', ARGV[2])
+for i = 2, tags + 1 do
+    redis.call('SADD', KEYS[i], KEYS[1])
+    if redis.call('TTL', KEYS[i]) < tonumber(ARGV[2]) then
+        redis.call('EXPIRE', KEYS[i], ARGV[2])
+    end
+end
+return 1
+"""
+
+# KEYS: tag set keys, then their version keys. Bumps the versions, then
+# deletes every entry of the tags and the tags.
+_INVALIDATE_SCRIPT = """
+local tags = #KEYS / 2
+for i = 1, tags do
+    redis.call('INCR', KEYS[tags + i])
+    local members = redis.call('SMEMBERS', KEYS[i])
+    for j = 1, #members, 1000 do
+        redis.call('DEL', unpack(members, j, math.min(j + 999, #members)))
+    end
+    redis.call('DEL', KEYS[i])
+end
+"""
+
+_invalidation_tasks: Set[asyncio.Task] = set()
+# Called with the tags of every committed transaction of this process.
+_commit_listeners: List[Callable[[Set[str]], None]] = []
+
+
+def table_tag(table_name: str) -> str:
+    """Tag of the cached responses built from the rows of ``table_name``."""
+    return f"table:{table_name}"
+
+
+async def get_cached(key: str) -> Optional[Tuple[Dict[str, Any], bool]]:
+    """Return the entry stored under ``key`` and whether it is stale."""
+    value = await get_async_redis_client().get(CACHE_PREFIX + key)
+    if value is None:
+        return None
+    entry = orjson.loads(value)
+    return entry, entry["fresh_until"] < time.time()
+
+
+async def set_cached(
+    key: str,
+    status_code: int,
+    headers: Dict[str, str],
+    body: bytes,
+    ttl: int,
+    stale: int,
+    tags: Iterable[str] = (),
+    versions: Optional[Dict[str, str]] = None,
+) -> bool:
+    """Store a response for ``ttl`` seconds, served stale for ``stale`` more.
+
+    See ``set_tagged`` for ``versions`` and the result.
+    """
+    entry = orjson.dumps(
+        {
+            "status_code": status_code,
+            "headers": headers,
+            "body": body.decode("utf-8"),
+            "fresh_until": time.time() + ttl,
+        }
+    )
+    return await set_tagged(CACHE_PREFIX + key, entry, ttl + stale, tags, versions)
+
+
+async def get_tag_versions(tags: Iterable[str]) -> Dict[str, str]:
+    """The current version of ``tags``, to read before building a value."""
+    tags = list(dict.fromkeys(tags))
+    if not tags:
+        return {}
+    versions = await get_async_redis_client().mget(
+        [TAG_VERSION_PREFIX + tag for tag in tags]
+    )
+    return {
+        tag: version.decode("ascii") if version is not None else "0"
+        for tag, version in zip(tags, versions)
+    }
+
+
+async def set_tagged(
+    key: str,
+    value: bytes,
+    ttl: int,
+    tags: Iterable[str],
+    versions: Optional[Dict[str, str]] = None,
+) -> bool:
+    """Store ``value`` under the Redis ``key``, dropped with any of ``tags``.
+
+    With the ``versions`` of ``get_tag_versions``, nothing is stored (and
+    False returned) when a tag was invalidated since they were read, so a
+    value built from rows read before a write cannot outlive its invalidation.
+    """
+    tags = list(dict.fromkeys(tags))
+    tag_keys = [TAG_PREFIX + tag for tag in tags]
+    checks: List[str] = []
+    if versions is not None:
+        tag_keys += [TAG_VERSION_PREFIX + tag for tag in tags]
+        checks = [versions.get(tag, "0") for tag in tags]
+    return bool(
+        await get_async_redis_client().eval(
+            _STORE_SCRIPT, 1 + len(tag_keys), key, *tag_keys, value, ttl, *checks
+        )
+    )
+
+
+async def acquire_refresh_lock(key: str, timeout: int) -> bool:
+    """Let a single worker recompute a stale entry."""
+    return bool(
+        await get_async_redis_client().set(LOCK_PREFIX + key, 1, nx=True, ex=timeout)
+    )
+
+
+async def invalidate_tags(tags: Iterable[str]) -> None:
+    """Drop every cached entry stored with one of ``tags``."""
+    tags = list(dict.fromkeys(tags))
+    if tags:
+        await get_async_redis_client().eval(
+            _INVALIDATE_SCRIPT,
+            2 * len(tags),
+            *[TAG_PREFIX + tag for tag in tags],
+            *[TAG_VERSION_PREFIX + tag for tag in tags],
+        )
+
+
+def add_cache_tags(session: Session, tags: Iterable[str]) -> None:
+    """Invalidate ``tags`` once the transaction of ``session`` commits, for
+    writes the ORM events below cannot see (e.g. a raw driver ``COPY``)."""
+    session.info.setdefault(_TAGS_KEY, set()).update(tags)
+
+
+def on_commit_tags(listener: Callable[[Set[str]], None]) -> None:
+    """Register ``listener`` to be called with the tags of each commit, e.g.
+    to drop in-process caches before the next request reads them."""
+    _commit_listeners.append(listener)
+
+
+async def _invalidate_in_background(tags: Set[str]) -> None:
+    try:
+        await invalidate_tags(tags)
+    except Exception as e:
+        _logger.error(f"Error invalidating cache tags {sorted(tags)}: {e}")
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_flush_tags(session: Session, _flush_context: Any) -> None:
+    add_cache_tags(
+        session,
+        {
+            table_tag(obj.__table__.name)
+            for obj in chain(session.new, session.dirty, session.deleted)
+            if hasattr(obj, "__table__")
+        },
+    )
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_dml_tags(orm_execute_state: ORMExecuteState) -> None:
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        table = getattr(orm_execute_state.statement, "table", None)
+        if table is not None:
+            add_cache_tags(orm_execute_state.session, [table_tag(table.name)])
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_tags(session: Session) -> None:
+    tags = session.info.pop(_TAGS_KEY, None)
+    if not tags:
+        return
+    for listener in _commit_listeners:
+        listener(tags)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(_invalidate_in_background(tags))
+    _invalidation_tasks.add(task)
+    task.add_done_callback(_invalidation_tasks.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_tags(session: Session) -> None:
+    session.info.pop(_TAGS_KEY, None)
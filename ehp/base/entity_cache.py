@@ -0,0 +1,315 @@
+import asyncio
+import base64
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time
+from decimal import Decimal
+from enum import Enum
+import logging
+from threading import Lock
+import time
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import uuid
+
+import orjson
+from sqlalchemy.orm import make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ehp.base.cache import on_commit_tags, table_tag
+from ehp.base.redis_storage import get_async_redis_client
+
+
+_logger = logging.getLogger(__name__)
+
+ENTITY_PREFIX = "cache:entity:"
+# Published with the name of a table after a write to it was committed.
+ENTITY_INVALIDATION_CHANNEL = "cache:entity:invalidate"
+
+# Options of the __cache__ dict of a model.
+CACHE_OPTIONS = frozenset({"ttl", "max_entries", "redis"})
+
+# KEYS: table generation key. ARGV: entry key prefix and suffix.
+# Entries are stored under the current generation of their table, so bumping
+# it on a write orphans every older entry (left to expire).
+_GET_SCRIPT = """
+local generation = redis.call('GET', KEYS[1]) or '0'
+return {generation, redis.call('GET', ARGV[1] .. generation .. ARGV[2])}
+"""
+
+CacheKey = Tuple[str, Any]
+# Local and Redis generations of a table seen before its row was loaded.
+Generation = Tuple[int, Optional[str]]
+
+
+def _snapshot_default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _column_decoder(column_type: Any) -> Optional[Callable[[Any], Any]]:
+    """Rebuild a column value read back from its JSON snapshot."""
+    try:
+        python_type = column_type.python_type
+    except NotImplementedError:
+        return None
+
+    if issubclass(python_type, datetime):
+        return datetime.fromisoformat
+    if issubclass(python_type, date):
+        return date.fromisoformat
+    if issubclass(python_type, dt_time):
+        return dt_time.fromisoformat
+    if issubclass(python_type, bytes):
+        return base64.b64decode
+    if issubclass(python_type, (Decimal, uuid.UUID, Enum)):
+        return python_type
+    return None
+
+
+def check_cache_options(model_name: str, options: Dict[str, Any]) -> None:
+    """Reject a misspelled ``__cache__`` option when the model is defined."""
+    unknown = set(options) - CACHE_OPTIONS
+    if unknown:
+        raise TypeError(
+            f"Unknown __cache__ option(s) of {model_name}: {sorted(unknown)}, "
+            f"expected {sorted(CACHE_OPTIONS)}"
+        )
+
+
+class EntityCache:
+    """Read-through cache of the column snapshots of one model.
+
+    A write committed to the table bumps its generation, locally and in Redis,
+    and is published on ENTITY_INVALIDATION_CHANNEL so every worker drops its
+    in-process tier. Snapshots loaded under an older generation are never
+    stored, so a read racing with a write cannot cache the old row again. The
+    in-process tier is only used while subscribed to the channel.
+    """
+
+    def __init__(
+        self, model: Any, ttl: int = 60, max_entries: int = 1024, redis: bool = False
+    ):
+        self.model = model
+        self.table_name = model.__table__.name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.redis = redis
+        self._lock = Lock()
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._generation = 0
+        self._keys = [prop.key for prop in model.__mapper__.column_attrs]
+        # Snapshots are cached under each of these (unique) columns.
+        self.fields = [field for field in ("id", "code") if field in self._keys]
+        self._decoders = {
+            prop.key: decoder
+            for prop in model.__mapper__.column_attrs
+            if (decoder := _column_decoder(prop.columns[0].type)) is not None
+        }
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        _entity_caches[self.table_name] = self
+
+    async def get(self, field: str, value: Any) -> Tuple[Optional[Any], Generation]:
+        """A detached instance rebuilt from the cached snapshot, if any, and
+        the generation to pass to ``set`` once the row is loaded on a miss."""
+        _ensure_entity_listener()
+        key = (field, value)
+        now = time.monotonic()
+        with self._lock:
+            local_generation = self._generation
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] > now:
+                self._entries.move_to_end(key)
+                self.local_hits += 1
+                return self._build(cached[1]), (local_generation, None)
+
+        redis_generation = None
+        if self.redis:
+            try:
+                # A nil entry is dropped from the reply, not returned as None.
+                redis_generation, *data = await get_async_redis_client().eval(
+                    _GET_SCRIPT,
+                    1,
+                    self._generation_key(),
+                    f"{ENTITY_PREFIX}{self.table_name}:",
+                    f":{field}:{value}",
+                )
+                redis_generation = redis_generation.decode("ascii")
+                data = data[0] if data else None
+            except Exception as e:
+                _logger.error(f"Error reading entity cache {key}: {e}")
+                redis_generation, data = None, None
+            if data is not None:
+                snapshot = self._decode(orjson.loads(data))
+                self._store_local(key, snapshot, local_generation)
+                with self._lock:
+                    self.redis_hits += 1
+                return self._build(snapshot), (local_generation, redis_generation)
+
+        with self._lock:
+            self.misses += 1
+        return None, (local_generation, redis_generation)
+
+    async def set(self, obj: Any, generation: Generation) -> None:
+        """Cache the loaded columns of ``obj`` under each of its fields, unless
+        the table was written since ``generation`` was read."""
+        state = obj.__dict__
+        if any(key not in state for key in self._keys):
+            return
+        local_generation, redis_generation = generation
+        snapshot = {key: state[key] for key in self._keys}
+        keys = [(field, snapshot[field]) for field in self.fields]
+        for key in keys:
+            self._store_local(key, snapshot, local_generation)
+        if not self.redis or redis_generation is None:
+            return
+
+        try:
+            data = orjson.dumps(snapshot, default=_snapshot_default)
+            async with get_async_redis_client().pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.set(self._redis_key(key, redis_generation), data, ex=self.ttl)
+                await pipe.execute()
+        except Exception as e:
+            _logger.error(f"Error writing entity cache {keys}: {e}")
+
+    def clear_local(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.local_hits + self.redis_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "redis": self.redis,
+                "local_hits": self.local_hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "hit_ratio": (
+                    round((lookups - self.misses) / lookups, 4) if lookups else 0.0
+                ),
+            }
+
+    def _store_local(
+        self, key: CacheKey, snapshot: Dict[str, Any], generation: int
+    ) -> None:
+        if not _listening:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _generation_key(self) -> str:
+        return f"{ENTITY_PREFIX}{self.table_name}:generation"
+
+    def _redis_key(self, key: CacheKey, generation: str) -> str:
+        return f"{ENTITY_PREFIX}{self.table_name}:{generation}:{key[0]}:{key[1]}"
+
+    def _decode(self, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        for key, decoder in self._decoders.items():
+            value = snapshot.get(key)
+            if value is not None:
+                snapshot[key] = decoder(value)
+        return snapshot
+
+    def _build(self, snapshot: Dict[str, Any]) -> Any:
+        obj = self.model.__mapper__.class_manager.new_instance()
+        for key, value in snapshot.items():
+            set_committed_value(obj, key, value)
+        make_transient_to_detached(obj)
+        return obj
+
+
+_entity_caches: Dict[str, EntityCache] = {}
+_listening = False
+_entity_listener: Optional[asyncio.Task] = None
+_invalidation_tasks: Set[asyncio.Task] = set()
+
+
+def _ensure_entity_listener() -> None:
+    global _entity_listener
+    if _entity_listener is None or _entity_listener.done():
+        _entity_listener = asyncio.get_running_loop().create_task(
+            _listen_for_invalidations()
+        )
+
+
+async def _listen_for_invalidations() -> None:
+    global _listening
+    while True:
+        pubsub = get_async_redis_client().pubsub()
+        try:
+            await pubsub.subscribe(ENTITY_INVALIDATION_CHANNEL)
+            _listening = True
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                cache = _entity_caches.get(message["data"].decode("utf-8"))
+                if cache is not None:
+                    cache.clear_local()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _logger.error(f"Error listening to entity cache invalidations: {e}")
+        finally:
+            # Invalidations may be missed until subscribed again.
+            _listening = False
+            for cache in _entity_caches.values():
+                cache.clear_local()
+            await pubsub.aclose()
+        await asyncio.sleep(1)
+
+
+async def _publish_invalidations(caches: List[EntityCache]) -> None:
+    try:
+        async with get_async_redis_client().pipeline(transaction=False) as pipe:
+            for cache in caches:
+                # Bumped before publishing, so the workers dropping their local
+                # copy read the new generation from Redis.
+                pipe.incr(cache._generation_key())
+                pipe.publish(ENTITY_INVALIDATION_CHANNEL, cache.table_name)
+            await pipe.execute()
+    except Exception as e:
+        _logger.error(
+            f"Error invalidating entity caches {[c.table_name for c in caches]}: {e}"
+        )
+
+
+def _invalidate_written_tables(tags: Set[str]) -> None:
+    caches = [
+        cache
+        for table_name, cache in _entity_caches.items()
+        if table_tag(table_name) in tags
+    ]
+    if not caches:
+        return
+    for cache in caches:
+        cache.clear_local()
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    task = loop.create_task(_publish_invalidations(caches))
+    _invalidation_tasks.add(task)
+    task.add_done_callback(_invalidation_tasks.discard)
+
+
+on_commit_tags(_invalidate_written_tables)
+
+
+def get_entity_cache_statistics() -> Dict[str, Any]:
+    """Hit/miss counters of every model entity cache."""
+    return {name: cache.stats() for name, cache in _entity_caches.items()}
@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta, timezone
-from typing import Any, cast, Dict
+import time
+from typing import Any, cast, Dict, Optional
 
 import jwt
 
@@ -14,12 +15,26 @@ def _get_exp_date_in_millis() -> float:
     return _get_exp_date().timestamp() * 1000
 
 
+# Larger exp values are in milliseconds, as written by encode_token.
+_MAX_EXP_SECONDS = 10**11
+
+
+def get_exp_seconds(claims: Dict[str, Any]) -> Optional[float]:
+    """Expiry of the token as a POSIX timestamp in seconds."""
+    exp = claims.get("exp")
+    if not isinstance(exp, (int, float)):
+        return None
+    return exp / 1000 if exp > _MAX_EXP_SECONDS else exp
+
+
 def simple_encode_token(message: Any) -> str:
     """
     Encode the token to JWT.
     """
     return str(
-        jwt.encode(message, settings.ETAI_API_KEY, algorithm=settings.APP_ENCODING_ALG)
+        jwt.encode(
+            message, settings.SESSION_TOKEN_SECRET, algorithm=settings.APP_ENCODING_ALG
+        )
     )
 
 
@@ -29,10 +44,13 @@ def encode_token(message: Dict[str, Any]) -> str:
     """
     if message:
         message["exp"] = _get_exp_date_in_millis()
+        message["iat"] = int(time.time())
         message["iss"] = settings.APP_ISSUER
 
     return str(
-        jwt.encode(message, settings.API_KEY_VALUE, algorithm=settings.APP_ENCODING_ALG)
+        jwt.encode(
+            message, settings.SESSION_TOKEN_SECRET, algorithm=settings.APP_ENCODING_ALG
+        )
     )
 
 
@@ -43,6 +61,30 @@ def decode_token(message: str) -> Dict[str, Any]:
     return cast(
         Dict[str, Any],
         jwt.decode(
-            message, settings.ETAI_API_KEY, algorithms=[settings.APP_ENCODING_ALG]
+            message,
+            settings.SESSION_TOKEN_SECRET,
+            algorithms=[settings.APP_ENCODING_ALG],
         ),
     )
+
+
+def verify_token(message: str) -> Optional[Dict[str, Any]]:
+    """
+    Verify the signature, issuer and expiry of a token made by encode_token.
+    Returns its claims, or None for an invalid or expired token.
+    """
+    try:
+        # exp is checked below, PyJWT expects it in seconds.
+        claims = jwt.decode(
+            message,
+            settings.SESSION_TOKEN_SECRET,
+            algorithms=[settings.APP_ENCODING_ALG],
+            issuer=settings.APP_ISSUER,
+            options={"verify_exp": False, "require": ["exp", "iss"]},
+        )
+    except jwt.InvalidTokenError:
+        return None
+    exp = get_exp_seconds(claims)
+    if exp is None or exp <= time.time():
+        return None
+    return cast(Dict[str, Any], claims)
@@ -4,21 +4,25 @@ from typing import Annotated, Optional
 from fastapi import Header, Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
 
-from ehp.base.session import get_from_redis_session
+from ehp.base.session import get_from_redis_session_async, ResolvedSession
+from ehp.config import settings
+from ehp.db.query_stats import (
+    detect_n_plus_one,
+    get_query_stats,
+    reset_query_stats,
+    start_query_stats,
+)
 
 
 async def get_user_session(
     request: Request, x_token_auth: Annotated[Optional[str], Header()]
 ) -> None:
     if x_token_auth:
+        user_session = (await resolve_session(x_token_auth)).data
         if hasattr(request.state, "request_config"):
-            request.state.request_config["user_session"] = get_from_redis_session(
-                x_token_auth
-            )
+            request.state.request_config["user_session"] = user_session
         else:
-            request.state.request_config = {
-                "user_session": get_from_redis_session(x_token_auth)
-            }
+            request.state.request_config = {"user_session": user_session}
 
 
 _request_context = ContextVar("request_context", default=None)
@@ -28,14 +32,59 @@ def get_current_request() -> Optional[Request]:
     return _request_context.get()
 
 
+async def resolve_session(token: str) -> ResolvedSession:
+    """Return the session of ``token``, read from Redis once per request.
+
+    The resolved session lives in ``request.state.request_config`` so the auth
+    dependencies and helpers of a request share it.
+    """
+    request = get_current_request()
+    if request is None:
+        return ResolvedSession(token, await get_from_redis_session_async(token))
+
+    if not hasattr(request.state, "request_config"):
+        request.state.request_config = {}
+    session = request.state.request_config.get("resolved_session")
+    if session is None or session.token != token:
+        session = ResolvedSession(token, await get_from_redis_session_async(token))
+        request.state.request_config["resolved_session"] = session
+    return session
+
+
+def get_resolved_session() -> Optional[ResolvedSession]:
+    """The session already resolved by the current request, if any."""
+    request = get_current_request()
+    request_config = getattr(request.state, "request_config", None) if request else None
+    return request_config.get("resolved_session") if request_config else None
+
+
 class RequestMiddleware(BaseHTTPMiddleware):
     async def dispatch(
         self, request: Request, call_next: RequestResponseEndpoint
     ) -> Response:
         # Store request in context var
         token = _request_context.set(request)
+        stats_token = start_query_stats()
         try:
             response = await call_next(request)
+            _report_query_stats(request, response)
             return response
         finally:
+            reset_query_stats(stats_token)
             _request_context.reset(token)
+
+
+def _report_query_stats(request: Request, response: Response) -> None:
+    stats = get_query_stats()
+    if stats is None:
+        return
+
+    route = request.scope.get("route")
+    detect_n_plus_one(
+        stats,
+        f"{request.method} {getattr(route, 'path', request.url.path)}",
+        settings.DB_N_PLUS_ONE_THRESHOLD,
+    )
+    if settings.DB_QUERY_STATS_HEADERS:
+        response.headers["X-DB-Queries"] = str(stats.count)
+        response.headers["X-DB-Time"] = f"{stats.total_ms:.3f}"
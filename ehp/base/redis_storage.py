@@ -1,4 +1,5 @@
 import redis
+import redis.asyncio as aioredis
 from redis.exceptions import ConnectionError
 
 from ehp.config import settings
@@ -14,3 +15,21 @@ def get_redis_client() -> redis.Redis:
     if not redis_client:
         raise ConnectionError("Redis client not initialized")
     return redis_client
+
+
+# Async client for the request path, values are returned as bytes.
+async_redis_client = aioredis.Redis(
+    connection_pool=aioredis.BlockingConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        db=0,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        timeout=settings.REDIS_POOL_TIMEOUT,
+    )
+)
+
+
+def get_async_redis_client() -> aioredis.Redis:
+    if not async_redis_client:
+        raise ConnectionError("Redis client not initialized")
+    return async_redis_client
@@ -1,13 +1,203 @@
+import asyncio
+from collections import OrderedDict
 import json
-from typing import Any, cast, Dict, Optional
+import logging
+import time
+from typing import Any, cast, Dict, Optional, Tuple
 from uuid import uuid4
 
 from fastapi.responses import RedirectResponse
 from pydantic import BaseModel
 
-from ehp.base.redis_storage import get_redis_client
+from ehp.base.redis_storage import get_async_redis_client, get_redis_client
 from ehp.config import settings
-from .jwt_helper import encode_token
+from .jwt_helper import encode_token, get_exp_seconds, verify_token
+
+
+_logger = logging.getLogger(__name__)
+
+# Tokens of the sessions changed or removed, published to drop every worker's
+# local copy.
+SESSION_INVALIDATION_CHANNEL = "session:invalidate"
+# Session ids of the logged out tokens, scored by the token expiry, and the
+# channel announcing them as "<session id> <expiry>".
+REVOKED_SESSIONS_KEY = "session:revoked"
+SESSION_REVOCATION_CHANNEL = "session:revoke"
+
+# KEYS: session token. ARGV: session timeout, refresh interval.
+# Reads the session and slides its expiry only when it was last refreshed more
+# than the interval ago, i.e. its TTL dropped below timeout - interval.
+_GET_SESSION_SCRIPT = """
+local value = redis.call('GET', KEYS[1])
+if value and redis.call('TTL', KEYS[1]) <= tonumber(ARGV[1]) - tonumber(ARGV[2]) then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return value
+"""
+
+
+class _LocalSessionCache:
+    """Bounded LRU of session dicts, only used while subscribed to
+    SESSION_INVALIDATION_CHANNEL so a logout is seen by every worker.
+
+    Each discard is recorded with a new generation, and a session read from
+    Redis is only stored if its token was not discarded since the
+    ``generation`` taken before the read.
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._discards: "OrderedDict[str, int]" = OrderedDict()
+        self.generation = 0
+        # Reads older than this may have missed a discard no longer recorded.
+        self._min_generation = 0
+        self.listening = False
+
+    @property
+    def enabled(self) -> bool:
+        return settings.SESSION_LOCAL_CACHE_SIZE > 0
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        cached = self._entries.get(token)
+        if cached is None:
+            return None
+        if cached[0] <= time.monotonic():
+            del self._entries[token]
+            return None
+        self._entries.move_to_end(token)
+        return cached[1]
+
+    def put(self, token: str, data: Dict[str, Any], generation: int) -> None:
+        if not self.listening or generation < self._min_generation:
+            return
+        if self._discards.get(token, -1) > generation:
+            return
+        self._entries[token] = (
+            time.monotonic() + settings.SESSION_LOCAL_CACHE_TTL,
+            data,
+        )
+        self._entries.move_to_end(token)
+        while len(self._entries) > settings.SESSION_LOCAL_CACHE_SIZE:
+            self._entries.popitem(last=False)
+
+    def discard(self, token: str) -> None:
+        self.generation += 1
+        self._entries.pop(token, None)
+        self._discards[token] = self.generation
+        self._discards.move_to_end(token)
+        while len(self._discards) > settings.SESSION_LOCAL_CACHE_SIZE:
+            self._min_generation = self._discards.popitem(last=False)[1]
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._min_generation = self.generation
+        self._entries.clear()
+        self._discards.clear()
+
+
+class _RevokedSessions:
+    """Local copy of REVOKED_SESSIONS_KEY, only trusted once ``synced``."""
+
+    def __init__(self):
+        self._expires: Dict[str, float] = {}
+        self.synced = False
+
+    def add(self, session_id: str, exp: float) -> None:
+        self._expires[session_id] = exp
+
+    def is_revoked(self, session_id: str) -> bool:
+        exp = self._expires.get(session_id)
+        if exp is not None and exp <= time.time():
+            # The token is rejected as expired from now on.
+            del self._expires[session_id]
+            return False
+        return exp is not None
+
+    async def load(self) -> None:
+        members = await get_async_redis_client().zrangebyscore(
+            REVOKED_SESSIONS_KEY, time.time(), "+inf", withscores=True
+        )
+        self._expires = {member.decode("utf-8"): exp for member, exp in members}
+        self.synced = True
+
+
+_local_sessions = _LocalSessionCache()
+_revoked_sessions = _RevokedSessions()
+_session_listener: Optional[asyncio.Task] = None
+
+
+def _ensure_session_listener() -> None:
+    global _session_listener
+    if _session_listener is None or _session_listener.done():
+        _session_listener = asyncio.get_running_loop().create_task(
+            _listen_for_session_events()
+        )
+
+
+async def _listen_for_session_events() -> None:
+    while True:
+        pubsub = get_async_redis_client().pubsub()
+        try:
+            await pubsub.subscribe(
+                SESSION_INVALIDATION_CHANNEL, SESSION_REVOCATION_CHANNEL
+            )
+            # Reads started before subscribing may have missed a discard.
+            _local_sessions.clear()
+            _local_sessions.listening = True
+            # Loaded once subscribed so no revocation falls in between.
+            await _revoked_sessions.load()
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                data = message["data"].decode("utf-8")
+                if message["channel"].decode("utf-8") == SESSION_REVOCATION_CHANNEL:
+                    session_id, exp = data.rsplit(" ", 1)
+                    _revoked_sessions.add(session_id, float(exp))
+                else:
+                    _local_sessions.discard(data)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            _logger.error(f"Error listening to session events: {e}")
+        finally:
+            # Events may be missed until subscribed again.
+            _local_sessions.listening = False
+            _local_sessions.clear()
+            _revoked_sessions.synced = False
+            await pubsub.aclose()
+        await asyncio.sleep(1)
+
+
+def _revocation(session_token: str) -> Optional[Tuple[str, float]]:
+    claims = verify_token(session_token)
+    session_id = claims.get(settings.SESSION_COOKIE_NAME) if claims else None
+    if not session_id:
+        return None
+    return session_id, cast(float, get_exp_seconds(claims))
+
+
+def verify_session_token(session_token: str) -> Optional[bool]:
+    """
+    Validate a token without reading its session: the signature, issuer and
+    expiry are checked locally, then the token must not have been logged out.
+    Returns None when the session must be read instead: while the revoked
+    sessions are not synced from Redis, or once the token was issued
+    SESSION_TIMEOUT seconds ago. The token expires after SESSION_TIMEOUT
+    minutes, but its session may have idled out from then on.
+    """
+    claims = verify_token(session_token)
+    if not claims or not claims.get(settings.SESSION_COOKIE_NAME):
+        return False
+    issued_at = claims.get("iat")
+    if (
+        not isinstance(issued_at, (int, float))
+        or issued_at + settings.SESSION_TIMEOUT <= time.time()
+    ):
+        return None
+    _ensure_session_listener()
+    if not _revoked_sessions.synced:
+        return None
+    return not _revoked_sessions.is_revoked(claims[settings.SESSION_COOKIE_NAME])
 
 
 class SessionData(BaseModel):
@@ -15,36 +205,180 @@ class SessionData(BaseModel):
     session_info: Dict[str, Any]
 
 
-def create_redis_session(session_info: Dict[str, Any]) -> str:
+def _new_session(session_info: Dict[str, Any]) -> Tuple[str, SessionData]:
     session_id = str(uuid4().hex)
     session_token = encode_token(message={settings.SESSION_COOKIE_NAME: session_id})
     session_data = SessionData(
         session_id=session_id,
         session_info=session_info,
     )
+    return session_token, session_data
+
+
+class ResolvedSession:
+    """Session of a token as read from Redis, with typed accessors.
+
+    ``data`` is None for an unknown or expired token.
+    """
+
+    __slots__ = ("token", "data")
+
+    def __init__(self, token: str, data: Optional[Dict[str, Any]]):
+        self.token = token
+        self.data = data
+
+    @property
+    def is_valid(self) -> bool:
+        return self.data is not None
+
+    @property
+    def session_info(self) -> Dict[str, Any]:
+        return (self.data or {}).get("session_info") or {}
+
+    @property
+    def person(self) -> Dict[str, Any]:
+        return self.session_info.get("person") or {}
+
+    @property
+    def user_id(self) -> Optional[int]:
+        return self.session_info.get("id")
+
+    @property
+    def user_name(self) -> Optional[str]:
+        return self.session_info.get("user_name")
+
+    @property
+    def profile_id(self) -> Optional[int]:
+        return self.session_info.get("profile_id")
+
+    @property
+    def language_id(self) -> Optional[int]:
+        return self.person.get("language_id")
+
+
+def create_redis_session(session_info: Dict[str, Any]) -> str:
+    session_token, session_data = _new_session(session_info)
     write_to_redis_session(session_token, session_data)
     return session_token
 
 
+def _revoke(pipeline: Any, session_token: str) -> None:
+    """Queue the revocation of a logged out token on ``pipeline``."""
+    revocation = _revocation(session_token)
+    if revocation is None:
+        return
+    session_id, exp = revocation
+    pipeline.zadd(REVOKED_SESSIONS_KEY, {session_id: exp})
+    pipeline.zremrangebyscore(REVOKED_SESSIONS_KEY, "-inf", time.time())
+    pipeline.publish(SESSION_REVOCATION_CHANNEL, f"{session_id} {exp}")
+
+
 def remove_from_redis_session(session_token: str) -> None:
-    get_redis_client().delete(session_token)
+    pipeline = get_redis_client().pipeline(transaction=False)
+    pipeline.delete(session_token)
+    pipeline.publish(SESSION_INVALIDATION_CHANNEL, session_token)
+    _revoke(pipeline, session_token)
+    pipeline.execute()
 
 
 def get_from_redis_session(session_token: str) -> Optional[Dict[str, Any]]:
     if session_token:
         redis_client = get_redis_client()
-        user_session: str = redis_client.get(session_token)
+        if settings.SESSION_REFRESH_INTERVAL > 0:
+            user_session: Optional[str] = redis_client.eval(
+                _GET_SESSION_SCRIPT,
+                1,
+                session_token,
+                settings.SESSION_TIMEOUT,
+                settings.SESSION_REFRESH_INTERVAL,
+            )
+        else:
+            user_session = redis_client.getex(
+                session_token, ex=settings.SESSION_TIMEOUT
+            )
         if user_session:
-            redis_client.expire(session_token, settings.SESSION_TIMEOUT)
             return cast(Dict[str, Any], json.loads(user_session))
     return None
 
 
 def write_to_redis_session(session_token: str, session_data: SessionData) -> None:
     if session_token and session_data:
-        redis_client = get_redis_client()
-        redis_client.set(session_token, json.dumps(session_data.dict()))
-        redis_client.expire(session_token, settings.SESSION_TIMEOUT)
+        pipeline = get_redis_client().pipeline(transaction=False)
+        pipeline.set(
+            session_token,
+            json.dumps(session_data.model_dump()),
+            ex=settings.SESSION_TIMEOUT,
+        )
+        pipeline.publish(SESSION_INVALIDATION_CHANNEL, session_token)
+        pipeline.execute()
+
+
+# The functions above block the event loop and are kept for scripts, the
+# request path uses the asyncio versions below.
+
+
+async def create_redis_session_async(session_info: Dict[str, Any]) -> str:
+    session_token, session_data = _new_session(session_info)
+    await write_to_redis_session_async(session_token, session_data)
+    return session_token
+
+
+async def remove_from_redis_session_async(session_token: str) -> None:
+    _local_sessions.discard(session_token)
+    pipeline = get_async_redis_client().pipeline(transaction=False)
+    pipeline.delete(session_token)
+    pipeline.publish(SESSION_INVALIDATION_CHANNEL, session_token)
+    _revoke(pipeline, session_token)
+    await pipeline.execute()
+
+
+async def get_from_redis_session_async(
+    session_token: str,
+) -> Optional[Dict[str, Any]]:
+    """The session of ``session_token``, served from the local cache while it
+    is fresh. The returned dict may be shared and must not be modified."""
+    if session_token:
+        generation = _local_sessions.generation
+        if _local_sessions.enabled:
+            _ensure_session_listener()
+            cached = _local_sessions.get(session_token)
+            if cached is not None:
+                return cached
+
+        redis_client = get_async_redis_client()
+        if settings.SESSION_REFRESH_INTERVAL > 0:
+            user_session: Optional[bytes] = await redis_client.eval(
+                _GET_SESSION_SCRIPT,
+                1,
+                session_token,
+                settings.SESSION_TIMEOUT,
+                settings.SESSION_REFRESH_INTERVAL,
+            )
+        else:
+            user_session = await redis_client.getex(
+                session_token, ex=settings.SESSION_TIMEOUT
+            )
+        if user_session:
+            data = cast(Dict[str, Any], json.loads(user_session))
+            if _local_sessions.enabled:
+                _local_sessions.put(session_token, data, generation)
+            return data
+    return None
+
+
+async def write_to_redis_session_async(
+    session_token: str, session_data: SessionData
+) -> None:
+    if session_token and session_data:
+        _local_sessions.discard(session_token)
+        pipeline = get_async_redis_client().pipeline(transaction=False)
+        pipeline.set(
+            session_token,
+            json.dumps(session_data.model_dump()),
+            ex=settings.SESSION_TIMEOUT,
+        )
+        pipeline.publish(SESSION_INVALIDATION_CHANNEL, session_token)
+        await pipeline.execute()
 
 
 def redirect_to(
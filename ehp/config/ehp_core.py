@@ -30,6 +30,12 @@ class Settings(BaseSettings):
         f"{POSTGRES_PASSWORD}@{DATABASE_URL}:"
         f"{DATABASE_PORT}/{POSTGRES_DB}"
     )
+    # Comma-separated "host[:port]" list of streaming replicas used for reads.
+    DATABASE_REPLICA_HOSTS: str = os.environ.get("DATABASE_REPLICA_HOSTS", "")
+    DB_REPLICA_MAX_LAG: float = float(os.environ.get("DB_REPLICA_MAX_LAG", 5))
+    DB_REPLICA_CHECK_INTERVAL: float = float(
+        os.environ.get("DB_REPLICA_CHECK_INTERVAL", 10)
+    )
     SQLALCHEMY_ECHO: bool = bool(os.environ["SQLALCHEMY_ECHO"] == "True")
     SQLALCHEMY_TRACK_MODIFICATIONS: bool = bool(
         os.environ.get("SQLALCHEMY_TRACK_MODIFICATIONS", "False") == "True"
@@ -39,18 +45,81 @@ class Settings(BaseSettings):
     # type: ignore
     POOL_TIMEOUT: int = int(os.environ.get("SQLALCHEMY_POOL_TIMEOUT", 20))
 
+    # Connections the whole deployment may open (keep below max_connections),
+    # split evenly between the uvicorn workers of one instance.
+    DB_MAX_CONNECTIONS: int = int(os.environ.get("DB_MAX_CONNECTIONS", 100))
+    WEB_CONCURRENCY: int = int(os.environ.get("WEB_CONCURRENCY", 1))
+    POOL_SIZE: int = int(os.environ.get("SQLALCHEMY_POOL_SIZE", 20))
+    POOL_PRE_PING: bool = os.environ.get("SQLALCHEMY_POOL_PRE_PING", "True") == "True"
+
+    # Statements kept compiled by SQLAlchemy per engine and prepared by asyncpg
+    # per connection (0 disables asyncpg's cache, e.g. behind pgbouncer).
+    DB_QUERY_CACHE_SIZE: int = int(os.environ.get("DB_QUERY_CACHE_SIZE", 500))
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int = int(
+        os.environ.get("DB_PREPARED_STATEMENT_CACHE_SIZE", 100)
+    )
+
+    # Send X-DB-Queries/X-DB-Time response headers, always on in DEBUG.
+    DB_QUERY_STATS_HEADERS: bool = (
+        os.environ.get("DB_QUERY_STATS_HEADERS", str(DEBUG)) == "True"
+    )
+    # Log a possible N+1 when a request repeats a statement more than this
+    # many times, 0 disables the check.
+    DB_N_PLUS_ONE_THRESHOLD: int = int(os.environ.get("DB_N_PLUS_ONE_THRESHOLD", 10))
+
     SQLALCHEMY_ENGINE_OPTIONS: Dict[str, Any] = {
         "pool_recycle": POOL_RECYCLE,
         "pool_timeout": POOL_TIMEOUT,
     }
     ITEMS_PER_PAGE: int = 20
+    COUNT_CACHE_TTL: int = int(os.environ.get("COUNT_CACHE_TTL", 60))
+    COUNT_CACHE_MAX_ENTRIES: int = int(os.environ.get("COUNT_CACHE_MAX_ENTRIES", 1024))
+    # Rows per multi-row INSERT/UPDATE and the size from which bulk_insert
+    # switches to COPY.
+    BULK_BATCH_SIZE: int = int(os.environ.get("BULK_BATCH_SIZE", 1000))
+    BULK_COPY_THRESHOLD: int = int(os.environ.get("BULK_COPY_THRESHOLD", 10000))
+    PAGING_SINGLE_QUERY: bool = os.environ.get("PAGING_SINGLE_QUERY", "False") == "True"
+    # Route response cache (cached_response): seconds a response is fresh and
+    # how long it may still be served stale while it is recomputed.
+    RESPONSE_CACHE_ENABLED: bool = (
+        os.environ.get("RESPONSE_CACHE_ENABLED", "True") == "True"
+    )
+    RESPONSE_CACHE_TTL: int = int(os.environ.get("RESPONSE_CACHE_TTL", 60))
+    RESPONSE_CACHE_STALE: int = int(os.environ.get("RESPONSE_CACHE_STALE", 30))
+    # Cache-Control of GET responses, "no-cache" makes clients revalidate
+    # their copy with If-None-Match / If-Modified-Since.
+    HTTP_CACHE_CONTROL: str = os.environ.get("HTTP_CACHE_CONTROL", "no-cache")
     DEFAULT_LANGUAGE: str = os.environ.get("DEFAULT_LANGUAGE", "en_US")
+    # Language of the requests without a session language (get_language_id).
+    DEFAULT_LANGUAGE_ID: int = int(os.environ.get("DEFAULT_LANGUAGE_ID", 1))
     DEPLOYED_AT: str = str(datetime.now())
 
     REDIS_HOST: str = os.environ["REDIS_HOST"]
     REDIS_PORT: int = int(os.environ["REDIS_PORT"])
+    # Connections of the asyncio client shared by a worker, callers wait up to
+    # REDIS_POOL_TIMEOUT seconds for a free one instead of opening more.
+    REDIS_MAX_CONNECTIONS: int = int(os.environ.get("REDIS_MAX_CONNECTIONS", 50))
+    REDIS_POOL_TIMEOUT: int = int(os.environ.get("REDIS_POOL_TIMEOUT", 5))
     SESSION_TIMEOUT: int = int(os.environ["SESSION_TIMEOUT"])
+    # Slide the session expiry at most once per this many seconds instead of
+    # on every read (0), must be smaller than SESSION_TIMEOUT.
+    SESSION_REFRESH_INTERVAL: int = int(os.environ.get("SESSION_REFRESH_INTERVAL", 0))
     SESSION_COOKIE_NAME: str = os.environ["SESSION_COOKIE_NAME"]
+    # In-process cache of the sessions read by a worker (0 disables it), kept
+    # coherent through a Redis pub/sub channel. Entries are re-read from Redis
+    # after SESSION_LOCAL_CACHE_TTL seconds, which also slides their expiry.
+    SESSION_LOCAL_CACHE_SIZE: int = int(
+        os.environ.get("SESSION_LOCAL_CACHE_SIZE", 10000)
+    )
+    SESSION_LOCAL_CACHE_TTL: int = int(os.environ.get("SESSION_LOCAL_CACHE_TTL", 5))
+    # Processes hashing and checking passwords off the event loop, calls beyond
+    # PASSWORD_HASH_MAX_PENDING waiting or running are rejected with a 503.
+    PASSWORD_HASH_WORKERS: int = int(
+        os.environ.get("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1))
+    )
+    PASSWORD_HASH_MAX_PENDING: int = int(
+        os.environ.get("PASSWORD_HASH_MAX_PENDING", 32)
+    )
 
     ELASTICSEARCH_URL: str = os.environ["ELASTICSEARCH_URL"]
 
@@ -59,6 +128,13 @@ class Settings(BaseSettings):
     API_KEY_VALUE: str = os.environ.get(
         "API_KEY_VALUE", "52b23c0a-cf59-48ef-be2f-921c45377ac8"
     )
+    # Key of the internal /_meta/ statistics endpoints, sent as X-Admin-Key.
+    # They expose hosts, errors and SQL, so they are disabled (404) while it is
+    # empty.
+    META_ADMIN_KEY: str = os.environ.get("META_ADMIN_KEY", "")
+    # Server-only key signing the session tokens, unlike API_KEY_VALUE it is
+    # never sent to clients. Required, checked below.
+    SESSION_TOKEN_SECRET: str = os.environ.get("SESSION_TOKEN_SECRET", "")
     AUTH_TOKEN_NAME: str = "x-token-auth"
     ACTIVE_SESSION_PARAM: str = "auth_info"
     PROFILE_INFO: str = "profile_info"
@@ -79,3 +155,10 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
+
+if not settings.SESSION_TOKEN_SECRET:
+    raise RuntimeError(
+        "SESSION_TOKEN_SECRET is not set. It is the server-only key signing the "
+        "session tokens and must be a long random value distinct from "
+        "API_KEY_VALUE; add it to the deployment .env (see .env.example)."
+    )
@@ -1,26 +1,65 @@
+from contextlib import aclosing
 from datetime import date, datetime
 from decimal import Decimal
+from enum import Enum
 from functools import cached_property, lru_cache
+from operator import attrgetter, itemgetter
 from typing import (
     Any,
+    AsyncGenerator,
+    Callable,
     ClassVar,
     Dict,
     List,
     Optional,
+    Sequence,
     Set,
     Tuple,
+    Union,
 )
 import uuid
 
-from sqlalchemy import func, select
+from fastapi import HTTPException
+from sqlalchemy import (
+    any_,
+    bindparam,
+    case,
+    event,
+    func,
+    insert,
+    or_,
+    select,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, Mapper, selectinload
 from sqlalchemy.sql import exists
-
-from ehp.db import Base, DBManager, get_async_page_info
+from sqlalchemy.sql.selectable import Select
+
+from ehp.config import settings
+from ehp.db import (
+    Base,
+    count_rows,
+    CountStrategy,
+    DBManager,
+    get_app_db_manager,
+    get_async_cursor_page_info,
+    get_async_page_info,
+)
+from ehp.base.cache import add_cache_tags, table_tag
+from ehp.base.entity_cache import check_cache_options, EntityCache
 from ehp.base.middleware import get_current_request
+from ehp.db.db_manager import _WROTE_KEY, mark_write
+from ehp.db.loader import get_request_loader
 from ehp.utils.base import log_error
+from ehp.utils.request import make_etag
 
 
 ALL_DELETE_ORPHAN = "all, delete-orphan"
+# asyncpg refuses statements with more bind parameters than this.
+MAX_BIND_PARAMS = 32767
 
 
 def _serialize_value(value: Any) -> Any:
@@ -36,10 +75,84 @@ def _serialize_value(value: Any) -> Any:
     return value
 
 
+Serializer = Callable[[Any], Dict[str, Any]]
+
+
+def _value_converter(column_type: Any) -> Optional[Callable[[Any], Any]]:
+    """Converter for the values of a column type, None when they are already
+    JSON compatible."""
+    try:
+        python_type = column_type.python_type
+    except NotImplementedError:
+        return _serialize_value
+
+    if issubclass(python_type, (date, datetime)):
+        return python_type.isoformat
+    if issubclass(python_type, Decimal):
+        return str
+    if issubclass(python_type, bytes):
+        return lambda value: value.decode("utf-8")
+    if issubclass(python_type, uuid.UUID):
+        return str
+    if issubclass(python_type, Enum):
+        return attrgetter("value")
+    if issubclass(python_type, (str, int, float, bool, dict, list)):
+        return None
+    return _serialize_value
+
+
+def _build_serializer(mapper: Mapper) -> Serializer:
+    """Build the row serializer of a mapped class from its column types.
+
+    Loaded column values are read straight from the instance ``__dict__``
+    (skipping the instrumented attribute descriptors) with one ``itemgetter``
+    call, only unloaded attributes fall back to ``getattr``.
+    """
+    keys: List[str] = []
+    converted: List[Tuple[str, Callable[[Any], Any]]] = []
+    for prop in mapper.column_attrs:
+        keys.append(prop.key)
+        converter = _value_converter(prop.columns[0].type)
+        if converter is not None:
+            converted.append((prop.key, converter))
+
+    # itemgetter only returns a tuple for two or more keys.
+    get_values = itemgetter(*keys) if len(keys) > 1 else None
+
+    def serialize(obj: Any) -> Dict[str, Any]:
+        state = obj.__dict__
+        try:
+            if get_values is not None:
+                data = dict(zip(keys, get_values(state)))
+            else:
+                data = {key: state[key] for key in keys}
+        except KeyError:
+            data = {key: getattr(obj, key) for key in keys}
+        for key, converter in converted:
+            value = data[key]
+            if value is not None:
+                data[key] = converter(value)
+        return data
+
+    return serialize
+
+
 class BaseModel(Base):
     __abstract__ = True
     _mapper_attrs: Dict[str, Set[str]] = {}
     _db_manager = None
+    # Default count strategy for count_* and the paged listings of the model.
+    __count_strategy__: ClassVar[CountStrategy] = CountStrategy.EXACT
+    # Timestamp column that versions the rows for conditional GETs.
+    __version_column__: ClassVar[str] = "updated_at"
+    # Opt-in entity cache of get_by_id/get_by_code for rarely changing rows,
+    # e.g. {"ttl": 300, "max_entries": 1000, "redis": True}.
+    __cache__: ClassVar[Optional[Dict[str, Any]]] = None
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+        if cls.__dict__.get("__cache__"):
+            check_cache_options(cls.__name__, cls.__cache__)
 
     @cached_property
     def _class_name(self) -> str:
@@ -65,18 +178,37 @@ class BaseModel(Base):
             return set()
         return {attr for attr in cls.__mapper__.c.keys()}
 
+    @classmethod
+    def _get_serializer(cls) -> Serializer:
+        """Serializer of the class, compiled when its mapper is configured."""
+        serializer = cls.__dict__.get("_serializer")
+        if serializer is None:
+            serializer = cls._serializer = _build_serializer(cls.__mapper__)
+        return serializer
+
+    def serialize_sync(self) -> Dict[str, Any]:
+        """Convert the model columns to a JSON compatible dictionary."""
+        if not hasattr(self, "__mapper__"):
+            return {}
+        return self._get_serializer()(self)
+
+    @classmethod
+    def serialize_many(cls, rows: List[Any]) -> List[Dict[str, Any]]:
+        """Serialize a list of model objects without a coroutine per row."""
+        if not rows:
+            return []
+        serializer = cls._get_serializer()
+        return [
+            serializer(row) if type(row) is cls else row._get_serializer()(row)
+            for row in rows
+        ]
+
     async def to_dict(self) -> Dict[str, Any]:
         """
         Convert model to dictionary with options for inclusion/exclusion
 
         """
-        if not hasattr(self, "__mapper__"):
-            return {}
-
-        # Get cached column names
-        columns = self._get_mapper_columns()
-
-        return {attr: _serialize_value(getattr(self, attr)) for attr in columns}
+        return self.serialize_sync()
 
     async def to_dict_flat(self) -> Dict[str, Any]:
         """Simplified version for when you just need basic serialization"""
@@ -101,7 +233,7 @@ class BaseModel(Base):
     async def to_json(self) -> Dict[str, Any]:
         """Convert to JSON-compatible dict"""
 
-        async def extended_encoder(x: Any) -> Any:
+        def extended_encoder(x: Any) -> Any:
             # Get encoder from cached mapping
             encoder = self._json_encoders.get(type(x))
             if encoder:
@@ -111,10 +243,63 @@ class BaseModel(Base):
         # Avoid double conversion by using the encoder directly
         return {k: extended_encoder(v) for k, v in (await self.to_dict()).items()}
 
+    # Statements of the hot helpers, built once per model with bindparam
+    # placeholders so SQLAlchemy's compiled cache and asyncpg's prepared
+    # statement cache are hit without rebuilding the query on every call.
+    @classmethod
+    @lru_cache
+    def _exists_stmt(cls) -> Select:
+        return select(exists().where(cls.id == bindparam("obj_id")))
+
+    @classmethod
+    @lru_cache
+    def _by_ids_stmt(cls) -> Select:
+        return select(cls).where(
+            cls.id == any_(bindparam("ids", type_=ARRAY(cls.id.type)))
+        )
+
+    @classmethod
+    @lru_cache
+    def _by_code_stmt(cls) -> Select:
+        return select(cls).where(cls.code == bindparam("code"))
+
+    @classmethod
+    @lru_cache
+    def _ids_stmt(cls) -> Select:
+        return select(cls.id)
+
+    @classmethod
+    @lru_cache
+    def _ids_by_status_stmt(cls) -> Select:
+        return select(cls.id).where(cls.status == bindparam("status"))
+
+    @classmethod
+    def _select_columns(cls, columns: Sequence[Any], with_id: bool = False) -> Select:
+        """Column-only select used by the projection mode of the listings.
+
+        Columns are attribute names or column expressions of the model. The
+        rows are returned as dicts, so no ORM object is built or tracked.
+        """
+        attrs = [
+            getattr(cls, column) if isinstance(column, str) else column
+            for column in columns
+        ]
+        if with_id and not any(attr.key == "id" for attr in attrs):
+            attrs.append(cls.id)
+        return select(*attrs)
+
+    @classmethod
+    def _get_entity_cache(cls) -> Optional[EntityCache]:
+        return cls.__dict__.get("_entity_cache")
+
     @classmethod
     async def get_db_manager(cls) -> DBManager:
         request = get_current_request()
-        return request.state.request_config.get("db_manager")
+        request_config = (
+            getattr(request.state, "request_config", None) if request else None
+        )
+        db_manager = request_config.get("db_manager") if request_config else None
+        return db_manager or get_app_db_manager()
 
     # moved to the repository
     @classmethod
@@ -124,9 +309,8 @@ class BaseModel(Base):
 
         try:
             db_manager = await cls.get_db_manager()
-            async with db_manager.transaction() as session:
-                stmt = select(exists().where(cls.id == obj_id))
-                result = await session.scalar(stmt)
+            async with db_manager.transaction(readonly=True) as session:
+                result = await session.scalar(cls._exists_stmt(), {"obj_id": obj_id})
                 return bool(result)
         except Exception as e:
             log_error(f"Error checking existence of {cls.__name__} id {obj_id}: {e}")
@@ -140,18 +324,95 @@ class BaseModel(Base):
 
         try:
             db_manager = await cls.get_db_manager()
-            async with db_manager.transaction() as session:
-                return await session.get(cls, obj_id)
+            if db_manager.has_scope_session():
+                # Inside an open transaction the caller needs objects attached
+                # to it, so the entity cache is not used.
+                async with db_manager.transaction(readonly=True) as session:
+                    return await cls._get_in_session(session, obj_id)
+
+            cache = cls._get_entity_cache()
+            if cache is not None:
+                obj, generation = await cache.get("id", obj_id)
+                if obj is not None:
+                    return obj
+
+            # Coalesce with the other lookups of this request.
+            loader = get_request_loader(f"{cls.__name__}.id", cls._fetch_by_ids)
+            if loader is not None:
+                obj = await loader.load(obj_id)
+            else:
+                async with db_manager.transaction(readonly=True) as session:
+                    obj = await session.get(cls, obj_id)
+
+            if cache is not None and obj is not None:
+                await cache.set(obj, generation)
+            return obj
         except Exception as e:
             log_error(f"Error getting {cls.__name__} by id {obj_id}: {e}")
             return None
 
+    @classmethod
+    async def _get_in_session(cls, session: AsyncSession, obj_id: int) -> Any:
+        """The object of ``obj_id`` attached to ``session``.
+
+        A lookup batched by the request loader is merged into the session
+        without another query, seeding its identity map. The loader reads on
+        its own connection, so once the transaction wrote it is bypassed.
+        """
+        loader = get_request_loader(f"{cls.__name__}.id", cls._fetch_by_ids)
+        if (
+            loader is None
+            or session.info.get(_WROTE_KEY)
+            or session.new
+            or session.dirty
+            or session.deleted
+            or cls.__mapper__.identity_key_from_primary_key([obj_id])
+            in session.identity_map
+        ):
+            return await session.get(cls, obj_id)
+
+        obj = await loader.load(obj_id)
+        return None if obj is None else await session.merge(obj, load=False)
+
+    @classmethod
+    async def get_many_by_ids(cls, obj_ids: List[int]) -> List[Any]:
+        """Get the objects for the given ids in one query, in the order of the
+        ids. Repeated ids are returned once and missing ones are skipped."""
+        obj_ids = list(dict.fromkeys(obj_id for obj_id in obj_ids if obj_id))
+        if not obj_ids:
+            return []
+
+        try:
+            db_manager = await cls.get_db_manager()
+            if not db_manager.has_scope_session():
+                loader = get_request_loader(f"{cls.__name__}.id", cls._fetch_by_ids)
+                if loader is not None:
+                    objs = await loader.load_many(obj_ids)
+                    return [obj for obj in objs if obj is not None]
+
+            found = {obj.id: obj for obj in await cls._fetch_by_ids(obj_ids)}
+            return [found[obj_id] for obj_id in obj_ids if obj_id in found]
+        except Exception as e:
+            log_error(f"Error getting {cls.__name__} by ids {obj_ids}: {e}")
+            return []
+
+    @classmethod
+    async def _fetch_by_ids(cls, obj_ids: List[int]) -> List[Any]:
+        db_manager = await cls.get_db_manager()
+        async with db_manager.transaction(readonly=True) as session:
+            result = await session.scalars(cls._by_ids_stmt(), {"ids": obj_ids})
+            return list(result)
+
     # moved to the repository
     @classmethod
-    async def list(cls) -> List[Any]:
+    async def list(cls, columns: Optional[Sequence[Any]] = None) -> List[Any]:
         try:
             db_manager = await cls.get_db_manager()
-            async with db_manager.transaction() as session:
+            async with db_manager.transaction(readonly=True) as session:
+                if columns:
+                    result = await session.execute(cls._select_columns(columns))
+                    return [dict(row) for row in result.mappings()]
+
                 stmt = select(cls).execution_options(populate_existing=True)
                 result = await session.scalars(stmt)
                 return list(result)
@@ -159,6 +420,30 @@ class BaseModel(Base):
             log_error(f"Error listing {cls.__name__}: {e}")
             return []
 
+    @classmethod
+    async def iter_all(cls, batch_size: int = 1000) -> AsyncGenerator[Any, None]:
+        """Iterate over every row of the model with a server-side cursor."""
+        db_manager = await cls.get_db_manager()
+        async with aclosing(
+            db_manager.stream(select(cls).order_by(cls.id), batch_size=batch_size)
+        ) as objs:
+            async for obj in objs:
+                yield obj
+
+    @classmethod
+    async def iter_batches(
+        cls, batch_size: int = 1000
+    ) -> AsyncGenerator[List[Any], None]:
+        """Iterate over every row of the model in lists of batch_size objects."""
+        db_manager = await cls.get_db_manager()
+        async with aclosing(
+            db_manager.stream_batches(
+                select(cls).order_by(cls.id), batch_size=batch_size
+            )
+        ) as batches:
+            async for batch in batches:
+                yield batch
+
     # Cache the status check at class level
     _has_status: ClassVar[bool] = None
     _has_active: ClassVar[bool] = None
@@ -177,6 +462,37 @@ class BaseModel(Base):
             return cls.active == "1"
         return None
 
+    @classmethod
+    async def get_version(
+        cls, obj_id: Optional[int] = None
+    ) -> Tuple[Optional[str], Optional[datetime]]:
+        """Cheap ETag and Last-Modified of one row, or of the whole table when
+        no id is given, to answer conditional GETs before the real query.
+
+        The table version includes the row count, which catches deletes, taken
+        with the model's ``__count_strategy__`` like its listings.
+        Returns (None, None) when the model has no ``__version_column__``.
+        """
+        column = getattr(cls, cls.__version_column__, None)
+        if column is None:
+            return None, None
+
+        try:
+            db_manager = await cls.get_db_manager()
+            async with db_manager.transaction(readonly=True) as session:
+                if obj_id:
+                    last_modified = await session.scalar(
+                        select(column).where(cls.id == obj_id)
+                    )
+                else:
+                    last_modified = await session.scalar(select(func.max(column)))
+            total = await cls.count_by_id() if not obj_id else 1
+            token = f"{cls.__tablename__}:{obj_id}:{total}:{last_modified}"
+            return make_etag(token), last_modified
+        except Exception as e:
+            log_error(f"Error getting version of {cls.__name__}: {e}")
+            return None, None
+
     @classmethod
     async def get_active_by_id(cls, obj_id: int) -> Optional[Any]:
         if not obj_id:
@@ -184,6 +500,11 @@ class BaseModel(Base):
 
         try:
             db_manager = await cls.get_db_manager()
+            if not db_manager.has_scope_session():
+                # The row lock below would be released on return, so outside a
+                # transaction the lookup is batched like get_by_id.
+                return await cls.get_by_id(obj_id)
+
             async with db_manager.transaction() as session:
                 # Get the active condition (now cached)
                 active_condition = await cls._get_active_condition()
@@ -204,15 +525,43 @@ class BaseModel(Base):
 
     # moved to the repository
     @classmethod
-    async def list_paged(cls, page: int) -> Tuple[List[Any], int, int]:
+    async def list_paged(
+        cls,
+        page: int,
+        count_strategy: Optional[CountStrategy] = None,
+        columns: Optional[Sequence[Any]] = None,
+    ) -> Tuple[List[Any], int, int]:
+        """Page of the model objects, or of dicts of ``columns`` only."""
         try:
             return await get_async_page_info(
-                select(cls), page, db_manager=await cls.get_db_manager()
+                cls._select_columns(columns) if columns else select(cls),
+                page,
+                db_manager=await cls.get_db_manager(),
+                count_strategy=count_strategy or cls.__count_strategy__,
+                as_rows=bool(columns),
             )
         except Exception as e:
             log_error(e)
         return [], 0, 0
 
+    @classmethod
+    async def list_cursor_paged(
+        cls, after: Optional[str] = None, columns: Optional[Sequence[Any]] = None
+    ) -> Tuple[List[Any], Optional[str], int]:
+        try:
+            return await get_async_cursor_page_info(
+                cls._select_columns(columns, with_id=True) if columns else select(cls),
+                order_columns=[cls.id],
+                after=after,
+                db_manager=await cls.get_db_manager(),
+                as_rows=bool(columns),
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            log_error(e)
+        return [], None, 0
+
     @classmethod
     async def obj_delete(cls, obj_id: int) -> bool:
         if not obj_id:
@@ -236,97 +585,407 @@ class BaseModel(Base):
             return False
 
     @classmethod
-    async def count_by_id(cls) -> int:
+    def _bulk_chunks(
+        cls, rows: Sequence[Dict[str, Any]]
+    ) -> List[Sequence[Dict[str, Any]]]:
+        columns = max(len(row) for row in rows) or 1
+        size = max(1, min(settings.BULK_BATCH_SIZE, MAX_BIND_PARAMS // columns))
+        return [rows[i : i + size] for i in range(0, len(rows), size)]
+
+    @classmethod
+    def _can_copy(cls, rows: Sequence[Dict[str, Any]]) -> bool:
+        """COPY skips the ORM, so it is only used when every row has the same
+        columns and no Python-side default would be lost for the others."""
+        if len(rows) < settings.BULK_COPY_THRESHOLD:
+            return False
+        keys = rows[0].keys()
+        if any(row.keys() != keys for row in rows):
+            return False
+        # Rows are keyed by attribute name, which may differ from the column's.
+        return all(
+            prop.key in keys or prop.columns[0].default is None
+            for prop in cls.__mapper__.column_attrs
+        )
+
+    @classmethod
+    async def _copy_rows(
+        cls, session: AsyncSession, rows: Sequence[Dict[str, Any]]
+    ) -> int:
+        connection = await session.connection()
+        raw_connection = await connection.get_raw_connection()
+        keys = list(rows[0].keys())
+        table = cls.__table__
+        await raw_connection.driver_connection.copy_records_to_table(
+            table.name,
+            records=[tuple(row[key] for key in keys) for row in rows],
+            columns=[cls.__mapper__.c[key].name for key in keys],
+            schema_name=table.schema,
+        )
+        mark_write(session)
+        add_cache_tags(session, [table_tag(table.name)])
+        return len(rows)
+
+    @classmethod
+    async def bulk_insert(
+        cls, rows: Sequence[Dict[str, Any]], return_ids: bool = False
+    ) -> Union[List[Any], int]:
+        """Insert many rows with multi-row ``INSERT ... VALUES`` statements.
+
+        Args:
+            rows: Column values of every row, keyed by attribute name
+            return_ids: Return the ids of the new rows instead of their count.
+                Batches of at least ``BULK_COPY_THRESHOLD`` rows are written
+                with ``COPY`` when ids are not requested
+
+        Returns:
+            The new ids (or the number of rows inserted), [] or 0 on error.
+        """
+        if not rows:
+            return [] if return_ids else 0
+
         try:
             db_manager = await cls.get_db_manager()
             async with db_manager.transaction() as session:
-                stmt = (
-                    select(func.count())
-                    .select_from(select(cls.id).subquery())
-                    .execution_options(populate_existing=True)
-                )
+                if not return_ids and cls._can_copy(rows):
+                    if session.bind.dialect.driver == "asyncpg":
+                        return await cls._copy_rows(session, rows)
+
+                if not return_ids:
+                    for chunk in cls._bulk_chunks(rows):
+                        await session.execute(insert(cls), chunk)
+                    return len(rows)
+
+                ids = []
+                stmt = insert(cls).returning(cls.id, sort_by_parameter_order=True)
+                for chunk in cls._bulk_chunks(rows):
+                    ids.extend(await session.scalars(stmt, chunk))
+                return ids
+        except Exception as e:
+            log_error(f"Error bulk inserting {cls.__name__}: {e}")
+            return [] if return_ids else 0
+
+    @classmethod
+    async def bulk_upsert(
+        cls,
+        rows: Sequence[Dict[str, Any]],
+        on_conflict: Sequence[str] = ("id",),
+        update_columns: Optional[Sequence[str]] = None,
+        return_ids: bool = False,
+    ) -> Union[List[Any], int]:
+        """Insert many rows with ``INSERT ... ON CONFLICT``.
+
+        Args:
+            rows: Column values of every row, keyed by attribute name
+            on_conflict: Columns of the unique index the conflict is checked on
+            update_columns: Columns overwritten when the row exists, defaults to
+                every given column but the conflict ones. Empty to skip
+                existing rows (``DO NOTHING``)
+            return_ids: Return the ids of the inserted or updated rows (rows
+                skipped by ``DO NOTHING`` have none) instead of their count
+
+        Returns:
+            The ids (or the number of rows sent), [] or 0 on error.
+        """
+        if not rows:
+            return [] if return_ids else 0
+
+        # A statement may not touch the same row twice, keep the last one.
+        unique_rows: Dict[Any, Dict[str, Any]] = {}
+        for index, row in enumerate(rows):
+            key = tuple(row.get(column) for column in on_conflict)
+            unique_rows[index if None in key else key] = row
+        rows = list(unique_rows.values())
 
-                # Use scalar() directly
-                result = await session.scalar(stmt)
-            return int(result or 0)  # Handle None case
+        if update_columns is None:
+            update_columns = [
+                key for key in rows[0].keys() if key not in set(on_conflict)
+            ]
+
+        stmt = cls._upsert_stmt(on_conflict, update_columns)
+
+        try:
+            db_manager = await cls.get_db_manager()
+            async with db_manager.transaction() as session:
+                if not return_ids:
+                    for chunk in cls._bulk_chunks(rows):
+                        await session.execute(stmt, chunk)
+                    return len(rows)
+
+                ids = []
+                stmt = stmt.returning(cls.id)
+                for chunk in cls._bulk_chunks(rows):
+                    ids.extend(await session.scalars(stmt, chunk))
+                return ids
         except Exception as e:
-            log_error(e)
-        return 0
+            log_error(f"Error bulk upserting {cls.__name__}: {e}")
+            return [] if return_ids else 0
 
     @classmethod
-    async def count_by_id_and_status(cls, status: str) -> int:
-        if not status:  # Early return for invalid status
+    def _upsert_stmt(
+        cls, on_conflict: Sequence[str], update_columns: Sequence[str]
+    ) -> Any:
+        # Rows are keyed by attribute name, the statement needs the columns.
+        columns = cls.__mapper__.c
+        index_elements = [columns[key] for key in on_conflict]
+        stmt = pg_insert(cls)
+        if not update_columns:
+            return stmt.on_conflict_do_nothing(index_elements=index_elements)
+        return stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={
+                columns[key]: stmt.excluded[columns[key].name] for key in update_columns
+            },
+        )
+
+    @classmethod
+    async def bulk_update(cls, rows: Sequence[Dict[str, Any]]) -> int:
+        """Update many rows by primary key, every row must include ``id``.
+
+        Returns:
+            The number of rows sent, 0 on error.
+        """
+        if not rows:
             return 0
 
         try:
             db_manager = await cls.get_db_manager()
             async with db_manager.transaction() as session:
-                # Optimize count query with subquery
-                stmt = (
-                    select(func.count())
-                    .select_from(select(cls.id).where(cls.status == status).subquery())
-                    .execution_options(populate_existing=True)
-                )
+                for chunk in cls._bulk_chunks(rows):
+                    await session.execute(update(cls), chunk)
+                return len(rows)
+        except Exception as e:
+            log_error(f"Error bulk updating {cls.__name__}: {e}")
+            return 0
 
-                result = await session.scalar(stmt)
-                return int(result or 0)  # Handle None case
+    @classmethod
+    async def count_by_id(cls, strategy: Optional[CountStrategy] = None) -> int:
+        try:
+            return await count_rows(
+                cls._ids_stmt(),
+                await cls.get_db_manager(),
+                strategy or cls.__count_strategy__,
+                table_name=cls.__table__.fullname,
+            )
+        except Exception as e:
+            log_error(e)
+        return 0
 
+    @classmethod
+    async def count_by_id_and_status(
+        cls, status: str, strategy: Optional[CountStrategy] = None
+    ) -> int:
+        if not status:  # Early return for invalid status
+            return 0
+
+        try:
+            return await count_rows(
+                cls._ids_by_status_stmt(),
+                await cls.get_db_manager(),
+                strategy or cls.__count_strategy__,
+                params={"status": status},
+            )
         except Exception as e:
             log_error(e)
             return 0
 
     @classmethod
     async def list_by_status_paged(
-        cls, status: str, page: int
+        cls,
+        status: str,
+        page: int,
+        count_strategy: Optional[CountStrategy] = None,
+        columns: Optional[Sequence[Any]] = None,
     ) -> Tuple[List[Any], int, int]:
         if not status:  # Early return
             return [], 0, 0
 
         try:
             # Build optimized base query
-            base_query = (
-                select(cls)
-                .where(cls.status == status)
-                .order_by(cls.id)  # Add consistent ordering
-                .execution_options(populate_existing=True)
+            if columns:
+                base_query = cls._select_columns(columns)
+            else:
+                base_query = select(cls).execution_options(populate_existing=True)
+            base_query = base_query.where(cls.status == status).order_by(
+                cls.id  # Add consistent ordering
             )
             return await get_async_page_info(
                 query=base_query,
                 page=page,
                 db_manager=await cls.get_db_manager(),
+                count_strategy=count_strategy or cls.__count_strategy__,
+                as_rows=bool(columns),
             )
         except Exception as e:
             log_error(e)
         return [], 0, 0
 
     @classmethod
-    async def list_all_online_paged(cls, page: int) -> Tuple[List[Any], int, int]:
+    async def list_by_status_cursor_paged(
+        cls,
+        status: str,
+        after: Optional[str] = None,
+        columns: Optional[Sequence[Any]] = None,
+    ) -> Tuple[List[Any], Optional[str], int]:
+        if not status:  # Early return
+            return [], None, 0
+
         try:
-            # Build optimized base query
             base_query = (
-                select(cls)
-                .where(cls.is_online == "1")
-                .order_by(cls.id)  # Add consistent ordering
-                .execution_options(
+                cls._select_columns(columns, with_id=True) if columns else select(cls)
+            )
+            return await get_async_cursor_page_info(
+                query=base_query.where(cls.status == status),
+                order_columns=[cls.id],
+                after=after,
+                db_manager=await cls.get_db_manager(),
+                as_rows=bool(columns),
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            log_error(e)
+        return [], None, 0
+
+    @classmethod
+    async def list_all_online_paged(
+        cls,
+        page: int,
+        count_strategy: Optional[CountStrategy] = None,
+        columns: Optional[Sequence[Any]] = None,
+    ) -> Tuple[List[Any], int, int]:
+        try:
+            # Build optimized base query
+            if columns:
+                base_query = cls._select_columns(columns)
+            else:
+                base_query = select(cls).execution_options(
                     populate_existing=True,
                 )
+            base_query = base_query.where(cls.is_online == "1").order_by(
+                cls.id  # Add consistent ordering
             )
 
             return await get_async_page_info(
-                query=base_query, page=page, db_manager=await cls.get_db_manager()
+                query=base_query,
+                page=page,
+                db_manager=await cls.get_db_manager(),
+                count_strategy=count_strategy or cls.__count_strategy__,
+                as_rows=bool(columns),
             )
         except Exception as e:
             log_error(e)
         return [], 0, 0
 
+    @classmethod
+    async def list_all_online_cursor_paged(
+        cls, after: Optional[str] = None, columns: Optional[Sequence[Any]] = None
+    ) -> Tuple[List[Any], Optional[str], int]:
+        try:
+            base_query = (
+                cls._select_columns(columns, with_id=True) if columns else select(cls)
+            )
+            return await get_async_cursor_page_info(
+                query=base_query.where(cls.is_online == "1"),
+                order_columns=[cls.id],
+                after=after,
+                db_manager=await cls.get_db_manager(),
+                as_rows=bool(columns),
+            )
+        except HTTPException:
+            raise
+        except Exception as e:
+            log_error(e)
+        return [], None, 0
+
+    @classmethod
+    def _eager_load_options(cls, paths: Sequence[str]) -> List[Any]:
+        """Loader options of dotted relationship paths, e.g. "person.school".
+
+        Many-to-one relationships are joined into the query, collections are
+        loaded with one extra SELECT ... IN per path.
+        """
+        options = []
+        for path in paths:
+            model, option = cls, None
+            for name in path.split("."):
+                attr = getattr(model, name)
+                if option is None:
+                    loader = selectinload if attr.property.uselist else joinedload
+                    option = loader(attr)
+                elif attr.property.uselist:
+                    option = option.selectinload(attr)
+                else:
+                    option = option.joinedload(attr)
+                model = attr.property.mapper.class_
+            options.append(option)
+        return options
+
+    @classmethod
+    async def get_first_match(
+        cls, values: Dict[str, Any], load: Sequence[str] = ()
+    ) -> Any:
+        """
+        Use this method to look a row up by any of several unique columns.
+        :param values: column name to value, empty values are ignored. When
+            rows match different columns the earlier column wins.
+        :param load: dotted relationship paths to eager load, e.g.
+            ("person.school", "person.students").
+        :return: the matching object or None, in a single query.
+        """
+        conditions = [
+            getattr(cls, column) == value for column, value in values.items() if value
+        ]
+        if not conditions:
+            return None
+        try:
+            stmt = (
+                select(cls)
+                .where(or_(*conditions))
+                .options(*cls._eager_load_options(load))
+                .limit(1)
+            )
+            if len(conditions) > 1:
+                stmt = stmt.order_by(
+                    case(
+                        *[(condition, i) for i, condition in enumerate(conditions)],
+                        else_=len(conditions),
+                    )
+                )
+            db_manager = await cls.get_db_manager()
+            async with db_manager.transaction(readonly=True) as session:
+                return await session.scalar(stmt)
+        except Exception as e:
+            log_error(e)
+        return None
+
     @classmethod
     async def get_by_code(cls, code: str) -> Any:
         if code:
             try:
                 db_manager = await cls.get_db_manager()
-                async with db_manager.transaction() as session:
-                    query = select(cls).where(cls.code == code)
-                    return await session.scalar(query)
+                cache = (
+                    None if db_manager.has_scope_session() else cls._get_entity_cache()
+                )
+                if cache is not None:
+                    obj, generation = await cache.get("code", code)
+                    if obj is not None:
+                        return obj
+
+                async with db_manager.transaction(readonly=True) as session:
+                    obj = await session.scalar(cls._by_code_stmt(), {"code": code})
+
+                if cache is not None and obj is not None:
+                    await cache.set(obj, generation)
+                return obj
             except Exception as e:
                 log_error(e)
         return None
+
+
+@event.listens_for(BaseModel, "mapper_configured", propagate=True)
+def _compile_serializer(mapper: Mapper, cls: type) -> None:
+    cls._serializer = _build_serializer(mapper)
+    # Built with the mappers rather than on first lookup, so every worker
+    # publishes the invalidations of the cached tables it writes to.
+    if cls.__cache__:
+        cls._entity_cache = EntityCache(cls, **cls.__cache__)
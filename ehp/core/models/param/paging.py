@@ -7,6 +7,7 @@ from ehp.config import settings
 
 class PageModel(BaseModel):
     page: int = 1
+    after: Optional[str] = None
     size: int = settings.ITEMS_PER_PAGE
     total_count: Optional[int] = None
     auth_id: Optional[int] = None
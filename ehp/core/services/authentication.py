@@ -3,20 +3,18 @@ from typing import Annotated, Any, Dict, Optional
 from fastapi import APIRouter, Depends, Header, Request
 from fastapi.responses import JSONResponse
 
-from ehp.base import (
-    create_redis_session,
-    get_from_redis_session,
-    remove_from_redis_session,
-)
+from ehp.base import create_redis_session_async, remove_from_redis_session_async
+from ehp.base.middleware import resolve_session
 from ehp.core.models.db import (
     Authentication,
     AuthenticationLog,
     AuthEvent,
 )
 from ehp.core.models.param import AuthenticationParam
-from ehp.utils import check_password, make_response, needs_token_auth
+from ehp.utils import check_password_async, make_response, needs_token_auth
 from ehp.utils import constants as const
-from ehp.utils.base import base64_decrypt, log_error, run_to_dict_async
+from ehp.utils.base import base64_decrypt, log_error
+from ehp.utils.hash_pool import HashPoolSaturated
 
 
 auth_router = APIRouter(
@@ -42,12 +40,11 @@ async def authenticate(
         # db_manager = request.state.request_config["db_manager"]
         # async with db_manager.transaction() as db_session:
 
-        auth: Optional[Authentication] = None
-        if email:
-            auth = await Authentication.get_by_email(email)
-
-        if not auth and username:
-            auth = await Authentication.get_by_user_name(username)
+        # One lookup by email or user name, with the relationships read below.
+        auth: Optional[Authentication] = await Authentication.get_first_match(
+            {"user_email": email, "user_name": username},
+            load=("person.school", "person.students"),
+        )
 
         if not auth:
             response_json = const.ERROR_USER_DOES_NOT_EXIST
@@ -66,8 +63,11 @@ async def authenticate(
             ):
                 return make_response(const.ERROR_SCHOOL_DEACTIVATED)
 
-            if auth.is_confirmed == const.AUTH_CONFIRMED and check_password(
-                auth.user_pwd, base64_decrypt(auth_param.user_pwd)
+            if (
+                auth.is_confirmed == const.AUTH_CONFIRMED
+                and await check_password_async(
+                    auth.user_pwd, base64_decrypt(auth_param.user_pwd)
+                )
             ):
                 language_id = auth.person.language_id
                 if hasattr(request.state, "request_config"):
@@ -75,8 +75,7 @@ async def authenticate(
                 else:
                     request.state.request_config = {"language_id": language_id}
 
-                auth_json = await auth.to_dict()
-                session_token = create_redis_session(auth_json)
+                auth_json = auth.serialize_sync()
                 """
                 {
                     "admin": 1,
@@ -86,16 +85,17 @@ async def authenticate(
                     "student": 5,
                 }
                 """
-
                 if auth.profile_id in [
                     const.PROFILE_ID["guardian"],
                     const.PROFILE_ID["teacher"],
                 ]:
-                    _students = auth.person.students
-                    students = await run_to_dict_async(_students)
+                    students = [
+                        student.serialize_sync() for student in auth.person.students
+                    ]
                 else:
                     students = []
 
+                session_token = await create_redis_session_async(auth_json)
                 response_json = {
                     "session_token": session_token,
                     **auth_json,
@@ -108,6 +108,9 @@ async def authenticate(
                 response_json = const.ERROR_PASSWORD
             # await db_session.flush()
 
+    except HashPoolSaturated:
+        # Retried by the client after Retry-After, unlike the other errors.
+        raise
     except Exception as e:
         log_error(e)
 
@@ -121,13 +124,13 @@ async def logout(
 ) -> JSONResponse:
     logout_message: str = "Logged out successfully."
     try:
-        session_data = get_from_redis_session(x_token_auth)
+        session = await resolve_session(x_token_auth)
         await _auth_log(
             request,
-            session_data.get("session_info"),
+            session.session_info,
             AuthEvent.LOGGED_IN.value,
         )
-        remove_from_redis_session(x_token_auth)
+        await remove_from_redis_session_async(x_token_auth)
     except Exception as e:
         log_error(e)
         logout_message = str(e)
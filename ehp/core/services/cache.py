@@ -0,0 +1,176 @@
+from functools import wraps
+import hashlib
+from typing import Any, Callable, Dict, Iterable, Optional, Set, Union
+
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel as PydanticModel
+
+from ehp.base.cache import (
+    acquire_refresh_lock,
+    get_cached,
+    get_tag_versions,
+    set_cached,
+    table_tag,
+)
+from ehp.base.middleware import get_current_request
+from ehp.config import settings
+from ehp.utils import get_language_id
+from ehp.utils.base import log_error
+from ehp.utils.request import check_not_modified, dumps
+
+
+# Response headers kept with a cached body.
+_CACHED_HEADERS = ("content-type", "etag", "last-modified", "cache-control")
+
+
+def _tag_names(tags: Iterable[Union[str, type]]) -> Set[str]:
+    """Tags given as model classes are expanded to their table tag."""
+    return {
+        table_tag(tag.__table__.name) if hasattr(tag, "__table__") else tag
+        for tag in tags
+    }
+
+
+def _cache_key(request: Request, kwargs: Dict[str, Any], vary_on_auth: bool) -> str:
+    body_params = {
+        name: value.model_dump(mode="json")
+        for name, value in kwargs.items()
+        if isinstance(value, PydanticModel)
+    }
+    parts = [
+        request.method,
+        request.url.path,
+        dumps(sorted(request.query_params.multi_items())),
+        dumps(body_params),
+        # Responses are translated to the session (or default) language.
+        get_language_id(),
+        request.headers.get("accept-language", ""),
+    ]
+    if vary_on_auth:
+        parts.append(request.headers.get(settings.AUTH_TOKEN_NAME, ""))
+    return hashlib.sha256("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+
+def _cacheable(response: Any) -> bool:
+    return (
+        isinstance(response, Response)
+        and not isinstance(response, StreamingResponse)
+        and response.status_code == 200
+    )
+
+
+async def _tag_versions(key: str, tags: Set[str]) -> Optional[Dict[str, str]]:
+    try:
+        return await get_tag_versions(tags)
+    except Exception as e:
+        log_error(f"Error reading cache tag versions {key}: {e}")
+        return None
+
+
+async def _store(
+    key: str,
+    response: Response,
+    ttl: int,
+    stale: int,
+    tags: Set[str],
+    versions: Dict[str, str],
+) -> None:
+    try:
+        await set_cached(
+            key,
+            response.status_code,
+            {
+                name: value
+                for name, value in response.headers.items()
+                if name in _CACHED_HEADERS
+            },
+            response.body,
+            ttl,
+            stale,
+            tags,
+            versions,
+        )
+    except Exception as e:
+        log_error(f"Error caching response {key}: {e}")
+
+
+async def _should_refresh(key: str, stale: int) -> bool:
+    try:
+        return await acquire_refresh_lock(key, max(1, stale))
+    except Exception as e:
+        log_error(f"Error locking cached response {key}: {e}")
+        return False
+
+
+def _cached_response(entry: Dict[str, Any], is_stale: bool) -> Response:
+    headers = entry["headers"]
+    not_modified = check_not_modified(
+        etag=headers.get("etag"), cache_control=headers.get("cache-control")
+    )
+    if not_modified is not None:
+        return not_modified
+    return Response(
+        entry["body"].encode("utf-8"),
+        entry["status_code"],
+        {**headers, "X-Cache": "STALE" if is_stale else "HIT"},
+    )
+
+
+def cached_response(
+    ttl: Optional[int] = None,
+    stale: Optional[int] = None,
+    tags: Iterable[Union[str, type]] = (),
+    vary_on_auth: bool = False,
+) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Cache the responses of a route in Redis.
+
+    Responses are keyed by method, path, query string, body parameters and
+    language (and the X-Token-Auth header with ``vary_on_auth``). They are
+    served fresh for ``ttl`` seconds, then stale for ``stale`` more seconds:
+    the one request that takes the refresh lock recomputes the response while
+    the others keep getting the stale copy. Writes committed through
+    the ORM drop the responses tagged with the written tables, so pass the
+    models the route reads from as ``tags``. A response whose tags were
+    invalidated while it was being built is not stored.
+
+    Usage:
+        @router.get("/schools")
+        @cached_response(ttl=30, tags=[School])
+        async def list_schools(...): ...
+    """
+    ttl = settings.RESPONSE_CACHE_TTL if ttl is None else ttl
+    stale = settings.RESPONSE_CACHE_STALE if stale is None else stale
+    tag_names = _tag_names(tags)
+
+    def decorator(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+        @wraps(endpoint)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            request = get_current_request()
+            if not settings.RESPONSE_CACHE_ENABLED or request is None:
+                return await endpoint(*args, **kwargs)
+
+            key = _cache_key(request, kwargs, vary_on_auth)
+            try:
+                cached = await get_cached(key)
+            except Exception as e:
+                log_error(f"Error reading cached response {key}: {e}")
+                cached = None
+
+            if cached is not None:
+                entry, is_stale = cached
+                if not is_stale or not await _should_refresh(key, stale):
+                    return _cached_response(entry, is_stale)
+
+            # Read before the endpoint reads its rows, see set_tagged.
+            versions = await _tag_versions(key, tag_names)
+            response = await endpoint(*args, **kwargs)
+            if _cacheable(response):
+                if versions is not None:
+                    await _store(key, response, ttl, stale, tag_names, versions)
+                response.headers["X-Cache"] = "MISS"
+            return response
+
+        return wrapper
+
+    return decorator
@@ -8,8 +8,8 @@ from ehp.core.models.db import Authentication
 from ehp.core.models.db.structure import Notification, NotificationTemplate
 from ehp.core.models.param import AuthenticationParam, PasswordParam
 from ehp.utils import (
-    check_password,
-    hash_password,
+    check_password_async,
+    hash_password_async,
     make_response,
     needs_api_key,
     needs_token_auth,
@@ -22,6 +22,7 @@ from ehp.utils.base import (
     log_error,
     random_pwd,
 )
+from ehp.utils.hash_pool import HashPoolSaturated
 
 
 router = APIRouter(
@@ -102,14 +103,18 @@ async def update_password(request: Request, pwd_param: PasswordParam) -> JSONRes
                 response_json = const.ERROR_USER_DOES_NOT_EXIST
 
             # Check if old password matches the current password
-            if not check_password(auth.user_pwd, base64_decrypt(old_password)):
+            if not await check_password_async(
+                auth.user_pwd, base64_decrypt(old_password)
+            ):
                 response_json = const.ERROR_PASSWORD
 
             # Update password
-            auth.user_pwd = hash_password(base64_decrypt(new_password))
+            auth.user_pwd = await hash_password_async(base64_decrypt(new_password))
             await db_session.flush()
             response_json = const.SUCCESS_JSON
 
+    except HashPoolSaturated:
+        raise
     except Exception as e:
         log_error(e)
     return make_response(response_json)
@@ -138,7 +143,7 @@ async def recover_password(
                 response_json = const.ERROR_INVALID_ACCESS
 
             _random_pwd = random_pwd(8)
-            auth.user_pwd = hash_password(_random_pwd)
+            auth.user_pwd = await hash_password_async(_random_pwd)
             auth.reset_password = const.AUTH_RESET_PASSWORD
             try:
                 template = await NotificationTemplate.get_by_code(const.NOTI_PASSWORD)
@@ -169,6 +174,8 @@ async def recover_password(
             await db_session.flush()
             response_json = const.SUCCESS_JSON
 
+    except HashPoolSaturated:
+        raise
     except Exception as e:
         log_error(e)
     return make_response(response_json)
@@ -197,7 +204,7 @@ async def reset_password(
 
                 auth.reset_password = "0"
                 auth.reset_code = None
-                auth.user_pwd = hash_password(base64_decrypt(user_pwd))
+                auth.user_pwd = await hash_password_async(base64_decrypt(user_pwd))
                 await db_session.flush()
 
                 send_notification(
@@ -213,6 +220,8 @@ async def reset_password(
                 response_json = const.SUCCESS_JSON
             else:
                 response_json = const.ERROR_USER_DOES_NOT_EXIST
+    except HashPoolSaturated:
+        raise
     except Exception as e:
         log_error(e)
 
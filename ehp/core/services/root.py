@@ -1,19 +1,69 @@
-from fastapi import APIRouter
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse, Response
 
+from ehp.base.entity_cache import get_entity_cache_statistics
 from ehp.config import settings
+from ehp.db import skip_db_manager
+from ehp.db.pool_stats import get_pool_statistics
+from ehp.db.replicas import replica_set
+from ehp.db.statement_stats import get_statement_statistics
+from ehp.utils.authentication import needs_admin_key
+from ehp.utils.hash_pool import get_hash_pool_statistics
+from ehp.utils.request import check_not_modified, dumps, make_etag, ORJSONResponse
 
 
 router = APIRouter(responses={404: {"description": "Not found"}})
+# Statistics of the internals, only served with the admin key.
+_INTERNAL = [Depends(needs_admin_key)]
+
+# The metadata only changes with a deploy, so its body and ETag are built once.
+_META_BODY = dumps(
+    {
+        "name": settings.APP_NAME,
+        "description": settings.APP_DESCRIPTION,
+        "version": settings.APP_VERSION,
+        "time": settings.DEPLOYED_AT,
+    }
+)
+_META_ETAG = make_etag(_META_BODY)
 
 
 @router.get("/_meta", response_class=JSONResponse)
-async def root() -> JSONResponse:
-    return JSONResponse(
-        {
-            "name": settings.APP_NAME,
-            "description": settings.APP_DESCRIPTION,
-            "version": settings.APP_VERSION,
-            "time": settings.DEPLOYED_AT,
-        }
+@skip_db_manager
+async def root() -> Response:
+    return check_not_modified(etag=_META_ETAG) or ORJSONResponse(
+        _META_BODY,
+        headers={"ETag": _META_ETAG, "Cache-Control": settings.HTTP_CACHE_CONTROL},
     )
+
+
+@router.get("/_meta/db/pool", response_class=JSONResponse, dependencies=_INTERNAL)
+@skip_db_manager
+async def db_pool() -> JSONResponse:
+    return JSONResponse(get_pool_statistics())
+
+
+@router.get("/_meta/db/replicas", response_class=JSONResponse, dependencies=_INTERNAL)
+@skip_db_manager
+async def db_replicas() -> JSONResponse:
+    return JSONResponse(replica_set.status())
+
+
+@router.get("/_meta/db/statements", response_class=JSONResponse, dependencies=_INTERNAL)
+@skip_db_manager
+async def db_statements() -> JSONResponse:
+    return JSONResponse(get_statement_statistics())
+
+
+@router.get("/_meta/db/cache", response_class=JSONResponse, dependencies=_INTERNAL)
+@skip_db_manager
+async def db_cache() -> JSONResponse:
+    return JSONResponse(get_entity_cache_statistics())
+
+
+@router.get(
+    "/_meta/auth/hash_pool", response_class=JSONResponse, dependencies=_INTERNAL
+)
+@skip_db_manager
+async def auth_hash_pool() -> JSONResponse:
+    return JSONResponse(get_hash_pool_statistics())
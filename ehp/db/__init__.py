@@ -1,12 +1,31 @@
-from .db_manager import DBManager, get_db_manager, get_simple_db_manager
-from .paging import get_async_page_info, prepare_pagination_response
+from .counting import clear_count_cache, count_rows, CountStrategy
+from .db_manager import (
+    DBManager,
+    get_app_db_manager,
+    get_db_manager,
+    get_simple_db_manager,
+    skip_db_manager,
+)
+from .paging import (
+    get_async_cursor_page_info,
+    get_async_page_info,
+    prepare_cursor_pagination_response,
+    prepare_pagination_response,
+)
 from .sqlalchemy_async_connector import Base
 
 __all__ = [
     "Base",
+    "clear_count_cache",
+    "count_rows",
+    "CountStrategy",
     "DBManager",
+    "get_app_db_manager",
+    "get_async_cursor_page_info",
     "get_async_page_info",
     "get_db_manager",
     "get_simple_db_manager",
+    "prepare_cursor_pagination_response",
     "prepare_pagination_response",
+    "skip_db_manager",
 ]
@@ -0,0 +1,140 @@
+from collections import OrderedDict
+from enum import Enum
+import json
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import func, select, text
+from sqlalchemy.sql.selectable import Select
+
+from ehp.config import settings
+from ehp.db.db_manager import DBManager
+
+
+class CountStrategy(str, Enum):
+    """How row counts are computed.
+
+    EXACT runs ``count(*)`` every time, CACHED reuses an exact count for
+    ``COUNT_CACHE_TTL`` seconds and ESTIMATED asks the planner, which is
+    cheap but only approximate ("about N results").
+    """
+
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATED = "estimated"
+
+
+_count_cache: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()
+
+
+async def count_rows(
+    query: Select,
+    db_manager: DBManager,
+    strategy: CountStrategy = CountStrategy.EXACT,
+    table_name: Optional[str] = None,
+    cache_key: Optional[str] = None,
+    ttl: Optional[int] = None,
+    params: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Count the rows returned by ``query`` using the given strategy.
+
+    Args:
+        query: Query whose rows should be counted
+        db_manager: Database manager instance
+        strategy: Count strategy to use
+        table_name: Table name when ``query`` is an unfiltered scan of a single
+            table, enables the ``pg_class.reltuples`` estimate
+        cache_key: Explicit key for the CACHED strategy, derived from the
+            statement and its parameters when not given
+        ttl: Cache lifetime in seconds for the CACHED strategy
+        params: Values of the ``bindparam`` placeholders of ``query``
+    """
+    strategy = CountStrategy(strategy or CountStrategy.EXACT)
+
+    if strategy == CountStrategy.ESTIMATED:
+        estimate = await _estimate_count(
+            query.params(params) if params else query, db_manager, table_name
+        )
+        if estimate is not None:
+            return estimate
+        return await _exact_count(query, db_manager, params)
+
+    if strategy == CountStrategy.CACHED:
+        key = cache_key or _statement_key(query, params)
+        cached = _count_cache.get(key)
+        if cached and cached[0] > time.monotonic():
+            _count_cache.move_to_end(key)
+            return cached[1]
+
+        total = await _exact_count(query, db_manager, params)
+        _store_count(key, total, settings.COUNT_CACHE_TTL if ttl is None else ttl)
+        return total
+
+    return await _exact_count(query, db_manager, params)
+
+
+def clear_count_cache() -> None:
+    _count_cache.clear()
+
+
+def _count_statement(query: Select) -> Select:
+    """The count wrapper of ``query``. Building it is cheap, its compiled form
+    is reused through the engine's compiled cache, keyed on the statement
+    structure rather than on the object."""
+    return select(func.count()).select_from(query.subquery())
+
+
+async def _exact_count(
+    query: Select, db_manager: DBManager, params: Optional[Dict[str, Any]] = None
+) -> int:
+    async with db_manager.transaction(readonly=True) as session:
+        result = await session.scalar(_count_statement(query), params)
+    return int(result or 0)
+
+
+async def _estimate_count(
+    query: Select, db_manager: DBManager, table_name: Optional[str]
+) -> Optional[int]:
+    async with db_manager.transaction(readonly=True) as session:
+        if table_name:
+            reltuples = await session.scalar(
+                text(
+                    "SELECT reltuples::bigint FROM pg_class "
+                    "WHERE oid = to_regclass(:table_name)"
+                ),
+                {"table_name": table_name},
+            )
+            # reltuples is -1 (or 0 on old servers) until the table is analyzed.
+            if reltuples is not None and reltuples > 0:
+                return int(reltuples)
+
+        try:
+            compiled = query.compile(
+                dialect=session.bind.dialect,
+                compile_kwargs={"literal_binds": True},
+            )
+        except Exception:
+            return None
+
+        connection = await session.connection()
+        result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")
+        plan = result.scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        try:
+            return int(plan[0]["Plan"]["Plan Rows"])
+        except (KeyError, IndexError, TypeError):
+            return None
+
+
+def _statement_key(query: Select, params: Optional[Dict[str, Any]] = None) -> str:
+    compiled = query.compile()
+    values = {**compiled.params, **(params or {})}
+    return f"{compiled}|{sorted(values.items(), key=lambda i: i[0])!r}"
+
+
+def _store_count(key: str, total: int, ttl: int) -> None:
+    _count_cache[key] = (time.monotonic() + ttl, total)
+    _count_cache.move_to_end(key)
+    while len(_count_cache) > settings.COUNT_CACHE_MAX_ENTRIES:
+        _count_cache.popitem(last=False)
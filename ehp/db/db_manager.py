@@ -1,17 +1,44 @@
 from asyncio import current_task, Task, TaskGroup
-from typing import AsyncGenerator, Dict, Optional
-from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
+from contextlib import aclosing, asynccontextmanager
 
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
+from sqlalchemy import event
 from sqlalchemy.engine import Result
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.ext.asyncio import async_scoped_session
+from sqlalchemy.orm import ORMExecuteState, Session
 from sqlalchemy.sql.selectable import Select
 
+from .replicas import is_pinned_to_primary, pin_to_primary, replica_set
 from .sqlalchemy_async_connector import async_session_factory
 
 
+# Session.info flag set when the session flushed or ran an ORM DML statement.
+_WROTE_KEY = "ehp_wrote"
+
+
+@event.listens_for(Session, "after_flush")
+def _mark_flush_write(session: Session, _flush_context: Any) -> None:
+    session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _mark_dml_write(orm_execute_state: ORMExecuteState) -> None:
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        orm_execute_state.session.info[_WROTE_KEY] = True
+
+
+def mark_write(session: AsyncSession) -> None:
+    """Flag a write the ORM events cannot see (e.g. a raw driver ``COPY``)."""
+    session.info[_WROTE_KEY] = True
+
+
 class DBManager:
     def __init__(self):
         self.scoped_session_factory = async_scoped_session(
@@ -19,6 +46,8 @@ class DBManager:
         )
         self._active_sessions: Dict[int, AsyncSession] = {}
         self._transaction_stack: Dict[int, list[AsyncSession]] = {}
+        self._current_session: Dict[int, AsyncSession] = {}
+        self._current_replica_session: Dict[int, AsyncSession] = {}
 
     def get_session(self) -> AsyncSession:
         """Get a new session or return an existing one from the current scope"""
@@ -27,29 +56,36 @@ class DBManager:
         return session
 
     @asynccontextmanager
-    async def transaction(self):
+    async def transaction(self, readonly: bool = False):
         """
         Context manager for transaction control with nested transaction support.
         If a transaction is already active for the current scope, joins it instead
         of creating a new one.
+
+        Read-only transactions join a primary transaction already open in the
+        scope, otherwise they run on a healthy replica when one is configured,
+        unless the current request already wrote (read-your-writes).
         """
         # Get the current task ID to identify the current scope
         current_task_id = _get_current_task_id()
 
         # Check if we already have a session in this scope
-        if (
-            hasattr(self, "_current_session")
-            and self._current_session.get(current_task_id) is not None
-        ):
-            # Reuse the existing session for this scope
-            session = self._current_session.get(current_task_id)
-        else:
-            # Create a new session for this scope
+        scope_sessions = self._current_session
+        session = scope_sessions.get(current_task_id)
+        if session is None and readonly and not is_pinned_to_primary():
+            replica_session_factory = replica_set.choose()
+            if replica_session_factory is not None:
+                scope_sessions = self._current_replica_session
+                session = scope_sessions.get(current_task_id)
+                if session is None:
+                    session = replica_session_factory()
+                    self._active_sessions[id(session)] = session
+                    scope_sessions[current_task_id] = session
+
+        if session is None:
+            # Create a new session for this scope and store it for reuse
             session = self.get_session()
-            # Store it for reuse
-            if not hasattr(self, "_current_session"):
-                self._current_session = {}
-            self._current_session[current_task_id] = session
+            scope_sessions[current_task_id] = session
 
         session_id = id(session)
 
@@ -62,37 +98,44 @@ class DBManager:
                 # No active transaction, start a new one
                 async with session.begin():
                     self._transaction_stack[session_id].append(session)
-                    yield session
-                    self._transaction_stack[session_id].pop()
+                    try:
+                        yield session
+                    finally:
+                        self._transaction_stack[session_id].pop()
+                if (
+                    session.info.pop(_WROTE_KEY, False)
+                    and scope_sessions is self._current_session
+                ):
+                    pin_to_primary()
             else:
                 # Join existing transaction
                 self._transaction_stack[session_id].append(session)
-                yield session
-                self._transaction_stack[session_id].pop()
+                try:
+                    yield session
+                finally:
+                    self._transaction_stack[session_id].pop()
 
         except SQLAlchemyError as e:
-            if len(self._transaction_stack[session_id]) == 1:
+            if not self._transaction_stack[session_id]:
                 # Only rollback if this is the outermost transaction
                 await session.rollback()
             raise HTTPException(status_code=500, detail=f"Database error: {str(e)}")
         except Exception as e:
-            if len(self._transaction_stack[session_id]) == 1:
+            if not self._transaction_stack[session_id]:
                 await session.rollback()
             raise e
         finally:
             if not self._transaction_stack[session_id]:
-                # Clean up only if this is the outermost transaction
-                await session.close()
-                if session_id in self._active_sessions:
-                    del self._active_sessions[session_id]
+                # Clean up only if this is the outermost transaction. remove()
+                # closes the session and drops it from the scoped registry, so
+                # a long-lived manager does not accumulate one per task.
+                if scope_sessions is self._current_session:
+                    await self.scoped_session_factory.remove()
+                else:
+                    await session.close()
+                self._active_sessions.pop(session_id, None)
                 del self._transaction_stack[session_id]
-
-                # Also clean up the _current_session reference
-                if (
-                    hasattr(self, "_current_session")
-                    and current_task_id in self._current_session
-                ):
-                    del self._current_session[current_task_id]
+                scope_sessions.pop(current_task_id, None)
 
     async def execute_queries_in_parallel(
         self, queries: Dict[str, Select]
@@ -105,11 +148,59 @@ class DBManager:
                 tasks[query_name] = task
         return tasks
 
-    async def execute_query(self, query: Select) -> Result:
+    async def execute_query(self, query: Select, readonly: bool = False) -> Result:
         """Execute a single query within a transaction"""
-        async with self.transaction() as session:
+        async with self.transaction(readonly=readonly) as session:
             return await session.execute(query)
 
+    async def stream(
+        self,
+        query: Select,
+        batch_size: int = 1000,
+        readonly: bool = True,
+        scalars: bool = True,
+    ) -> AsyncGenerator[Any, None]:
+        """
+        Iterate over the results of a query through a server-side cursor.
+
+        Args:
+            query: The query to stream
+            batch_size: Number of rows fetched from the cursor at a time
+            readonly: Run on a replica when possible
+            scalars: Yield the first column (e.g. ORM objects) instead of rows
+
+        Yields:
+            Any: One result at a time, only one batch is held in memory
+        """
+        async with aclosing(
+            self.stream_batches(query, batch_size, readonly, scalars)
+        ) as batches:
+            async for batch in batches:
+                for item in batch:
+                    yield item
+
+    async def stream_batches(
+        self,
+        query: Select,
+        batch_size: int = 1000,
+        readonly: bool = True,
+        scalars: bool = True,
+    ) -> AsyncGenerator[List[Any], None]:
+        """
+        Iterate over the results of a query in lists of up to batch_size items,
+        fetched from a server-side cursor kept open for the whole iteration.
+
+        Wrap the iteration in contextlib.aclosing() when it may stop early, so
+        the cursor and its transaction are released right away.
+        """
+        async with self.transaction(readonly=readonly) as session:
+            result = await session.stream(query.execution_options(yield_per=batch_size))
+            if scalars:
+                result = result.scalars()
+            async with aclosing(result.partitions()) as partitions:
+                async for partition in partitions:
+                    yield list(partition)
+
     def get_current_transaction(self, session: AsyncSession) -> Optional[AsyncSession]:
         """
         Get the current active transaction for a session if it exists.
@@ -157,8 +248,21 @@ class DBManager:
         session_id = id(session)
         return len(self._transaction_stack.get(session_id, []))
 
-    async def cleanup(self):
-        """Cleanup method to handle remaining sessions and transactions"""
+    def has_scope_session(self) -> bool:
+        """Check if the current scope (task) holds an open primary session."""
+        return _get_current_task_id() in self._current_session
+
+    async def cleanup(self, scope_id: Optional[int] = None):
+        """Cleanup method to handle remaining sessions and transactions
+
+        Args:
+            scope_id: Only clean up the session left open by this scope (task),
+                used when the manager is shared by concurrent requests
+        """
+        if scope_id is not None:
+            await self._cleanup_scope(scope_id)
+            return
+
         for session in self._active_sessions.values():
             try:
                 session_id = id(session)
@@ -170,6 +274,52 @@ class DBManager:
             except Exception as e:
                 print(f"Error cleaning up session: {e}")
 
+    async def _cleanup_scope(self, scope_id: int) -> None:
+        self.scoped_session_factory.registry.registry.pop(scope_id, None)
+        for scope_sessions in (self._current_session, self._current_replica_session):
+            session = scope_sessions.pop(scope_id, None)
+            if session is None:
+                continue
+
+            try:
+                session_id = id(session)
+                self._transaction_stack.pop(session_id, None)
+                self._active_sessions.pop(session_id, None)
+                if session.in_transaction():
+                    await session.rollback()
+                await session.close()
+            except Exception as e:
+                print(f"Error cleaning up session: {e}")
+
+
+_app_db_manager: Optional[DBManager] = None
+
+
+def get_app_db_manager() -> DBManager:
+    """Return the process-wide DBManager, creating it on first use.
+
+    Sessions are scoped to the current task and only opened when a transaction
+    starts, so sharing one manager across requests costs nothing until a
+    handler actually touches the database.
+    """
+    global _app_db_manager
+    if _app_db_manager is None:
+        _app_db_manager = DBManager()
+    return _app_db_manager
+
+
+def skip_db_manager(endpoint: Callable[..., Any]) -> Callable[..., Any]:
+    """Mark a route endpoint so get_db_manager skips any per-request DB setup.
+
+    Apply it below the router decorator:
+
+        @router.get("/_meta")
+        @skip_db_manager
+        async def root(): ...
+    """
+    endpoint.__skip_db_manager__ = True
+    return endpoint
+
 
 async def get_simple_db_manager() -> AsyncGenerator[DBManager, None]:
     db_manager = DBManager()
@@ -179,21 +329,36 @@ async def get_simple_db_manager() -> AsyncGenerator[DBManager, None]:
         await db_manager.cleanup()
 
 
-async def get_db_manager() -> AsyncGenerator[DBManager, None]:
-    db_manager = DBManager()
+async def get_db_manager(
+    request: Request,
+) -> AsyncGenerator[Optional[DBManager], None]:
+    if _skips_db_manager(request):
+        yield None
+        return
+
+    db_manager = get_app_db_manager()
+    scope_id = _get_current_task_id()
     try:
-        set_db_manager_in_request_config(db_manager)
+        set_db_manager_in_request_config(db_manager, request)
         yield db_manager
     finally:
-        await db_manager.cleanup()
+        await db_manager.cleanup(scope_id)
+
+
+def _skips_db_manager(request: Request) -> bool:
+    endpoint = getattr(request.scope.get("route"), "endpoint", None)
+    return getattr(endpoint, "__skip_db_manager__", False)
 
 
-def set_db_manager_in_request_config(db_manager: DBManager) -> None:
+def set_db_manager_in_request_config(
+    db_manager: DBManager, request: Optional[Request] = None
+) -> None:
     # TODO: Avoid circular import, take a look at this later.
     try:
-        from ehp.base.middleware import get_current_request
+        if request is None:
+            from ehp.base.middleware import get_current_request
 
-        request = get_current_request()
+            request = get_current_request()
         if hasattr(request.state, "request_config"):
             request.state.request_config["db_manager"] = db_manager
         else:
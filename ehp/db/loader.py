@@ -0,0 +1,133 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import ORMExecuteState, Session
+
+from ehp.base.middleware import get_current_request
+from ehp.db.db_manager import _WROTE_KEY
+from ehp.utils.base import log_error
+
+
+BatchFetch = Callable[[List[Any]], Awaitable[List[Any]]]
+
+
+class IdentityLoader:
+    """Coalesce primary key lookups issued in the same event-loop tick.
+
+    Every ``load`` call made before the loop gets back to its scheduled
+    callbacks is collected and fetched with a single ``batch_fetch`` call.
+    Found objects are memoized per id until the request writes (see
+    ``clear_request_loaders``), misses are not memoized.
+    """
+
+    def __init__(self, batch_fetch: BatchFetch, key: str = "id"):
+        self._batch_fetch = batch_fetch
+        self._key = key
+        self._futures: Dict[Any, asyncio.Future] = {}
+        self._pending: Dict[Any, asyncio.Future] = {}
+        self._dispatch_scheduled = False
+        self._tasks: Set[asyncio.Task] = set()
+
+    def load(self, obj_id: Any) -> Awaitable[Optional[Any]]:
+        future = self._futures.get(obj_id)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._futures[obj_id] = future
+            self._pending[obj_id] = future
+            if not self._dispatch_scheduled:
+                self._dispatch_scheduled = True
+                loop.call_soon(self._dispatch)
+        return future
+
+    async def load_many(self, obj_ids: Iterable[Any]) -> List[Optional[Any]]:
+        return list(await asyncio.gather(*(self.load(obj_id) for obj_id in obj_ids)))
+
+    def clear(self) -> None:
+        """Forget the memoized objects, lookups in flight still complete."""
+        self._futures.clear()
+
+    def _dispatch(self) -> None:
+        self._dispatch_scheduled = False
+        batch, self._pending = self._pending, {}
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._fetch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _fetch(self, batch: Dict[Any, asyncio.Future]) -> None:
+        try:
+            objs = await self._batch_fetch(list(batch))
+        except Exception as e:
+            log_error(e)
+            for obj_id, future in batch.items():
+                self._futures.pop(obj_id, None)
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        found = {getattr(obj, self._key): obj for obj in objs}
+        for obj_id, future in batch.items():
+            obj = found.get(obj_id)
+            if obj is None and self._futures.get(obj_id) is future:
+                del self._futures[obj_id]
+            if not future.done():
+                future.set_result(obj)
+
+
+def get_request_loader(name: str, batch_fetch: BatchFetch) -> Optional[IdentityLoader]:
+    """Return the loader ``name`` of the current request, creating it if needed.
+
+    Loaders live in ``request.state.request_config`` so they are dropped with
+    the request. Outside of a request there is nothing to scope them to and
+    None is returned.
+    """
+    request = get_current_request()
+    if request is None:
+        return None
+
+    if not hasattr(request.state, "request_config"):
+        request.state.request_config = {}
+    loaders = request.state.request_config.setdefault("loaders", {})
+    loader = loaders.get(name)
+    if loader is None:
+        loader = loaders[name] = IdentityLoader(batch_fetch)
+    return loader
+
+
+def clear_request_loaders() -> None:
+    """Drop the objects memoized by the loaders of the current request."""
+    request = get_current_request()
+    request_config = getattr(request.state, "request_config", None) if request else None
+    for loader in (request_config or {}).get("loaders", {}).values():
+        loader.clear()
+
+
+# A write makes the memoized objects of the request stale, and a rollback may
+# undo rows that were read inside the transaction.
+@event.listens_for(Session, "after_flush")
+def _clear_after_flush(session: Session, _flush_context: Any) -> None:
+    clear_request_loaders()
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _clear_after_dml(orm_execute_state: ORMExecuteState) -> None:
+    if (
+        orm_execute_state.is_insert
+        or orm_execute_state.is_update
+        or orm_execute_state.is_delete
+    ):
+        clear_request_loaders()
+
+
+@event.listens_for(Session, "after_commit")
+def _clear_after_commit(session: Session) -> None:
+    # Catches writes flagged with mark_write, which the ORM events cannot see.
+    if session.info.get(_WROTE_KEY):
+        clear_request_loaders()
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_after_rollback(session: Session) -> None:
+    clear_request_loaders()
@@ -1,9 +1,14 @@
 from asyncio import TaskGroup
-from typing import Any, List, Tuple
+import base64
+from datetime import date, datetime
+import json
+from typing import Any, List, Optional, Sequence, Tuple
 
-from sqlalchemy import func, select
+from fastapi import HTTPException
+from sqlalchemy import func, select, tuple_
 from sqlalchemy.orm import Query
 
+from ehp.db.counting import count_rows, CountStrategy
 from ehp.db.db_manager import DBManager
 from ehp.config import settings
 
@@ -13,6 +18,9 @@ async def get_async_page_info(
     page: int = 1,
     items_per_page: int = settings.ITEMS_PER_PAGE,
     db_manager: DBManager = None,
+    single_query: bool = settings.PAGING_SINGLE_QUERY,
+    count_strategy: Optional[CountStrategy] = None,
+    as_rows: bool = False,
 ) -> Tuple[List[Any], int, int]:
     """Get paginated results with concurrent query execution.
 
@@ -21,22 +29,33 @@ async def get_async_page_info(
         page: Current page number (default: 1)
         items_per_page: Number of items per page
         db_manager: Database manager instance
+        single_query: Fetch the page and the total in one statement using a
+            ``count(*) OVER ()`` window column instead of two parallel queries
+        count_strategy: How the total is computed, a cached or estimated
+            strategy takes precedence over ``single_query``
+        as_rows: Return the rows of a column query as plain dicts instead of
+            ORM objects, nothing is added to the identity map
     """
+    count_strategy = CountStrategy(count_strategy or CountStrategy.EXACT)
+    if single_query and count_strategy == CountStrategy.EXACT:
+        return await _get_page_with_window_count(
+            query, page, items_per_page, db_manager, as_rows
+        )
+
     async with TaskGroup() as task_group:
 
         async def get_count():
-            async with db_manager.transaction() as session:
-                return await session.scalar(
-                    select(func.count()).select_from(query.subquery())
-                )
+            return await count_rows(query, db_manager, count_strategy)
 
         async def get_data():
-            async with db_manager.transaction() as session:
+            async with db_manager.transaction(readonly=True) as session:
                 result = await session.execute(
                     query.offset(abs((page - 1) * items_per_page)).limit(
                         abs(items_per_page)
                     )
                 )
+                if as_rows:
+                    return [dict(row) for row in result.mappings()]
                 return list(result.unique().scalars().all())
 
         count_task = task_group.create_task(get_count())
@@ -48,6 +67,155 @@ async def get_async_page_info(
     return items, total_count, items_per_page
 
 
+async def _get_page_with_window_count(
+    query: Query,
+    page: int,
+    items_per_page: int,
+    db_manager: DBManager,
+    as_rows: bool = False,
+) -> Tuple[List[Any], int, int]:
+    """Fetch one page and the total row count using a single connection.
+
+    The window count is computed over the rows of the query, so it should not
+    be used with joined eager loading of collections, which multiplies rows.
+    """
+    async with db_manager.transaction(readonly=True) as session:
+        result = await session.execute(
+            query.add_columns(func.count().over().label("total_count"))
+            .offset(abs((page - 1) * items_per_page))
+            .limit(abs(items_per_page))
+        )
+        rows = result.all() if as_rows else result.unique().all()
+
+        if rows:
+            total_count = rows[0].total_count
+        elif page > 1:
+            # Past the last page there are no rows to carry the window count.
+            total_count = await session.scalar(
+                select(func.count()).select_from(query.subquery())
+            )
+        else:
+            total_count = 0
+
+    if as_rows:
+        items = [dict(row._mapping) for row in rows]
+        for item in items:
+            del item["total_count"]
+    else:
+        items = [row[0] for row in rows]
+    return items, int(total_count or 0), items_per_page
+
+
+async def get_async_cursor_page_info(
+    query: Query,
+    order_columns: Sequence[Any],
+    after: Optional[str] = None,
+    items_per_page: int = settings.ITEMS_PER_PAGE,
+    db_manager: DBManager = None,
+    as_rows: bool = False,
+) -> Tuple[List[Any], Optional[str], int]:
+    """Get a page of results using keyset (seek) pagination.
+
+    Instead of skipping ``OFFSET`` rows, the query is filtered with
+    ``WHERE (order_columns) > (cursor values)``, so deep pages cost the same as
+    the first one as long as ``order_columns`` are indexed.
+
+    Args:
+        query: Base query to paginate, any ORDER BY is replaced
+        order_columns: Unique, ascending ordering columns (e.g. ``[Model.id]``)
+        after: Opaque cursor returned by the previous call, None for first page
+        items_per_page: Number of items per page
+        db_manager: Database manager instance
+        as_rows: Return the rows of a column query as plain dicts, the
+            ordering columns must then be part of the selected columns
+
+    Returns:
+        The page items, the cursor for the next page (None on the last page)
+        and the number of items per page.
+
+    Raises:
+        HTTPException: 400 when ``after`` is not a valid cursor
+    """
+    items_per_page = abs(items_per_page) or settings.ITEMS_PER_PAGE
+
+    if after:
+        values = decode_cursor(after, order_columns)
+        if len(order_columns) == 1:
+            query = query.where(order_columns[0] > values[0])
+        else:
+            query = query.where(tuple_(*order_columns) > tuple_(*values))
+
+    # Fetch one extra row to know whether there is a next page.
+    query = query.order_by(None).order_by(*order_columns).limit(items_per_page + 1)
+
+    async with db_manager.transaction(readonly=True) as session:
+        result = await session.execute(query)
+        if as_rows:
+            items = [dict(row) for row in result.mappings()]
+        else:
+            items = list(result.unique().scalars().all())
+
+    next_cursor = None
+    if len(items) > items_per_page:
+        items = items[:items_per_page]
+        last = items[-1]
+        next_cursor = encode_cursor(
+            [
+                last[column.key] if as_rows else getattr(last, column.key)
+                for column in order_columns
+            ]
+        )
+
+    return items, next_cursor, items_per_page
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the ordering values of the last row into an opaque cursor."""
+    payload = json.dumps(
+        [
+            value.isoformat() if isinstance(value, (date, datetime)) else value
+            for value in values
+        ],
+        separators=(",", ":"),
+        default=str,
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, order_columns: Sequence[Any]) -> List[Any]:
+    """Decode a cursor back into values typed after the ordering columns.
+
+    Raises:
+        HTTPException: 400 when the cursor is malformed or was tampered with
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if not isinstance(values, list) or len(values) != len(order_columns):
+            raise ValueError("unexpected cursor payload")
+        return [
+            _coerce_cursor_value(value, column)
+            for value, column in zip(values, order_columns)
+        ]
+    except Exception as e:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.") from e
+
+
+def _coerce_cursor_value(value: Any, column: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    if not isinstance(value, python_type):
+        return python_type(value)
+    return value
+
+
 def prepare_pagination_response(
     page: int = 1,
     items_per_page: int = settings.ITEMS_PER_PAGE,
@@ -63,3 +231,18 @@ def prepare_pagination_response(
         "total_items": total,
         "items_on_current_page": items_on_current_page,
     }
+
+
+def prepare_cursor_pagination_response(
+    after: Optional[str] = None,
+    next_cursor: Optional[str] = None,
+    items_per_page: int = settings.ITEMS_PER_PAGE,
+    items_on_current_page: int = 1,
+) -> dict:
+    return {
+        "cursor": after,
+        "next_cursor": next_cursor,
+        "has_next_page": next_cursor is not None,
+        "items_per_page": items_per_page,
+        "items_on_current_page": items_on_current_page,
+    }
@@ -0,0 +1,98 @@
+from bisect import bisect_left
+from threading import Lock
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+# Upper bounds (in milliseconds) of the checkout wait histogram buckets.
+WAIT_BUCKETS_MS: List[float] = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+
+
+class PoolStats:
+    """Checkout counters and wait time histogram for one connection pool."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.max_wait_ms = 0.0
+        self.total_wait_ms = 0.0
+        self.wait_histogram = [0] * (len(WAIT_BUCKETS_MS) + 1)
+
+    def record_wait(self, wait_ms: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            self.wait_histogram[bisect_left(WAIT_BUCKETS_MS, wait_ms)] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": (
+                    round(self.total_wait_ms / attempts, 3) if attempts else 0.0
+                ),
+                "max_wait_ms": round(self.max_wait_ms, 3),
+                "wait_histogram_ms": {
+                    **{
+                        f"le_{bound}": count
+                        for bound, count in zip(WAIT_BUCKETS_MS, self.wait_histogram)
+                    },
+                    "le_inf": self.wait_histogram[-1],
+                },
+            }
+
+
+_pool_stats: Dict[str, PoolStats] = {}
+_pools: Dict[str, "InstrumentedAsyncQueuePool"] = {}
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records checkout wait times and timeouts.
+
+    Stats are keyed by the pool logging name (``pool_logging_name`` of the
+    engine), so they survive the pool being recreated after a dispose.
+    """
+
+    def __init__(self, *args: Any, max_overflow: int = 10, **kwargs: Any):
+        super().__init__(*args, max_overflow=max_overflow, **kwargs)
+        self.max_overflow = max_overflow
+        name = self.logging_name or "default"
+        _pools[name] = self
+        self._stats = _pool_stats.setdefault(name, PoolStats())
+
+    def _do_get(self) -> Any:
+        stats = self._stats
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            stats.record_wait((time.perf_counter() - start) * 1000, timed_out=True)
+            raise
+        stats.record_wait((time.perf_counter() - start) * 1000)
+        return connection
+
+
+def get_pool_statistics() -> Dict[str, Any]:
+    """Live pool usage and checkout statistics for every instrumented pool."""
+    return {
+        name: {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(0, pool.overflow()),
+            "max_overflow": pool.max_overflow,
+            "timeout": pool.timeout(),
+            **_pool_stats[name].snapshot(),
+        }
+        for name, pool in _pools.items()
+    }
@@ -0,0 +1,89 @@
+from collections import Counter
+from contextvars import ContextVar, Token
+import logging
+import time
+from typing import Any, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+_logger = logging.getLogger(__name__)
+
+_QUERY_START_KEY = "ehp_query_start"
+
+
+class QueryStats:
+    """Statements executed while serving one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.statements[statement] += 1
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """Statements executed more than ``threshold`` times, most used first."""
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count > threshold
+        ]
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+def start_query_stats() -> Token:
+    """Start counting the statements of the current request."""
+    return _query_stats.set(QueryStats())
+
+
+def get_query_stats() -> Optional[QueryStats]:
+    return _query_stats.get()
+
+
+def reset_query_stats(token: Token) -> None:
+    _query_stats.reset(token)
+
+
+def detect_n_plus_one(stats: QueryStats, route: str, threshold: int) -> None:
+    """Log the statements the request repeated more than ``threshold`` times,
+    which usually means a lazy relationship loaded once per parent row."""
+    if threshold <= 0:
+        return
+    for statement, count in stats.repeated(threshold):
+        _logger.warning(
+            f"Possible N+1 on {route}: statement executed {count} times: "
+            f"{' '.join(statement.split())[:500]}"
+        )
+
+
+def instrument_query_stats(engine: AsyncEngine) -> None:
+    """Record every statement of ``engine`` in the current request stats."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        if _query_stats.get() is not None:
+            conn.info.setdefault(_QUERY_START_KEY, []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _record_query(conn, cursor, statement, parameters, context, executemany):
+        stats = _query_stats.get()
+        starts = conn.info.get(_QUERY_START_KEY)
+        if stats is not None and starts:
+            stats.record(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _drop_timer(exception_context: Any) -> None:
+        connection = exception_context.connection
+        starts = connection.info.get(_QUERY_START_KEY) if connection else None
+        if starts:
+            starts.pop()
@@ -0,0 +1,117 @@
+import asyncio
+from contextvars import ContextVar
+from itertools import count
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from ehp.config import settings
+from ehp.db.sqlalchemy_async_connector import replica_engines
+
+
+_logger = logging.getLogger(__name__)
+
+# Seconds the replica is behind the primary, 0 when it has replayed all WAL
+# it received (an idle primary does not make the replica look lagged).
+_LAG_QUERY = text(
+    "SELECT CASE "
+    "WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE("
+    "EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) "
+    "END"
+)
+
+# Set once the current request committed a write, so that its later reads see
+# it (read-your-writes) instead of possibly stale replica data.
+_primary_pinned: ContextVar[bool] = ContextVar("primary_pinned", default=False)
+
+
+def pin_to_primary() -> None:
+    """Route the rest of the current request's read-only work to the primary."""
+    _primary_pinned.set(True)
+
+
+def is_pinned_to_primary() -> bool:
+    return _primary_pinned.get()
+
+
+class Replica:
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        self.healthy = False
+        self.lag: Optional[float] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+
+    async def check(self) -> None:
+        try:
+            async with self.engine.connect() as connection:
+                lag = await asyncio.wait_for(
+                    connection.scalar(_LAG_QUERY), timeout=settings.POOL_TIMEOUT
+                )
+            self.lag = float(lag or 0)
+            self.error = None
+            self.healthy = self.lag <= settings.DB_REPLICA_MAX_LAG
+        except Exception as e:
+            self.healthy = False
+            self.error = str(e)
+            _logger.error(f"Replica {self.engine.url.host} health check failed: {e}")
+        finally:
+            self.checked_at = time.monotonic()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "host": self.engine.url.host,
+            "healthy": self.healthy,
+            "lag": self.lag,
+            "error": self.error,
+        }
+
+
+class ReplicaSet:
+    """Round-robin over the healthy replicas, refreshing their health lazily.
+
+    Replicas start unhealthy, so reads stay on the primary until the first
+    health check (scheduled on first use) confirms a replica is within
+    ``DB_REPLICA_MAX_LAG`` seconds.
+    """
+
+    def __init__(self, engines: List[AsyncEngine]):
+        self.replicas = [Replica(engine) for engine in engines]
+        self._round_robin = count()
+        self._last_check = 0.0
+        self._check_task: Optional[asyncio.Task] = None
+
+    def choose(self) -> Optional[async_sessionmaker]:
+        """Return the session factory of a healthy replica, if any."""
+        if not self.replicas:
+            return None
+
+        self._schedule_check()
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._round_robin) % len(healthy)].session_factory
+
+    async def check(self) -> None:
+        self._last_check = time.monotonic()
+        await asyncio.gather(*(replica.check() for replica in self.replicas))
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [replica.status() for replica in self.replicas]
+
+    def _schedule_check(self) -> None:
+        if self._check_task is not None and not self._check_task.done():
+            return
+        if time.monotonic() - self._last_check < settings.DB_REPLICA_CHECK_INTERVAL:
+            return
+        self._last_check = time.monotonic()
+        self._check_task = asyncio.get_running_loop().create_task(self.check())
+
+
+replica_set = ReplicaSet(replica_engines)
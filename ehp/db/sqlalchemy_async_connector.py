@@ -1,4 +1,6 @@
 from contextlib import asynccontextmanager
+from typing import Any, Dict
+
 from sqlalchemy import MetaData
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
@@ -9,27 +11,82 @@ from sqlalchemy.orm import declarative_base
 import ssl
 
 from ehp.config import settings
+from ehp.db.pool_stats import InstrumentedAsyncQueuePool
+from ehp.db.query_stats import instrument_query_stats
+from ehp.db.statement_stats import instrument_statement_cache
 
 
 ssl_context = ssl.create_default_context(ssl.Purpose.SERVER_AUTH)
 ssl_context.check_hostname = False
 ssl_context.verify_mode = ssl.CERT_NONE
 
+connect_args = {
+    "ssl": ssl_context,
+    "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+}
+
+
+def get_pool_options() -> Dict[str, Any]:
+    """Pool sizing for this worker, derived from the deployment-wide budget.
+
+    ``DB_MAX_CONNECTIONS`` is shared by the ``WEB_CONCURRENCY`` workers. Each
+    worker keeps up to ``POOL_SIZE`` persistent connections and may overflow
+    up to its share of the budget.
+    """
+    workers = max(1, settings.WEB_CONCURRENCY)
+    per_worker = max(1, settings.DB_MAX_CONNECTIONS // workers)
+    pool_size = max(1, min(settings.POOL_SIZE, per_worker))
+    return {
+        "poolclass": InstrumentedAsyncQueuePool,
+        "pool_size": pool_size,
+        "max_overflow": per_worker - pool_size,
+        "pool_pre_ping": settings.POOL_PRE_PING,
+        "query_cache_size": settings.DB_QUERY_CACHE_SIZE,
+        **settings.SQLALCHEMY_ENGINE_OPTIONS,
+    }
+
+
 engine = create_async_engine(
     settings.SQLALCHEMY_ASYNC_DATABASE_URI,
-    pool_size=100,
-    max_overflow=50,
-    pool_pre_ping=True,
-    pool_recycle=300,
-    connect_args={"ssl": ssl_context},
+    pool_logging_name="primary",
+    connect_args=connect_args,
+    **get_pool_options(),
 )
 
+instrument_statement_cache(engine, "primary")
+instrument_query_stats(engine)
+
 async_session_factory = async_sessionmaker(
     engine,
     expire_on_commit=False,
 )
 
 
+def _replica_uri(replica_host: str) -> str:
+    host, _, port = replica_host.strip().partition(":")
+    return (
+        f"postgresql+asyncpg://{settings.POSTGRES_USER}:"
+        f"{settings.POSTGRES_PASSWORD}@{host}:"
+        f"{port or settings.DATABASE_PORT}/{settings.POSTGRES_DB}"
+    )
+
+
+replica_engines = [
+    create_async_engine(
+        _replica_uri(replica_host),
+        pool_logging_name=f"replica_{index}",
+        connect_args=connect_args,
+        **get_pool_options(),
+    )
+    for index, replica_host in enumerate(
+        host for host in settings.DATABASE_REPLICA_HOSTS.split(",") if host.strip()
+    )
+]
+for index, replica_engine in enumerate(replica_engines):
+    instrument_statement_cache(replica_engine, f"replica_{index}")
+    instrument_query_stats(replica_engine)
+
+
 Base = declarative_base()
 
 
@@ -0,0 +1,101 @@
+from threading import Lock
+from typing import Any, Dict
+
+from sqlalchemy import event, util
+from sqlalchemy.engine.interfaces import CacheStats
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class StatementStats:
+    """Compiled statement and prepared statement cache counters of one engine.
+
+    ``compiled_*`` count SQLAlchemy's compiled cache (a hit skips compiling the
+    statement to SQL), ``prepared_*`` count asyncpg prepared statements (a hit
+    skips the server-side parse/plan).
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self.compiled = {stat: 0 for stat in CacheStats}
+        self.prepared_hits = 0
+        self.prepared_misses = 0
+
+    def record_compiled(self, stat: CacheStats) -> None:
+        with self._lock:
+            self.compiled[stat] += 1
+
+    def record_prepared(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.prepared_hits += 1
+            else:
+                self.prepared_misses += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            compiled_hits = self.compiled[CacheStats.CACHE_HIT]
+            compiled_misses = self.compiled[CacheStats.CACHE_MISS]
+            compiled_total = compiled_hits + compiled_misses
+            prepared_total = self.prepared_hits + self.prepared_misses
+            return {
+                "compiled_hits": compiled_hits,
+                "compiled_misses": compiled_misses,
+                "compiled_uncached": sum(self.compiled.values()) - compiled_total,
+                "compiled_hit_ratio": (
+                    round(compiled_hits / compiled_total, 4) if compiled_total else 0.0
+                ),
+                "prepared_hits": self.prepared_hits,
+                "prepared_misses": self.prepared_misses,
+                "prepared_hit_ratio": (
+                    round(self.prepared_hits / prepared_total, 4)
+                    if prepared_total
+                    else 0.0
+                ),
+            }
+
+
+class _InstrumentedStatementCache(util.LRUCache):
+    """The asyncpg adapter's prepared statement LRU, counting lookups.
+
+    The adapter reads an entry only after checking it is cached, so a read is
+    a reused statement and a write is a newly prepared one.
+    """
+
+    def __init__(self, capacity: int, stats: StatementStats):
+        super().__init__(capacity)
+        self._stats = stats
+
+    def __getitem__(self, key: Any) -> Any:
+        self._stats.record_prepared(hit=True)
+        return super().__getitem__(key)
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._stats.record_prepared(hit=False)
+        super().__setitem__(key, value)
+
+
+_statement_stats: Dict[str, StatementStats] = {}
+
+
+def instrument_statement_cache(engine: AsyncEngine, name: str) -> None:
+    """Count compiled and prepared statement cache hits of ``engine``."""
+    stats = _statement_stats.setdefault(name, StatementStats())
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _record_compiled(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and context.compiled is not None:
+            stats.record_compiled(context.cache_hit)
+
+    @event.listens_for(sync_engine, "connect")
+    def _instrument_prepared(dbapi_connection, connection_record):
+        cache = getattr(dbapi_connection, "_prepared_statement_cache", None)
+        if cache is not None:
+            dbapi_connection._prepared_statement_cache = _InstrumentedStatementCache(
+                cache.capacity, stats
+            )
+
+
+def get_statement_statistics() -> Dict[str, Any]:
+    """Statement cache counters for every instrumented engine."""
+    return {name: stats.snapshot() for name, stats in _statement_stats.items()}
@@ -1,9 +1,13 @@
 from .authentication import (
     check_es_key,
     check_password,
+    check_password_async,
     get_language_id,
     hash_password,
+    hash_password_async,
+    needs_admin_key,
     needs_api_key,
+    needs_signed_token,
     needs_token_auth,
 )
 from .base64 import Base64EncoderDecoder
@@ -18,18 +22,23 @@ from .date_utils import (
     str_to_date,
     str_year,
 )
-from .request import make_response
+from .request import make_response, make_streaming_response
 
 
 __all__ = [
     "Base64EncoderDecoder",
     "check_es_key",
     "check_password",
+    "check_password_async",
     "date_to_str",
     "get_language_id",
     "hash_password",
+    "hash_password_async",
     "make_response",
+    "make_streaming_response",
+    "needs_admin_key",
     "needs_api_key",
+    "needs_signed_token",
     "needs_token_auth",
     "str_date",
     "str_datetime",
@@ -1,12 +1,18 @@
+import hmac
 from typing import Annotated, cast, Optional
 
 from fastapi import Header, HTTPException
 from werkzeug.security import check_password_hash, generate_password_hash
 
-from ehp.base.middleware import get_current_request
-from ehp.base.session import get_from_redis_session
+from ehp.base.middleware import (
+    get_current_request,
+    get_resolved_session,
+    resolve_session,
+)
+from ehp.base.session import verify_session_token
 from ehp.config import settings
 from ehp.utils.base import log_error
+from ehp.utils.hash_pool import run_in_hash_pool
 
 
 async def needs_api_key(x_api_key: Annotated[Optional[str], Header()]) -> None:
@@ -14,8 +20,31 @@ async def needs_api_key(x_api_key: Annotated[Optional[str], Header()]) -> None:
         raise HTTPException(status_code=400, detail="Invalid X-Api-Key header.")
 
 
+async def needs_admin_key(
+    x_admin_key: Annotated[Optional[str], Header()] = None,
+) -> None:
+    """Guard the internal endpoints, hidden unless META_ADMIN_KEY is set."""
+    if not settings.META_ADMIN_KEY:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_key or not hmac.compare_digest(x_admin_key, settings.META_ADMIN_KEY):
+        raise HTTPException(status_code=400, detail="Invalid X-Admin-Key header.")
+
+
 async def needs_token_auth(x_token_auth: Annotated[Optional[str], Header()]) -> None:
-    if not x_token_auth or not is_valid_token(x_token_auth):
+    if not x_token_auth or not await is_valid_token(x_token_auth):
+        raise HTTPException(status_code=400, detail="Invalid X-Token-Auth header.")
+
+
+async def needs_signed_token(x_token_auth: Annotated[Optional[str], Header()]) -> None:
+    """
+    Authenticate from the token alone, for endpoints that do not need the
+    session data. Falls back to the Redis session while the revoked sessions
+    are not synced, and once the session may have idled out.
+    """
+    valid = verify_session_token(x_token_auth) if x_token_auth else False
+    if valid is None:
+        valid = await is_valid_token(x_token_auth)
+    if not valid:
         raise HTTPException(status_code=400, detail="Invalid X-Token-Auth header.")
 
 
@@ -31,29 +60,39 @@ def check_password(pwd_db: str, pwd_form: str) -> bool:
     return False
 
 
-def is_valid_token(token_value: str) -> bool:
+async def hash_password_async(pwd: str) -> Optional[str]:
+    if not pwd:
+        raise Exception("Password is required")
+    return cast(str, await run_in_hash_pool(generate_password_hash, pwd, "scrypt", 8))
+
+
+async def check_password_async(pwd_db: str, pwd_form: str) -> bool:
+    if pwd_db and pwd_form:
+        return cast(bool, await run_in_hash_pool(check_password_hash, pwd_db, pwd_form))
+    return False
+
+
+async def is_valid_token(token_value: str) -> bool:
     try:
         # TODO: Improve this one
         # Needs to check validity...
-        return get_from_redis_session(token_value) is not None
+        return (await resolve_session(token_value)).is_valid
     except Exception as err:
         log_error(err)
     return False
 
 
 def get_language_id() -> int:
+    session = get_resolved_session()
+    if session is not None and session.is_valid:
+        return session.language_id or settings.DEFAULT_LANGUAGE_ID
     try:
-        user_session = get_current_request().state.request_config["user_session"]
-        return (
-            user_session.get("session_info", {})
-            .get("person", {})
-            .get("language_id", settings.DEFAULT_LANGUAGE_ID)
-        )
-    except Exception:
         return (
             get_current_request().state.request_config["language_id"]
             or settings.DEFAULT_LANGUAGE_ID
         )
+    except Exception:
+        return settings.DEFAULT_LANGUAGE_ID
 
 
 async def check_es_key(es_key: Annotated[Optional[str], Header()]) -> bool:
@@ -1,4 +1,3 @@
-import asyncio
 import base64
 from datetime import datetime
 import json
@@ -6,7 +5,7 @@ import logging
 import random
 import string
 import traceback
-from typing import Any, List
+from typing import Any, List, Mapping
 
 
 _logger = logging.getLogger(__name__)
@@ -62,5 +61,7 @@ def loads_message(message: str) -> Any:
 async def run_to_dict_async(list_of_objects: List[Any]) -> List[Any]:
     if not list_of_objects:
         return []
-    result_tasks = [obj.to_dict() for obj in list_of_objects]
-    return await asyncio.gather(*result_tasks) if result_tasks else []
+    if isinstance(list_of_objects[0], Mapping):
+        # Projected rows (columns=... or as_rows=True) are already plain dicts.
+        return list_of_objects
+    return type(list_of_objects[0]).serialize_many(list_of_objects)
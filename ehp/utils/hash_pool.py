@@ -0,0 +1,136 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+import time
+from typing import Any, Callable, Dict, Optional, Tuple, TypeVar
+
+from fastapi import HTTPException
+
+from ehp.config import settings
+
+
+T = TypeVar("T")
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = Lock()
+
+
+class HashPoolSaturated(HTTPException):
+    """503 raised when PASSWORD_HASH_MAX_PENDING calls are already pending."""
+
+
+class HashPoolStats:
+    """Queue and run time counters of the password hashing pool."""
+
+    def __init__(self):
+        self._lock = Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_queue_ms = 0.0
+        self.max_queue_ms = 0.0
+        self.total_run_ms = 0.0
+
+    def try_acquire(self, limit: int) -> bool:
+        with self._lock:
+            if self.pending >= limit:
+                self.rejected += 1
+                return False
+            self.pending += 1
+            return True
+
+    def release(self, queue_ms: Optional[float], run_ms: float) -> None:
+        with self._lock:
+            self.pending -= 1
+            if queue_ms is None:
+                return
+            self.completed += 1
+            self.total_queue_ms += queue_ms
+            self.max_queue_ms = max(self.max_queue_ms, queue_ms)
+            self.total_run_ms += run_ms
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": settings.PASSWORD_HASH_WORKERS,
+                "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_queue_ms": (
+                    round(self.total_queue_ms / self.completed, 3)
+                    if self.completed
+                    else 0.0
+                ),
+                "max_queue_ms": round(self.max_queue_ms, 3),
+                "avg_run_ms": (
+                    round(self.total_run_ms / self.completed, 3)
+                    if self.completed
+                    else 0.0
+                ),
+            }
+
+
+_stats = HashPoolStats()
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        return _executor
+
+
+def _reset_executor(broken: ProcessPoolExecutor) -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _run_timed(fn: Callable[..., T], *args: Any) -> Tuple[float, float, T]:
+    # CLOCK_MONOTONIC is system wide, so the start time compares with the
+    # submit time of the parent process.
+    started = time.monotonic()
+    result = fn(*args)
+    return started, time.monotonic() - started, result
+
+
+async def run_in_hash_pool(fn: Callable[..., T], *args: Any) -> T:
+    """
+    Run the CPU bound ``fn(*args)`` in the password hashing process pool.
+    Raises HashPoolSaturated, a 503 HTTPException, when
+    PASSWORD_HASH_MAX_PENDING calls are already waiting for or running in the
+    pool.
+    """
+    if not _stats.try_acquire(settings.PASSWORD_HASH_MAX_PENDING):
+        raise HashPoolSaturated(
+            status_code=503,
+            detail="Too many password requests, please retry.",
+            headers={"Retry-After": "1"},
+        )
+
+    queue_ms: Optional[float] = None
+    run_ms = 0.0
+    executor = _get_executor()
+    try:
+        submitted = time.monotonic()
+        started, run_seconds, result = await asyncio.get_running_loop().run_in_executor(
+            executor, _run_timed, fn, *args
+        )
+        queue_ms = (started - submitted) * 1000
+        run_ms = run_seconds * 1000
+        return result
+    except BrokenProcessPool:
+        _reset_executor(executor)
+        raise
+    finally:
+        _stats.release(queue_ms, run_ms)
+
+
+def get_hash_pool_statistics() -> Dict[str, Any]:
+    """Pending, rejected and queue time counters of the hashing pool."""
+    return _stats.snapshot()
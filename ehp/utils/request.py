@@ -1,28 +1,287 @@
-from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from contextlib import aclosing, nullcontext
+from datetime import datetime, timezone
+from decimal import Decimal
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+from itertools import count
+import os
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 
-from cuid import cuid
-from fastapi.responses import JSONResponse
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import orjson
+
+from ehp.base.middleware import get_current_request
+from ehp.config import settings
+from ehp.utils import constants as const
+
+
+def _orjson_default(value: Any) -> Any:
+    """Types orjson does not serialize natively (datetime, date, UUID, Enum
+    and dataclasses are)."""
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, bytes):
+        return value.decode("utf-8")
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(
+        content, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS
+    )
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson, content may also be pre-encoded bytes."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+# Pre-encoded bodies of the constant payloads, keyed by the identity of the
+# dict together with a copy to detect it being mutated after import.
+_constant_bodies: Dict[int, Tuple[Dict[str, Any], Dict[str, Any], bytes]] = {
+    id(value): (value, dict(value), dumps(value))
+    for name, value in vars(const).items()
+    if name.isupper() and isinstance(value, dict)
+}
+_EMPTY_OBJECT = b"{}"
+
+
+def _encode(content: Any) -> bytes:
+    if not content and isinstance(content, dict):
+        return _EMPTY_OBJECT
+    cached = _constant_bodies.get(id(content))
+    if cached is not None and cached[0] is content and cached[1] == content:
+        return cached[2]
+    return dumps(content)
+
+
+# Response ids are unique per process prefix and increase monotonically.
+_RESPONSE_ID_PREFIX = f"{os.getpid():x}{os.urandom(4).hex()}"
+_response_counter = count(1)
+
+
+def next_response_id() -> str:
+    return f"{_RESPONSE_ID_PREFIX}-{next(_response_counter):x}"
+
+
+def make_etag(data: Union[bytes, str]) -> str:
+    """Strong ETag of a body or of a version token."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return f'"{hashlib.blake2b(data, digest_size=16).hexdigest()}"'
+
+
+def _http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored.
+    return any(
+        candidate.strip().removeprefix("W/") == etag.removeprefix("W/")
+        for candidate in if_none_match.split(",")
+    )
+
+
+def _is_not_modified(
+    request: Request, etag: Optional[str], last_modified: Optional[datetime]
+) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-Modified-Since is ignored when If-None-Match is sent.
+        return etag is not None and _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    # HTTP dates have a one second resolution.
+    return last_modified.replace(microsecond=0) <= since
+
+
+def _cache_headers(
+    etag: Optional[str],
+    last_modified: Optional[datetime],
+    cache_control: Optional[str],
+) -> Dict[str, str]:
+    headers = {"Cache-Control": cache_control or settings.HTTP_CACHE_CONTROL}
+    if etag:
+        headers["ETag"] = etag
+    if last_modified:
+        headers["Last-Modified"] = _http_date(last_modified)
+    return headers
+
+
+def _is_conditional(request: Optional[Request], status_code: int) -> bool:
+    return (
+        request is not None and request.method in ("GET", "HEAD") and status_code == 200
+    )
+
+
+def check_not_modified(
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+    cache_control: Optional[str] = None,
+) -> Optional[Response]:
+    """
+    Use this function before an expensive query when a cheap version is known.
+    :param etag: ETag of the current version, e.g. make_etag(version).
+    :param last_modified: last modification time of the resource.
+    :param cache_control: Cache-Control header, HTTP_CACHE_CONTROL by default.
+    :return: a 304 response when the client copy is current, None otherwise.
+    """
+    request = get_current_request()
+    if not _is_conditional(request, 200):
+        return None
+    if _is_not_modified(request, etag, last_modified):
+        return Response(
+            status_code=304, headers=_cache_headers(etag, last_modified, cache_control)
+        )
+    return None
 
 
 def make_response(
     response_data: Union[Dict[str, Any], List[Dict[str, Any]]],
     pagination_data: Optional[Dict[str, Any]] = None,
     status_code: int = 200,
-) -> JSONResponse:
+    etag: Optional[str] = None,
+    last_modified: Optional[datetime] = None,
+    cache_control: Optional[str] = None,
+) -> Response:
     """
     Use this function to create a standard response object for the API.
     :param response_data: any dict related reponse data.
     :param pagination_data: any dict related to pagination data.
     :param status_code: status code of the response.
-    :return: reshaped response object.
+    :param etag: ETag of the data, a hash of the result and pagination when
+        not given.
+    :param last_modified: last modification time of the data.
+    :param cache_control: Cache-Control header, HTTP_CACHE_CONTROL by default.
+    :return: reshaped response object, or 304 Not Modified for a conditional
+        GET matching the current ETag / Last-Modified.
     """
-    return JSONResponse(
-        {
-            "result": response_data,
-            "pagination": pagination_data if pagination_data else {},
-            "response_id": cuid(),
-            "response_time": str(datetime.now().isoformat()),
+    result = _encode(response_data)
+    pagination = _encode(pagination_data) if pagination_data else _EMPTY_OBJECT
+
+    headers = None
+    request = get_current_request()
+    if _is_conditional(request, status_code):
+        etag = etag or make_etag(result + b"|" + pagination)
+        headers = _cache_headers(etag, last_modified, cache_control)
+        if _is_not_modified(request, etag, last_modified):
+            return Response(status_code=304, headers=headers)
+
+    body = b"".join(
+        (
+            b'{"result":',
+            result,
+            b',"pagination":',
+            pagination,
+            b',"response_id":"',
+            next_response_id().encode("ascii"),
+            b'","response_time":"',
+            datetime.now().isoformat().encode("ascii"),
+            b'"}',
+        )
+    )
+    return ORJSONResponse(body, status_code, headers)
+
+
+STREAM_MEDIA_TYPES: Dict[str, str] = {
+    "ndjson": "application/x-ndjson",
+    "json": "application/json",
+}
+# Encoded items are buffered up to this many bytes before being sent.
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _serialize_item(item: Any) -> Any:
+    serialize = getattr(item, "serialize_sync", None)
+    return serialize() if serialize is not None else item
+
+
+async def _encode_stream(
+    iterator: AsyncIterator[Any],
+    fmt: str,
+    serializer: Callable[[Any], Any],
+) -> AsyncGenerator[bytes, None]:
+    separator = b"\n" if fmt == "ndjson" else b","
+    buffer = bytearray(b"" if fmt == "ndjson" else b"[")
+    first = True
+    # Close generators (and the cursor behind them) when the client goes away,
+    # plain async iterators have nothing to close.
+    closing = aclosing(iterator) if hasattr(iterator, "aclose") else nullcontext()
+    async with closing:
+        async for item in iterator:
+            if fmt == "ndjson":
+                buffer += dumps(serializer(item))
+                buffer += separator
+            else:
+                if not first:
+                    buffer += separator
+                buffer += dumps(serializer(item))
+            first = False
+            if len(buffer) >= STREAM_CHUNK_SIZE:
+                yield bytes(buffer)
+                buffer.clear()
+    if fmt != "ndjson":
+        buffer += b"]"
+    if buffer:
+        yield bytes(buffer)
+
+
+def make_streaming_response(
+    iterator: AsyncIterator[Any],
+    fmt: str = "ndjson",
+    pagination_data: Optional[Dict[str, Any]] = None,
+    serializer: Optional[Callable[[Any], Any]] = None,
+    status_code: int = 200,
+) -> StreamingResponse:
+    """
+    Use this function to stream a large collection without holding it in memory.
+    :param iterator: async iterator of model objects or dicts, e.g. iter_all().
+    :param fmt: "ndjson" for one JSON document per line or "json" for an array.
+    :param pagination_data: any dict related to pagination data.
+    :param serializer: converts each item to JSON data, serialize_sync() of
+        model objects by default.
+    :param status_code: status code of the response.
+    :return: streaming response, the envelope is sent in the X-Response-Id,
+        X-Response-Time and X-Pagination headers.
+    """
+    if fmt not in STREAM_MEDIA_TYPES:
+        raise ValueError(f"Unsupported stream format: {fmt}")
+
+    return StreamingResponse(
+        _encode_stream(iterator, fmt, serializer or _serialize_item),
+        status_code=status_code,
+        media_type=STREAM_MEDIA_TYPES[fmt],
+        headers={
+            "X-Response-Id": next_response_id(),
+            "X-Response-Time": datetime.now().isoformat(),
+            "X-Pagination": dumps(pagination_data or {}).decode("utf-8"),
         },
-        status_code,
     )
@@ -0,0 +1,88 @@
+import os
+
+# Settings are read at import time, give every required one a harmless value
+# before anything under ehp gets imported.
+for _name, _value in {
+    "APP_NAME": "ehp",
+    "APP_VERSION": "test",
+    "APP_ISSUER": "ehp-test",
+    "APP_JWT_ENABLED": "False",
+    "APP_LOG_NAME": "ehp-test",
+    "DEBUG": "True",
+    "DATABASE_URL": "localhost",
+    "DATABASE_PORT": "5432",
+    "POSTGRES_DB": "ehp",
+    "POSTGRES_USER": "ehp",
+    "POSTGRES_PASSWORD": "ehp",
+    "SQLALCHEMY_ECHO": "False",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "SESSION_TIMEOUT": "1800",
+    "SESSION_COOKIE_NAME": "sid",
+    "SESSION_TOKEN_SECRET": "session-token-secret-for-the-tests",
+    "ELASTICSEARCH_URL": "http://localhost:9200",
+    "EMAIL_USER": "user",
+    "EMAIL_PASSWORD": "password",
+    "EMAIL_SENDER": "sender@example.com",
+    "EMAIL_HOST": "localhost",
+    "EMAIL_PORT": "25",
+    "EMAIL_NAME": "ehp",
+    "CONTACT_EMAIL": "contact@example.com",
+    "CONTACT_PHONE": "0",
+    "ES_KEY": "es-key",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import fakeredis  # noqa: E402
+import pytest  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    async_scoped_session,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+import ehp.base.redis_storage as redis_storage  # noqa: E402
+from ehp.db import db_manager as db_manager_module  # noqa: E402
+from tests.models import TEST_MODELS  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    """Point both Redis clients at one in-memory fake server."""
+    server = fakeredis.FakeServer()
+    async_client = fakeredis.FakeAsyncRedis(server=server)
+    monkeypatch.setattr(redis_storage, "async_redis_client", async_client)
+    monkeypatch.setattr(
+        redis_storage,
+        "redis_client",
+        fakeredis.FakeRedis(server=server, decode_responses=True),
+    )
+    return async_client
+
+
+@pytest.fixture
+async def db(redis, monkeypatch):
+    """Run the app DBManager against an in-memory SQLite with the test models.
+
+    Commits invalidate cached responses, so Redis is faked as well.
+    """
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        for model in TEST_MODELS:
+            await connection.run_sync(model.__table__.create)
+
+    manager = db_manager_module.DBManager()
+    manager.scoped_session_factory = async_scoped_session(
+        async_sessionmaker(engine, expire_on_commit=False),
+        scopefunc=db_manager_module._get_current_task_id,
+    )
+    monkeypatch.setattr(db_manager_module, "_app_db_manager", manager)
+    yield manager
+    await manager.cleanup()
+    await engine.dispose()
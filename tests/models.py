@@ -0,0 +1,100 @@
+from datetime import datetime
+import enum
+
+from sqlalchemy import (
+    Column,
+    Date,
+    DateTime,
+    Enum,
+    ForeignKey,
+    Integer,
+    LargeBinary,
+    Numeric,
+    String,
+    Uuid,
+)
+from sqlalchemy.orm import relationship
+
+from ehp.core.models.db.base import BaseModel
+
+
+class Widget(BaseModel):
+    __tablename__ = "test_widget"
+
+    id = Column(Integer, primary_key=True)
+    code = Column(String(32))
+    status = Column(String(1), default="1")
+    is_online = Column(String(1), default="1")
+    created_at = Column(DateTime, default=datetime.now)
+    updated_at = Column(DateTime, default=datetime.now, onupdate=datetime.now)
+
+
+class Gadget(BaseModel):
+    """Attribute names that differ from the column names."""
+
+    __tablename__ = "test_gadget"
+
+    id = Column(Integer, primary_key=True)
+    serial = Column("serial_number", String(32))
+    kind = Column("gadget_kind", String(16), default="basic")
+
+
+class Level(enum.Enum):
+    LOW = "low"
+    HIGH = "high"
+
+
+class Reading(BaseModel):
+    """One column of every type the serializers convert."""
+
+    __tablename__ = "test_reading"
+
+    id = Column(Integer, primary_key=True)
+    taken_on = Column(Date)
+    taken_at = Column(DateTime)
+    amount = Column(Numeric(10, 2))
+    level = Column(Enum(Level))
+    token = Column(Uuid)
+    raw = Column(LargeBinary)
+
+
+class Flag(BaseModel):
+    """Entity cached, in process and in Redis."""
+
+    __tablename__ = "test_flag"
+    __cache__ = {"ttl": 60, "redis": True}
+
+    id = Column(Integer, primary_key=True)
+    code = Column(String(32))
+    value = Column(String(32))
+
+
+class Team(BaseModel):
+    __tablename__ = "test_team"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(32))
+
+
+class Member(BaseModel):
+    """Looked up by email or user name, with a many-to-one and a collection."""
+
+    __tablename__ = "test_member"
+
+    id = Column(Integer, primary_key=True)
+    email = Column(String(64))
+    user_name = Column(String(32))
+    team_id = Column(Integer, ForeignKey("test_team.id"))
+    team = relationship("Team")
+    pets = relationship("Pet")
+
+
+class Pet(BaseModel):
+    __tablename__ = "test_pet"
+
+    id = Column(Integer, primary_key=True)
+    member_id = Column(Integer, ForeignKey("test_member.id"))
+    name = Column(String(32))
+
+
+TEST_MODELS = [Widget, Gadget, Reading, Flag, Team, Member, Pet]
@@ -0,0 +1,80 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from ehp.config import settings
+from tests.models import Gadget, Widget
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def copy_threshold(monkeypatch):
+    monkeypatch.setattr(settings, "BULK_COPY_THRESHOLD", 2)
+
+
+def test_copy_is_used_for_rows_keyed_by_attribute_name(copy_threshold):
+    rows = [{"serial": "s1", "kind": "big"}, {"serial": "s2", "kind": "small"}]
+
+    assert Gadget._can_copy(rows)
+
+
+def test_copy_is_skipped_when_a_python_default_would_be_lost(copy_threshold):
+    assert not Gadget._can_copy([{"serial": "s1"}, {"serial": "s2"}])
+
+
+def test_copy_is_skipped_for_mixed_or_few_rows(copy_threshold):
+    assert not Gadget._can_copy([{"serial": "s1", "kind": "a"}, {"serial": "s2"}])
+    assert not Gadget._can_copy([{"serial": "s1", "kind": "a"}])
+
+
+async def test_bulk_insert_returns_ids_in_row_order(db):
+    ids = await Gadget.bulk_insert(
+        [{"serial": "s1"}, {"serial": "s2", "kind": "big"}], return_ids=True
+    )
+
+    async with db.transaction(readonly=True) as session:
+        gadgets = (await session.scalars(select(Gadget).order_by(Gadget.id))).all()
+
+    assert ids == [gadget.id for gadget in gadgets]
+    assert [(g.serial, g.kind) for g in gadgets] == [("s1", "basic"), ("s2", "big")]
+
+
+async def test_bulk_insert_is_chunked(db, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_BATCH_SIZE", 2)
+
+    assert await Widget.bulk_insert([{"code": f"w{i}"} for i in range(5)]) == 5
+    assert await Widget.count_by_id() == 5
+
+
+async def test_bulk_update_by_primary_key(db):
+    await Gadget.bulk_insert([{"serial": "s1"}, {"serial": "s2"}])
+
+    assert await Gadget.bulk_update([{"id": 2, "kind": "big"}]) == 1
+
+    async with db.transaction(readonly=True) as session:
+        kinds = (await session.scalars(select(Gadget.kind).order_by(Gadget.id))).all()
+    assert kinds == ["basic", "big"]
+
+
+async def test_bulk_upsert_maps_attributes_to_columns(db):
+    await Gadget.bulk_insert([{"serial": "s1", "kind": "a"}])
+
+    count = await Gadget.bulk_upsert(
+        [{"id": 1, "serial": "s1-new", "kind": "b"}, {"id": 2, "serial": "s2"}]
+    )
+
+    assert count == 2
+    async with db.transaction(readonly=True) as session:
+        rows = (await session.execute(select(Gadget.serial, Gadget.kind))).all()
+    assert sorted(rows) == [("s1-new", "b"), ("s2", "basic")]
+
+
+def test_upsert_statement_uses_column_names():
+    stmt = Gadget._upsert_stmt(["serial"], ["kind"])
+
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+
+    assert "ON CONFLICT (serial_number) DO UPDATE" in sql
+    assert "SET gadget_kind = excluded.gadget_kind" in sql
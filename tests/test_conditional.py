@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta, timezone
+
+from fastapi import Request
+import pytest
+
+from ehp.base.middleware import _request_context
+from ehp.core.models.db import base as base_module
+from ehp.db import CountStrategy
+from ehp.utils.request import _http_date, check_not_modified, make_response
+from tests.models import Widget
+
+
+pytestmark = pytest.mark.anyio
+
+LAST_MODIFIED = datetime(2024, 5, 1, 12, 30, 15, 500000, tzinfo=timezone.utc)
+
+
+@pytest.fixture
+def send():
+    """Make the following responses answer a request with these headers."""
+    tokens = []
+
+    def send(method="GET", **headers):
+        request = Request(
+            {
+                "type": "http",
+                "method": method,
+                "headers": [
+                    (name.replace("_", "-").encode(), value.encode())
+                    for name, value in headers.items()
+                ],
+            }
+        )
+        tokens.append(_request_context.set(request))
+
+    yield send
+    for token in reversed(tokens):
+        _request_context.reset(token)
+
+
+def test_get_responses_carry_validators(send):
+    send()
+    response = make_response({"a": 1}, last_modified=LAST_MODIFIED)
+
+    assert response.status_code == 200
+    assert response.headers["etag"].startswith('"')
+    assert response.headers["last-modified"] == "Wed, 01 May 2024 12:30:15 GMT"
+    assert response.headers["cache-control"] == "no-cache"
+
+
+def test_etag_depends_on_the_data_only(send):
+    send()
+
+    assert (
+        make_response({"a": 1}).headers["etag"]
+        == make_response({"a": 1}).headers["etag"]
+    )
+    assert (
+        make_response({"a": 1}).headers["etag"]
+        != make_response({"a": 2}).headers["etag"]
+    )
+
+
+@pytest.mark.parametrize("if_none_match", ["{etag}", "W/{etag}", '"x", {etag}', "*"])
+def test_matching_etag_is_not_modified(send, if_none_match):
+    send()
+    etag = make_response({"a": 1}).headers["etag"]
+
+    send(if_none_match=if_none_match.format(etag=etag))
+    response = make_response({"a": 1})
+
+    assert response.status_code == 304
+    assert response.body == b""
+    assert response.headers["etag"] == etag
+
+
+def test_changed_data_is_sent_again(send):
+    send()
+    etag = make_response({"a": 1}).headers["etag"]
+
+    send(if_none_match=etag)
+
+    assert make_response({"a": 2}).status_code == 200
+
+
+@pytest.mark.parametrize(
+    "since, status_code",
+    [
+        (LAST_MODIFIED, 304),
+        (LAST_MODIFIED - timedelta(seconds=1), 200),
+        (None, 200),
+    ],
+)
+def test_if_modified_since(send, since, status_code):
+    send(if_modified_since=_http_date(since) if since else "not a date")
+
+    assert make_response({}, last_modified=LAST_MODIFIED).status_code == status_code
+
+
+def test_if_none_match_takes_precedence(send):
+    send(if_none_match='"other"', if_modified_since=_http_date(LAST_MODIFIED))
+
+    assert make_response({}, last_modified=LAST_MODIFIED).status_code == 200
+
+
+def test_only_successful_gets_are_conditional(send):
+    send(method="POST", if_none_match="*")
+    assert make_response({}).status_code == 200
+    assert "etag" not in make_response({}).headers
+
+    send(if_none_match="*")
+    assert make_response({}, status_code=201).status_code == 201
+
+
+def test_check_not_modified_before_the_query(send):
+    assert check_not_modified(etag='"v1"') is None
+
+    send(if_none_match='"v1"')
+    assert check_not_modified(etag='"v1"').status_code == 304
+    assert check_not_modified(etag='"v2"') is None
+
+
+async def test_model_version_follows_the_rows(db):
+    empty_etag, last_modified = await Widget.get_version()
+    assert empty_etag and last_modified is None
+
+    await Widget.bulk_insert([{"code": "a"}])
+    table_etag, last_modified = await Widget.get_version()
+    row_etag, _ = await Widget.get_version(1)
+    assert last_modified is not None
+
+    await Widget.bulk_insert([{"code": "b"}])
+    assert (await Widget.get_version())[0] not in (table_etag, empty_etag)
+    assert (await Widget.get_version(1))[0] == row_etag
+
+    # A delete leaves the max unchanged, the count catches it.
+    before = (await Widget.get_version())[0]
+    assert await Widget.obj_delete(1)
+    assert (await Widget.get_version())[0] != before
+
+
+async def test_table_version_counts_with_the_model_strategy(db, monkeypatch):
+    strategies = []
+
+    async def count_rows(query, db_manager, strategy, **kwargs):
+        strategies.append(strategy)
+        return 7
+
+    monkeypatch.setattr(base_module, "count_rows", count_rows)
+    monkeypatch.setattr(Widget, "__count_strategy__", CountStrategy.ESTIMATED)
+
+    assert (await Widget.get_version())[0]
+    await Widget.get_version(1)
+
+    assert strategies == [CountStrategy.ESTIMATED]
@@ -0,0 +1,76 @@
+import pytest
+from sqlalchemy import select
+
+from ehp.config import settings
+from ehp.db import counting
+from ehp.db.counting import clear_count_cache, count_rows, CountStrategy
+from tests.models import Widget
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def empty_count_cache():
+    clear_count_cache()
+    yield
+    clear_count_cache()
+
+
+async def test_cached_count_is_reused_until_cleared(db):
+    await Widget.bulk_insert([{"code": "a"}, {"code": "b"}])
+    assert await Widget.count_by_id(CountStrategy.CACHED) == 2
+
+    await Widget.bulk_insert([{"code": "c"}])
+    assert await Widget.count_by_id(CountStrategy.CACHED) == 2
+    assert await Widget.count_by_id(CountStrategy.EXACT) == 3
+
+    clear_count_cache()
+    assert await Widget.count_by_id(CountStrategy.CACHED) == 3
+
+
+async def test_cached_count_expires(db):
+    await Widget.bulk_insert([{"code": "a"}])
+    assert await count_rows(Widget._ids_stmt(), db, CountStrategy.CACHED, ttl=0) == 1
+
+    await Widget.bulk_insert([{"code": "b"}])
+    assert await count_rows(Widget._ids_stmt(), db, CountStrategy.CACHED, ttl=0) == 2
+
+
+async def test_cached_count_is_keyed_on_parameters(db):
+    await Widget.bulk_insert(
+        [{"code": "a", "status": "1"}, {"code": "b", "status": "0"}]
+    )
+
+    assert await Widget.count_by_id_and_status("1", CountStrategy.CACHED) == 1
+    assert await Widget.count_by_id_and_status("0", CountStrategy.CACHED) == 1
+    assert await Widget.count_by_id_and_status("2", CountStrategy.CACHED) == 0
+
+
+async def test_count_cache_is_bounded(db, monkeypatch):
+    monkeypatch.setattr(settings, "COUNT_CACHE_MAX_ENTRIES", 2)
+
+    for index in range(4):
+        await count_rows(
+            Widget._ids_stmt(), db, CountStrategy.CACHED, cache_key=f"k{index}"
+        )
+
+    assert list(counting._count_cache) == ["k2", "k3"]
+
+
+async def test_estimate_falls_back_to_an_exact_count(db, monkeypatch):
+    async def no_estimate(*args):
+        return None
+
+    monkeypatch.setattr(counting, "_estimate_count", no_estimate)
+    await Widget.bulk_insert([{"code": "a"}])
+
+    assert await count_rows(Widget._ids_stmt(), db, CountStrategy.ESTIMATED) == 1
+
+
+async def test_count_wrapper_follows_the_query_values(db):
+    await Widget.bulk_insert([{"code": "a"}, {"code": "b"}, {"code": "b"}])
+
+    for code, expected in [("a", 1), ("b", 2), ("c", 0)]:
+        query = select(Widget.id).where(Widget.code == code)
+        assert await count_rows(query, db) == expected
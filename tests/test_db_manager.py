@@ -0,0 +1,90 @@
+import asyncio
+
+from fastapi import Request
+import pytest
+from sqlalchemy import select
+
+from ehp.db import db_manager as db_manager_module
+from ehp.db.db_manager import get_app_db_manager, get_db_manager, skip_db_manager
+from tests.models import Widget
+
+
+pytestmark = pytest.mark.anyio
+
+
+def test_app_db_manager_is_shared(monkeypatch):
+    monkeypatch.setattr(db_manager_module, "_app_db_manager", None)
+
+    assert get_app_db_manager() is get_app_db_manager()
+
+
+async def test_sessions_are_only_held_inside_a_transaction(db):
+    assert not db.has_scope_session()
+
+    async with db.transaction() as session:
+        assert db.has_scope_session()
+        async with db.transaction() as nested:
+            assert nested is session
+            assert db.get_transaction_depth(session) == 2
+
+    assert not db.has_scope_session()
+    assert not db.scoped_session_factory.registry.registry
+    assert not db._active_sessions
+
+
+async def test_concurrent_tasks_get_their_own_session(db):
+    sessions = []
+    both_open = asyncio.Event()
+
+    async def hold_session():
+        async with db.transaction(readonly=True) as session:
+            await session.execute(select(Widget.id))
+            sessions.append(session)
+            if len(sessions) == 2:
+                both_open.set()
+            await both_open.wait()
+
+    await asyncio.gather(hold_session(), hold_session())
+
+    assert sessions[0] is not sessions[1]
+    assert not db._current_session
+
+
+async def test_cleanup_only_closes_the_given_scope(db):
+    # Sessions left open by two scopes, e.g. requests that never exited them.
+    async def leave_session_open():
+        scope_id = db_manager_module._get_current_task_id()
+        session = db._current_session[scope_id] = db.get_session()
+        await session.execute(select(Widget.id))
+        return scope_id, session
+
+    # Keep both tasks alive, the scope id is the id() of the task.
+    tasks = [asyncio.create_task(leave_session_open()) for _ in range(2)]
+    (scope_id, session), (other_id, other) = await asyncio.gather(*tasks)
+    assert session is not other
+
+    await db.cleanup(scope_id)
+
+    assert not session.in_transaction()
+    assert other.in_transaction()
+    assert db._current_session == {other_id: other}
+    assert list(db.scoped_session_factory.registry.registry) == [other_id]
+
+    await db.cleanup(other_id)
+
+
+def _request_for(endpoint):
+    route = type("Route", (), {"endpoint": endpoint})()
+    return Request({"type": "http", "route": route, "headers": []})
+
+
+async def test_skipped_endpoints_get_no_db_manager(db):
+    @skip_db_manager
+    async def meta():
+        pass
+
+    async def handler():
+        pass
+
+    assert await anext(get_db_manager(_request_for(meta))) is None
+    assert await anext(get_db_manager(_request_for(handler))) is db
@@ -0,0 +1,132 @@
+import asyncio
+from contextlib import suppress
+
+import pytest
+from sqlalchemy import Column, Integer
+from sqlalchemy.orm import configure_mappers
+
+from ehp.base import entity_cache
+from ehp.base.cache import CACHE_PREFIX
+from ehp.base.entity_cache import ENTITY_INVALIDATION_CHANNEL, ENTITY_PREFIX
+from ehp.core.models.db.base import BaseModel
+from tests.models import Flag
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def _until(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("condition not met")
+
+
+@pytest.fixture
+async def cache(db, monkeypatch):
+    """The Flag cache, with the invalidation listener of this test subscribed."""
+    configure_mappers()
+    monkeypatch.setattr(entity_cache, "_entity_listener", None)
+    monkeypatch.setattr(entity_cache, "_listening", False)
+    cache = Flag._get_entity_cache()
+    cache.clear_local()
+    await cache.get("id", 0)
+    await _until(lambda: entity_cache._listening)
+    yield cache
+    entity_cache._entity_listener.cancel()
+    with suppress(asyncio.CancelledError):
+        await entity_cache._entity_listener
+
+
+async def _write(value):
+    db_manager = await Flag.get_db_manager()
+    async with db_manager.transaction() as session:
+        (await session.get(Flag, 1)).value = value
+    await asyncio.gather(*entity_cache._invalidation_tasks)
+
+
+async def test_hits_are_served_from_both_tiers(cache, redis):
+    await Flag.bulk_insert([{"code": "a", "value": "1"}])
+
+    assert (await Flag.get_by_id(1)).value == "1"
+    assert (await Flag.get_by_code("a")).value == "1"
+    assert cache.local_hits == 1
+
+    cache.clear_local()
+    assert (await Flag.get_by_id(1)).value == "1"
+    assert cache.redis_hits == 1
+    keys = {key.decode() for key in await redis.keys("*")}
+    assert f"{ENTITY_PREFIX}test_flag:1:id:1" in keys
+    assert not any(key.startswith(CACHE_PREFIX) for key in keys)
+    assert not ENTITY_PREFIX.startswith(CACHE_PREFIX)
+
+
+async def test_commits_drop_both_tiers(cache):
+    await Flag.bulk_insert([{"code": "a", "value": "1"}])
+    assert (await Flag.get_by_id(1)).value == "1"
+
+    await _write("2")
+
+    assert (await Flag.get_by_id(1)).value == "2"
+    assert (await Flag.get_by_code("a")).value == "2"
+
+
+async def test_rows_read_before_a_write_are_not_cached(cache):
+    await Flag.bulk_insert([{"code": "a", "value": "1"}])
+    obj, generation = await cache.get("id", 1)
+    assert obj is None
+    stale = await Flag.get_by_id(1)
+    cache.clear_local()
+
+    await _write("2")
+    await cache.set(stale, generation)
+
+    assert (await cache.get("id", 1))[0] is None
+    assert (await Flag.get_by_id(1)).value == "2"
+
+
+async def test_writes_of_other_workers_drop_the_local_tier(cache, redis):
+    await Flag.bulk_insert([{"code": "a", "value": "1"}])
+    assert (await Flag.get_by_id(1)).value == "1"
+    assert cache._entries
+
+    # What another worker publishes after committing to the table.
+    await redis.incr(cache._generation_key())
+    await redis.publish(ENTITY_INVALIDATION_CHANNEL, "test_flag")
+
+    await _until(lambda: not cache._entries)
+    assert (await cache.get("id", 1))[0] is None
+
+
+async def test_writes_are_published(cache, redis):
+    await Flag.bulk_insert([{"code": "a", "value": "1"}])
+    pubsub = redis.pubsub()
+    await pubsub.subscribe(ENTITY_INVALIDATION_CHANNEL)
+    await pubsub.get_message(timeout=1)
+
+    await _write("2")
+
+    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+    assert message["data"] == b"test_flag"
+    assert await redis.get(cache._generation_key()) == b"2"
+    await pubsub.aclose()
+
+
+async def test_local_tier_is_off_while_unsubscribed(cache):
+    await Flag.bulk_insert([{"code": "a", "value": "1"}])
+    entity_cache._listening = False
+
+    assert (await Flag.get_by_id(1)).value == "1"
+
+    assert not cache._entries
+
+
+def test_unknown_cache_options_fail_at_class_definition():
+    with pytest.raises(TypeError, match="max_entry"):
+
+        class Misspelled(BaseModel):
+            __tablename__ = "test_misspelled"
+            __cache__ = {"max_entry": 10}
+
+            id = Column(Integer, primary_key=True)
@@ -0,0 +1,57 @@
+import pytest
+from sqlalchemy.orm.exc import DetachedInstanceError
+
+from tests.models import Member, Pet, Team
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def members(db):
+    await Team.bulk_insert([{"name": "red"}])
+    await Member.bulk_insert(
+        [
+            {"email": "ann@example.com", "user_name": "ann", "team_id": 1},
+            {"email": "bob@example.com", "user_name": "ann@example.com"},
+        ]
+    )
+    await Pet.bulk_insert(
+        [{"member_id": 1, "name": "rex"}, {"member_id": 1, "name": "tom"}]
+    )
+
+
+async def test_any_of_the_columns_matches(members):
+    by_email = await Member.get_first_match(
+        {"email": "bob@example.com", "user_name": "nobody"}
+    )
+    by_name = await Member.get_first_match({"email": "nobody", "user_name": "ann"})
+
+    assert (by_email.id, by_name.id) == (2, 1)
+    assert await Member.get_first_match({"email": "nobody", "user_name": None}) is None
+    assert await Member.get_first_match({"email": "", "user_name": None}) is None
+
+
+async def test_the_earlier_column_wins(members):
+    value = "ann@example.com"
+
+    member = await Member.get_first_match({"email": value, "user_name": value})
+    assert member.id == 1
+
+    member = await Member.get_first_match({"user_name": value, "email": value})
+    assert member.id == 2
+
+
+async def test_relationships_are_loaded_with_the_row(members):
+    member = await Member.get_first_match(
+        {"email": "ann@example.com"}, load=("team", "pets")
+    )
+
+    # Detached from its session, anything not loaded would raise.
+    assert member.team.name == "red"
+    assert sorted(pet.name for pet in member.pets) == ["rex", "tom"]
+    assert Pet.serialize_many(member.pets)[0]["member_id"] == 1
+
+    member = await Member.get_first_match({"email": "ann@example.com"})
+    with pytest.raises(DetachedInstanceError):
+        member.pets
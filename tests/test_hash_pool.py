@@ -0,0 +1,137 @@
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import FastAPI, HTTPException
+import httpx
+import pytest
+from sqlalchemy import text
+
+from ehp.config import settings
+from ehp.utils import constants as const
+from ehp.utils import hash_pool, make_response
+from ehp.utils.authentication import (
+    check_password,
+    check_password_async,
+    hash_password_async,
+)
+from ehp.utils.base import log_error
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    """A one worker pool with fresh counters, shut down after the test."""
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 1)
+    monkeypatch.setattr(hash_pool, "_stats", hash_pool.HashPoolStats())
+    monkeypatch.setattr(hash_pool, "_executor", None)
+    yield hash_pool
+    if hash_pool._executor is not None:
+        hash_pool._executor.shutdown(cancel_futures=True)
+
+
+async def test_passwords_are_hashed_in_the_pool(pool):
+    hashed = await hash_password_async("secret")
+
+    assert hashed.startswith("scrypt:")
+    assert check_password(hashed, "secret")
+    assert await check_password_async(hashed, "secret")
+    assert not await check_password_async(hashed, "wrong")
+
+    stats = pool.get_hash_pool_statistics()
+    assert (stats["completed"], stats["pending"], stats["rejected"]) == (3, 0, 0)
+    assert stats["avg_run_ms"] > 0
+
+
+async def test_calls_over_the_pending_limit_are_rejected(pool, monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 1)
+    assert pool._stats.try_acquire(1)
+
+    with pytest.raises(HTTPException) as raised:
+        await hash_password_async("secret")
+
+    assert raised.value.status_code == 503
+    assert raised.value.headers == {"Retry-After": "1"}
+    assert pool._executor is None
+    assert pool.get_hash_pool_statistics()["rejected"] == 1
+
+
+async def test_a_broken_pool_is_replaced(pool):
+    class BrokenExecutor:
+        shut_down = False
+
+        def submit(self, fn, *args):
+            future = Future()
+            future.set_exception(BrokenProcessPool("worker died"))
+            return future
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            self.shut_down = True
+
+    broken = pool._executor = BrokenExecutor()
+
+    with pytest.raises(BrokenProcessPool):
+        await check_password_async("hash", "secret")
+
+    assert broken.shut_down and pool._executor is None
+    assert pool.get_hash_pool_statistics()["pending"] == 0
+    assert await hash_password_async("secret")
+
+
+async def test_only_saturation_raises_hash_pool_saturated(pool, monkeypatch):
+    monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 0)
+
+    with pytest.raises(pool.HashPoolSaturated) as raised:
+        await check_password_async("hash", "secret")
+
+    assert isinstance(raised.value, HTTPException)
+    assert raised.value.status_code == 503
+
+
+async def test_database_errors_are_not_hash_pool_saturated(db):
+    with pytest.raises(HTTPException) as raised:
+        async with db.transaction() as session:
+            await session.execute(text("SELECT * FROM missing_table"))
+
+    assert "Database error" in raised.value.detail
+    assert not isinstance(raised.value, hash_pool.HashPoolSaturated)
+
+
+@pytest.fixture
+def password_app(db):
+    """An endpoint handling errors like the password services do."""
+    app = FastAPI()
+
+    @app.put("/pwd")
+    async def update_password(fail: bool = False):
+        response_json = const.ERROR_JSON
+        try:
+            async with db.transaction() as session:
+                hashed = await hash_password_async("secret")
+                if fail:
+                    await session.execute(text("SELECT * FROM missing_table"))
+                response_json = {**const.SUCCESS_JSON, "hashed": bool(hashed)}
+        except hash_pool.HashPoolSaturated:
+            raise
+        except Exception as e:
+            log_error(e)
+        return make_response(response_json)
+
+    transport = httpx.ASGITransport(app=app)
+    return httpx.AsyncClient(transport=transport, base_url="http://test")
+
+
+async def test_only_saturation_escapes_the_password_services(
+    pool, password_app, monkeypatch
+):
+    async with password_app as client:
+        response = await client.put("/pwd", params={"fail": True})
+        assert response.status_code == 200
+        assert response.json()["result"] == const.ERROR_JSON
+        assert "missing_table" not in response.text
+
+        monkeypatch.setattr(settings, "PASSWORD_HASH_MAX_PENDING", 0)
+        response = await client.put("/pwd")
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
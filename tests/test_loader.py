@@ -0,0 +1,140 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import select, update
+
+from ehp.base.middleware import _request_context
+from ehp.db.loader import IdentityLoader
+from tests.models import Widget
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def request_scope():
+    """Run the test as if inside a request, so get_by_id uses the loader."""
+    request = SimpleNamespace(state=SimpleNamespace(request_config={}))
+    token = _request_context.set(request)
+    yield request
+    _request_context.reset(token)
+
+
+@pytest.fixture
+def fetched(db, monkeypatch):
+    """Record the id batches Widget fetches (with IN, SQLite has no ANY)."""
+    batches = []
+
+    async def record(obj_ids):
+        batches.append(sorted(obj_ids))
+        async with db.transaction(readonly=True) as session:
+            result = await session.scalars(select(Widget).where(Widget.id.in_(obj_ids)))
+            return list(result)
+
+    monkeypatch.setattr(Widget, "_fetch_by_ids", record)
+    return batches
+
+
+async def test_lookups_in_the_same_tick_share_one_query(request_scope, fetched):
+    await Widget.bulk_insert([{"code": "a"}, {"code": "b"}])
+
+    first, second, again = await asyncio.gather(
+        Widget.get_by_id(1), Widget.get_by_id(2), Widget.get_by_id(1)
+    )
+
+    assert (first.code, second.code) == ("a", "b")
+    assert again is first
+    assert fetched == [[1, 2]]
+
+    assert await Widget.get_by_id(2) is second
+    assert fetched == [[1, 2]]
+
+
+async def test_misses_are_not_memoized(request_scope, fetched):
+    assert await Widget.get_by_id(1) is None
+
+    await Widget.bulk_insert([{"code": "a"}])
+
+    assert (await Widget.get_by_id(1)).code == "a"
+    assert fetched == [[1], [1]]
+
+
+async def test_orm_writes_clear_the_memo(request_scope, fetched):
+    await Widget.bulk_insert([{"code": "a"}, {"code": "b"}])
+    assert (await Widget.get_by_id(1)).code == "a"
+
+    db_manager = await Widget.get_db_manager()
+    async with db_manager.transaction() as session:
+        (await session.get(Widget, 1)).code = "changed"
+
+    assert (await Widget.get_by_id(1)).code == "changed"
+
+    assert await Widget.obj_delete(2)
+    assert await Widget.get_by_id(2) is None
+
+
+async def test_statement_writes_clear_the_memo(request_scope, fetched):
+    await Widget.bulk_insert([{"code": "a"}])
+    assert (await Widget.get_by_id(1)).code == "a"
+
+    db_manager = await Widget.get_db_manager()
+    async with db_manager.transaction() as session:
+        await session.execute(
+            update(Widget).where(Widget.id == 1).values(code="changed")
+        )
+
+    assert (await Widget.get_by_id(1)).code == "changed"
+    assert len(fetched) == 2
+
+
+async def test_lookups_in_a_transaction_are_attached_to_it(request_scope, fetched):
+    await Widget.bulk_insert([{"code": "a"}, {"code": "b"}])
+    assert (await Widget.get_by_id(1)).code == "a"
+
+    db_manager = await Widget.get_db_manager()
+    async with db_manager.transaction() as session:
+        # Merged from the memo, without another query.
+        obj = await Widget.get_by_id(1)
+        assert obj in session
+        assert await session.get(Widget, 1) is obj
+        assert await Widget.get_by_id(1) is obj
+
+        other = await Widget.get_by_id(2)
+        assert other in session
+        assert (await Widget.get_by_id(3)) is None
+        assert fetched == [[1], [2], [3]]
+
+        # The loader cannot see uncommitted writes, so it is bypassed.
+        await session.execute(update(Widget).where(Widget.id == 2).values(code="x"))
+        session.expunge(other)
+        assert (await Widget.get_by_id(2)).code == "x"
+        assert fetched == [[1], [2], [3]]
+
+
+async def test_active_lookups_are_batched_outside_transactions(request_scope, fetched):
+    await Widget.bulk_insert([{"code": "a"}, {"code": "b"}])
+
+    first, second = await asyncio.gather(
+        Widget.get_active_by_id(1), Widget.get_by_id(2)
+    )
+
+    assert (first.code, second.code) == ("a", "b")
+    assert fetched == [[1, 2]]
+
+
+async def test_failed_batches_are_retried():
+    calls = []
+
+    async def flaky(obj_ids):
+        calls.append(obj_ids)
+        if len(calls) == 1:
+            raise RuntimeError("database went away")
+        return [SimpleNamespace(id=obj_id) for obj_id in obj_ids]
+
+    loader = IdentityLoader(flaky)
+    with pytest.raises(RuntimeError):
+        await loader.load(1)
+
+    assert (await loader.load(1)).id == 1
+    assert calls == [[1], [1]]
@@ -0,0 +1,54 @@
+from fastapi import FastAPI
+import httpx
+import pytest
+
+from ehp.config import settings
+from ehp.core.services.root import router
+
+
+pytestmark = pytest.mark.anyio
+
+INTERNAL = [
+    "/_meta/db/pool",
+    "/_meta/db/replicas",
+    "/_meta/db/statements",
+    "/_meta/db/cache",
+    "/_meta/auth/hash_pool",
+]
+
+
+@pytest.fixture
+async def client():
+    app = FastAPI()
+    app.include_router(router)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+@pytest.mark.parametrize("path", INTERNAL)
+async def test_internal_endpoints_are_hidden_without_an_admin_key(
+    client, monkeypatch, path
+):
+    monkeypatch.setattr(settings, "META_ADMIN_KEY", "")
+
+    response = await client.get(path, headers={"x-admin-key": ""})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize("path", INTERNAL)
+async def test_internal_endpoints_need_the_admin_key(client, monkeypatch, path):
+    monkeypatch.setattr(settings, "META_ADMIN_KEY", "admin-key")
+
+    assert (await client.get(path)).status_code == 400
+    wrong = await client.get(path, headers={"x-admin-key": settings.API_KEY_VALUE})
+    assert wrong.status_code == 400
+    right = await client.get(path, headers={"x-admin-key": "admin-key"})
+    assert right.status_code == 200
+
+
+async def test_the_metadata_stays_public(client, monkeypatch):
+    monkeypatch.setattr(settings, "META_ADMIN_KEY", "")
+
+    assert (await client.get("/_meta")).status_code == 200
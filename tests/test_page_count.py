@@ -0,0 +1,61 @@
+import pytest
+from sqlalchemy import select
+
+from ehp.db.paging import get_async_page_info
+from tests.models import Widget
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def widgets(db):
+    await Widget.bulk_insert([{"code": f"w{i}"} for i in range(5)])
+
+
+@pytest.mark.parametrize("single_query", [True, False])
+async def test_page_and_total_match_both_strategies(db, widgets, single_query):
+    items, total, per_page = await get_async_page_info(
+        select(Widget).order_by(Widget.id),
+        page=2,
+        items_per_page=2,
+        db_manager=db,
+        single_query=single_query,
+    )
+
+    assert [item.code for item in items] == ["w2", "w3"]
+    assert (total, per_page) == (5, 2)
+
+
+async def test_window_count_rows_drop_the_total_column(db, widgets):
+    items, total, _ = await get_async_page_info(
+        select(Widget.id, Widget.code).order_by(Widget.id),
+        items_per_page=2,
+        db_manager=db,
+        single_query=True,
+        as_rows=True,
+    )
+
+    assert items == [{"id": 1, "code": "w0"}, {"id": 2, "code": "w1"}]
+    assert total == 5
+
+
+async def test_window_count_past_the_last_page_still_has_the_total(db, widgets):
+    items, total, _ = await get_async_page_info(
+        select(Widget).order_by(Widget.id),
+        page=10,
+        items_per_page=2,
+        db_manager=db,
+        single_query=True,
+    )
+
+    assert items == []
+    assert total == 5
+
+
+async def test_window_count_of_an_empty_table_is_zero(db):
+    items, total, _ = await get_async_page_info(
+        select(Widget), db_manager=db, single_query=True
+    )
+
+    assert (items, total) == ([], 0)
@@ -0,0 +1,62 @@
+from datetime import datetime
+
+from fastapi import HTTPException
+import pytest
+from sqlalchemy import select
+
+from ehp.db.paging import decode_cursor, encode_cursor, get_async_cursor_page_info
+from tests.models import Widget
+
+
+pytestmark = pytest.mark.anyio
+
+
+def test_cursor_round_trip_keeps_column_types():
+    created = datetime(2024, 5, 1, 12, 30)
+    cursor = encode_cursor([created, 42])
+
+    assert decode_cursor(cursor, [Widget.created_at, Widget.id]) == [created, 42]
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor",
+        encode_cursor([1, 2]),  # wrong number of values
+        encode_cursor(["abc"]),  # not an integer
+        "eyJpZCI6IDF9",  # a JSON object instead of a list
+    ],
+)
+def test_invalid_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor, [Widget.id])
+
+    assert error.value.status_code == 400
+
+
+async def test_cursor_pages_walk_the_whole_table(db):
+    await Widget.bulk_insert([{"code": f"w{i}"} for i in range(5)])
+
+    seen, after = [], None
+    while True:
+        items, after, _ = await get_async_cursor_page_info(
+            select(Widget),
+            order_columns=[Widget.id],
+            after=after,
+            items_per_page=2,
+            db_manager=db,
+        )
+        seen.extend(item.code for item in items)
+        if after is None:
+            break
+
+    assert seen == [f"w{i}" for i in range(5)]
+
+
+async def test_model_cursor_paging_rejects_tampered_cursor(db):
+    await Widget.bulk_insert([{"code": "w0"}])
+
+    with pytest.raises(HTTPException) as error:
+        await Widget.list_cursor_paged(after="tampered")
+
+    assert error.value.status_code == 400
@@ -0,0 +1,85 @@
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from ehp.config import settings
+from ehp.db import pool_stats
+from ehp.db.pool_stats import get_pool_statistics, InstrumentedAsyncQueuePool
+from ehp.db.sqlalchemy_async_connector import get_pool_options
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(pool_stats, "_pools", {})
+    monkeypatch.setattr(pool_stats, "_pool_stats", {})
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedAsyncQueuePool,
+        pool_size=1,
+        max_overflow=1,
+        pool_timeout=0.05,
+        pool_logging_name="test",
+    )
+    yield engine
+    await engine.dispose()
+
+
+async def test_statistics_report_usage_and_configuration(engine):
+    async with engine.connect():
+        async with engine.connect():
+            stats = get_pool_statistics()["test"]
+            assert stats["checked_out"] == 2
+            assert stats["overflow"] == 1
+
+    stats = get_pool_statistics()["test"]
+    assert stats["size"] == 1
+    assert stats["max_overflow"] == 1
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 2
+    assert sum(stats["wait_histogram_ms"].values()) == 2
+
+
+async def test_checkout_timeouts_are_counted(engine):
+    async with engine.connect():
+        async with engine.connect():
+            with pytest.raises(exc.TimeoutError):
+                await engine.connect().start()
+
+    stats = get_pool_statistics()["test"]
+    assert stats["timeouts"] == 1
+    assert stats["max_wait_ms"] >= 50
+
+
+async def test_statistics_survive_a_dispose(engine):
+    async with engine.connect():
+        pass
+    await engine.dispose()
+    async with engine.connect():
+        pass
+
+    stats = get_pool_statistics()["test"]
+    assert stats["checkouts"] == 2
+    assert stats["max_overflow"] == 1
+
+
+def test_pool_options_split_the_connection_budget(monkeypatch):
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 100)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 4)
+    monkeypatch.setattr(settings, "POOL_SIZE", 20)
+
+    options = get_pool_options()
+
+    assert options["pool_size"] == 20
+    assert options["pool_size"] + options["max_overflow"] == 25
+
+
+def test_pool_options_never_go_below_one_connection(monkeypatch):
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", 2)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", 8)
+
+    options = get_pool_options()
+
+    assert (options["pool_size"], options["max_overflow"]) == (1, 0)
@@ -0,0 +1,55 @@
+import pytest
+
+from ehp.utils.base import run_to_dict_async
+from tests.models import Gadget, Widget
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def widgets(db):
+    await Widget.bulk_insert(
+        [{"code": "a", "status": "1"}, {"code": "b", "status": "0"}]
+    )
+
+
+async def test_list_returns_dicts_of_the_columns(widgets):
+    rows = await Widget.list(columns=["code", Widget.status])
+
+    assert rows == [{"code": "a", "status": "1"}, {"code": "b", "status": "0"}]
+
+
+async def test_projected_rows_use_attribute_names(db):
+    await Gadget.bulk_insert([{"serial": "s1"}])
+
+    assert await Gadget.list(columns=["serial", "kind"]) == [
+        {"serial": "s1", "kind": "basic"}
+    ]
+
+
+async def test_projected_rows_pass_through_run_to_dict_async(widgets):
+    rows = await Widget.list(columns=["code"])
+
+    assert await run_to_dict_async(rows) == [{"code": "a"}, {"code": "b"}]
+    assert (await run_to_dict_async(await Widget.list()))[0]["code"] == "a"
+
+
+async def test_paged_projection(widgets):
+    rows, total, _ = await Widget.list_paged(1, columns=["code"])
+
+    assert rows == [{"code": "a"}, {"code": "b"}]
+    assert total == 2
+
+
+async def test_cursor_projection_includes_the_ordering_column(widgets):
+    rows, after, _ = await Widget.list_by_status_cursor_paged("0", columns=["code"])
+
+    assert rows == [{"code": "b", "id": 2}]
+    assert after is None
+
+
+async def test_projected_rows_are_not_tracked(db, widgets):
+    async with db.transaction(readonly=True) as session:
+        await Widget.list(columns=["code"])
+        assert not session.identity_map
@@ -0,0 +1,77 @@
+import logging
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from ehp.db.query_stats import (
+    detect_n_plus_one,
+    get_query_stats,
+    instrument_query_stats,
+    QueryStats,
+    start_query_stats,
+)
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    instrument_query_stats(engine)
+    yield engine
+    await engine.dispose()
+
+
+def _start_request():
+    """Start the stats of a request. Each test runs in its own context, so
+    they do not leak into the next test."""
+    start_query_stats()
+    return get_query_stats()
+
+
+async def test_statements_of_the_request_are_counted(engine):
+    stats = _start_request()
+    async with engine.connect() as connection:
+        await connection.execute(select(1))
+        await connection.execute(select(1))
+        await connection.execute(select(2))
+
+    assert stats.count == 3
+    assert stats.total_ms > 0
+    assert stats.repeated(1) == [("SELECT 1", 2)]
+
+
+async def test_failed_statements_are_not_recorded(engine):
+    stats = _start_request()
+    async with engine.connect() as connection:
+        with pytest.raises(Exception):
+            await connection.execute(text("SELECT * FROM missing"))
+        await connection.execute(select(1))
+
+    assert stats.count == 1
+
+
+async def test_nothing_is_recorded_outside_a_request(engine):
+    async with engine.connect() as connection:
+        await connection.execute(select(1))
+
+    assert get_query_stats() is None
+
+
+def test_repeated_statements_are_reported(caplog):
+    stats = QueryStats()
+    for _ in range(3):
+        stats.record("SELECT *\n  FROM person WHERE id = $1", 1.0)
+    stats.record("SELECT 1", 1.0)
+
+    with caplog.at_level(logging.WARNING, logger="ehp.db.query_stats"):
+        detect_n_plus_one(stats, "GET /people", threshold=2)
+        detect_n_plus_one(stats, "GET /people", threshold=0)
+
+    assert [record.getMessage() for record in caplog.records] == [
+        "Possible N+1 on GET /people: statement executed 3 times: "
+        "SELECT * FROM person WHERE id = $1"
+    ]
@@ -0,0 +1,86 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from ehp.db import db_manager as db_manager_module
+from ehp.db.replicas import ReplicaSet
+from tests.models import Widget
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def _replica_set(*codes):
+    """A replica set of in-memory databases, each holding one widget."""
+    engines = []
+    for code in codes:
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as connection:
+            await connection.run_sync(Widget.__table__.create)
+            await connection.execute(Widget.__table__.insert(), {"code": code})
+        engines.append(engine)
+
+    replicas = ReplicaSet(engines)
+    replicas._last_check = time.monotonic()  # no background health check
+    return replicas
+
+
+async def _read_code(db):
+    async with db.transaction(readonly=True) as session:
+        return await session.scalar(select(Widget.code))
+
+
+def test_no_replicas_means_the_primary():
+    assert ReplicaSet([]).choose() is None
+
+
+async def test_unhealthy_replicas_are_skipped():
+    replicas = await _replica_set("r1")
+
+    assert replicas.choose() is None
+
+    # SQLite has no pg_is_in_recovery(), the check marks the replica down.
+    await replicas.check()
+    assert replicas.status()[0]["healthy"] is False
+    assert replicas.status()[0]["error"]
+
+
+async def test_healthy_replicas_are_used_round_robin():
+    replicas = await _replica_set("r1", "r2")
+    for replica in replicas.replicas:
+        replica.healthy = True
+
+    chosen = {replicas.choose() for _ in range(4)}
+
+    assert chosen == {replica.session_factory for replica in replicas.replicas}
+
+
+async def test_reads_go_to_the_replica_until_the_request_writes(db, monkeypatch):
+    replicas = await _replica_set("replica")
+    replicas.replicas[0].healthy = True
+    monkeypatch.setattr(db_manager_module, "replica_set", replicas)
+
+    async def request():
+        async with db.transaction() as session:
+            session.add(Widget(code="primary"))
+        return await _read_code(db)
+
+    assert await _read_code(db) == "replica"
+    # Each request runs in its own task, and so its own context.
+    assert await asyncio.create_task(request()) == "primary"
+    assert await _read_code(db) == "replica"
+    assert not db._current_replica_session
+
+
+async def test_reads_join_an_open_primary_transaction(db, monkeypatch):
+    replicas = await _replica_set("replica")
+    replicas.replicas[0].healthy = True
+    monkeypatch.setattr(db_manager_module, "replica_set", replicas)
+
+    async with db.transaction():
+        await Widget.bulk_insert([{"code": "primary"}])
+        assert await _read_code(db) == "primary"
@@ -0,0 +1,81 @@
+from types import SimpleNamespace
+
+import pytest
+
+from ehp.base import middleware
+from ehp.base.middleware import (
+    _request_context,
+    get_resolved_session,
+    get_user_session,
+    resolve_session,
+)
+from ehp.config import settings
+from ehp.utils.authentication import get_language_id
+
+
+pytestmark = pytest.mark.anyio
+
+SESSION = {
+    "session_id": "abc",
+    "session_info": {
+        "id": 7,
+        "user_name": "ann",
+        "profile_id": 3,
+        "person": {"language_id": 2},
+    },
+}
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """Record the tokens read from the session store."""
+    tokens = []
+
+    async def read(token):
+        tokens.append(token)
+        return SESSION if token == "valid" else None
+
+    monkeypatch.setattr(middleware, "get_from_redis_session_async", read)
+    return tokens
+
+
+def _enter_request():
+    request = SimpleNamespace(state=SimpleNamespace())
+    _request_context.set(request)
+    return request
+
+
+async def test_the_session_is_read_once_per_request(reads):
+    request = _enter_request()
+
+    session = await resolve_session("valid")
+    assert await resolve_session("valid") is session
+    await get_user_session(request, "valid")
+
+    assert reads == ["valid"]
+    assert get_resolved_session() is session
+    assert request.state.request_config["user_session"] is SESSION
+    assert (session.user_id, session.user_name, session.profile_id) == (7, "ann", 3)
+    assert session.language_id == 2
+    assert get_language_id() == 2
+
+
+async def test_another_token_is_read_again(reads):
+    _enter_request()
+
+    assert (await resolve_session("valid")).is_valid
+    assert not (await resolve_session("expired")).is_valid
+
+    assert reads == ["valid", "expired"]
+    assert get_resolved_session().token == "expired"
+    assert get_language_id() == settings.DEFAULT_LANGUAGE_ID
+
+
+async def test_sessions_are_not_shared_outside_requests(reads):
+    _request_context.set(None)
+
+    await resolve_session("valid")
+    await resolve_session("valid")
+
+    assert reads == ["valid", "valid"]
+    assert get_resolved_session() is None
@@ -0,0 +1,53 @@
+from datetime import datetime
+from decimal import Decimal
+import json
+import uuid
+
+from ehp.utils import constants as const
+from ehp.utils.request import _encode, dumps, make_response
+
+
+def _body(response):
+    return json.loads(response.body)
+
+
+def test_response_envelope():
+    response = make_response({"name": "x"}, {"page": 1})
+
+    body = _body(response)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert body["result"] == {"name": "x"}
+    assert body["pagination"] == {"page": 1}
+    assert datetime.fromisoformat(body["response_time"])
+    assert body["response_id"] != _body(make_response({}))["response_id"]
+
+
+def test_empty_pagination_is_an_empty_object():
+    assert _body(make_response([]))["pagination"] == {}
+
+
+def test_values_outside_plain_json_are_encoded():
+    token = uuid.uuid4()
+
+    assert json.loads(
+        dumps({"amount": Decimal("1.50"), "raw": b"abc", "token": token, 1: "a"})
+    ) == {"amount": "1.50", "raw": "abc", "token": str(token), "1": "a"}
+
+
+def test_constant_payloads_are_encoded_once_but_not_when_mutated():
+    _, payload = next(
+        (name, value)
+        for name, value in vars(const).items()
+        if name.isupper() and isinstance(value, dict) and value
+    )
+
+    assert _encode(payload) is _encode(payload)
+
+    key = next(iter(payload))
+    original = payload[key]
+    try:
+        payload[key] = "changed"
+        assert json.loads(_encode(payload))[key] == "changed"
+    finally:
+        payload[key] = original
@@ -0,0 +1,154 @@
+import asyncio
+
+from fastapi import Depends, FastAPI, Request
+import httpx
+import pytest
+
+from ehp.base import cache as base_cache
+from ehp.base.middleware import RequestMiddleware
+from ehp.core.services import cache as service_cache
+from ehp.core.services.cache import cached_response
+from ehp.utils import make_response
+from tests.models import Widget
+
+
+pytestmark = pytest.mark.anyio
+
+
+def _set_language(request: Request) -> None:
+    # What the login does for the requests of a session.
+    language_id = request.headers.get("x-language-id")
+    if language_id:
+        request.state.request_config = {"language_id": int(language_id)}
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+async def client(db, calls):
+    app = FastAPI()
+    app.add_middleware(RequestMiddleware)
+
+    @app.get("/widgets", dependencies=[Depends(_set_language)])
+    @cached_response(ttl=60, stale=60, tags=[Widget])
+    async def widgets():
+        calls.append("widgets")
+        return make_response(Widget.serialize_many(await Widget.list()))
+
+    @app.get("/stale")
+    @cached_response(ttl=0, stale=60, tags=[Widget])
+    async def stale():
+        calls.append("stale")
+        return make_response({"calls": len(calls)})
+
+    @app.get("/racing")
+    @cached_response(ttl=60, tags=[Widget])
+    async def racing():
+        calls.append("racing")
+        rows = Widget.serialize_many(await Widget.list())
+        if len(calls) == 1:
+            # Another request commits a write before this response is stored.
+            await Widget.bulk_insert([{"code": "a"}])
+            await _invalidated()
+        return make_response(rows)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+async def _invalidated():
+    await asyncio.gather(*base_cache._invalidation_tasks)
+
+
+async def test_responses_are_served_from_the_cache(client, calls):
+    first = await client.get("/widgets")
+    second = await client.get("/widgets")
+
+    assert (first.headers["x-cache"], second.headers["x-cache"]) == ("MISS", "HIT")
+    assert second.json()["result"] == first.json()["result"]
+    assert second.headers["etag"] == first.headers["etag"]
+    assert calls == ["widgets"]
+
+
+async def test_cached_responses_answer_conditional_gets(client, calls):
+    etag = (await client.get("/widgets")).headers["etag"]
+
+    response = await client.get("/widgets", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert calls == ["widgets"]
+
+
+async def test_writes_drop_the_tagged_responses(client, calls):
+    assert (await client.get("/widgets")).json()["result"] == []
+
+    await Widget.bulk_insert([{"code": "a"}])
+    await _invalidated()
+
+    response = await client.get("/widgets")
+    assert response.headers["x-cache"] == "MISS"
+    assert [row["code"] for row in response.json()["result"]] == ["a"]
+
+
+async def test_responses_built_before_a_write_are_not_stored(client, calls):
+    assert (await client.get("/racing")).json()["result"] == []
+
+    response = await client.get("/racing")
+
+    assert response.headers["x-cache"] == "MISS"
+    assert [row["code"] for row in response.json()["result"]] == ["a"]
+    assert (await client.get("/racing")).headers["x-cache"] == "HIT"
+
+
+async def test_responses_vary_on_language(client, calls):
+    await client.get("/widgets")
+    await client.get("/widgets", headers={"Accept-Language": "pt-BR"})
+    await client.get("/widgets", headers={"X-Language-Id": "2"})
+    await client.get("/widgets", headers={"X-Language-Id": "2"})
+
+    assert len(calls) == 3
+
+
+async def test_one_request_refreshes_a_stale_response(client, calls):
+    assert (await client.get("/stale")).json()["result"] == {"calls": 1}
+
+    refreshed = await client.get("/stale")
+    assert refreshed.headers["x-cache"] == "MISS"
+    assert refreshed.json()["result"] == {"calls": 2}
+
+    # The refresh lock is still held, the others get the stale copy.
+    stale = await client.get("/stale")
+    assert stale.headers["x-cache"] == "STALE"
+    assert stale.json()["result"] == {"calls": 2}
+
+
+async def test_stale_responses_are_served_when_locking_fails(
+    client, calls, monkeypatch
+):
+    await client.get("/stale")
+
+    async def unavailable(*args):
+        raise ConnectionError("Redis went away")
+
+    monkeypatch.setattr(service_cache, "acquire_refresh_lock", unavailable)
+    response = await client.get("/stale")
+
+    assert response.status_code == 200
+    assert response.headers["x-cache"] == "STALE"
+    assert calls == ["stale"]
+
+
+async def test_requests_go_through_when_redis_is_down(client, calls, monkeypatch):
+    async def unavailable(*args):
+        raise ConnectionError("Redis went away")
+
+    monkeypatch.setattr(service_cache, "get_cached", unavailable)
+    monkeypatch.setattr(base_cache, "set_tagged", unavailable)
+
+    assert (await client.get("/widgets")).status_code == 200
+    assert (await client.get("/widgets")).status_code == 200
+    assert len(calls) == 2
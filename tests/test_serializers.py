@@ -0,0 +1,74 @@
+from datetime import date, datetime
+from decimal import Decimal
+import uuid
+
+import pytest
+
+from ehp.utils.base import run_to_dict_async
+from tests.models import Gadget, Level, Reading, Widget
+
+
+pytestmark = pytest.mark.anyio
+
+
+def test_values_are_converted_to_json_types():
+    token = uuid.uuid4()
+    reading = Reading(
+        id=1,
+        taken_on=date(2024, 5, 1),
+        taken_at=datetime(2024, 5, 1, 12, 30),
+        amount=Decimal("1.50"),
+        level=Level.HIGH,
+        token=token,
+        raw=b"abc",
+    )
+
+    assert reading.serialize_sync() == {
+        "id": 1,
+        "taken_on": "2024-05-01",
+        "taken_at": "2024-05-01T12:30:00",
+        "amount": "1.50",
+        "level": "high",
+        "token": str(token),
+        "raw": "abc",
+    }
+
+
+def test_missing_values_are_serialized_as_none():
+    assert Reading(id=2).serialize_sync() == {
+        "id": 2,
+        "taken_on": None,
+        "taken_at": None,
+        "amount": None,
+        "level": None,
+        "token": None,
+        "raw": None,
+    }
+
+
+def test_keys_are_attribute_names():
+    assert Gadget(id=1, serial="s1", kind="big").serialize_sync() == {
+        "id": 1,
+        "serial": "s1",
+        "kind": "big",
+    }
+
+
+def test_serialize_many_uses_the_serializer_of_each_row():
+    rows = [Widget(id=1, code="w"), Gadget(id=2, serial="s2", kind="big")]
+
+    widget, gadget = Widget.serialize_many(rows)
+
+    assert widget["code"] == "w"
+    assert gadget == {"id": 2, "serial": "s2", "kind": "big"}
+
+
+async def test_loaded_rows_match_the_async_helpers(db):
+    await Widget.bulk_insert([{"code": "a"}, {"code": "b"}])
+    widgets = await Widget.list()
+
+    serialized = await run_to_dict_async(widgets)
+
+    assert [row["code"] for row in serialized] == ["a", "b"]
+    assert serialized[0] == await widgets[0].to_dict()
+    assert await run_to_dict_async([]) == []
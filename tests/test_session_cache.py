@@ -0,0 +1,109 @@
+import asyncio
+from contextlib import suppress
+
+import pytest
+
+from ehp.base import session as session_module
+from ehp.base.session import (
+    _LocalSessionCache,
+    create_redis_session_async,
+    get_from_redis_session_async,
+    remove_from_redis_session_async,
+    SESSION_INVALIDATION_CHANNEL,
+)
+from ehp.config import settings
+
+
+pytestmark = pytest.mark.anyio
+
+
+async def _until(condition):
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.005)
+    raise AssertionError("condition not met")
+
+
+@pytest.fixture
+async def local_sessions(redis, monkeypatch):
+    """A fresh local session cache, subscribed to the invalidations."""
+    monkeypatch.setattr(settings, "SESSION_LOCAL_CACHE_SIZE", 100)
+    monkeypatch.setattr(settings, "SESSION_REFRESH_INTERVAL", 0)
+    monkeypatch.setattr(session_module, "_local_sessions", _LocalSessionCache())
+    monkeypatch.setattr(session_module, "_session_listener", None)
+    await get_from_redis_session_async("unknown")
+    await _until(lambda: session_module._local_sessions.listening)
+    yield session_module._local_sessions
+    session_module._session_listener.cancel()
+    with suppress(asyncio.CancelledError):
+        await session_module._session_listener
+
+
+async def test_sessions_are_served_locally_until_invalidated(local_sessions, redis):
+    token = await create_redis_session_async({"id": 1})
+    first = await get_from_redis_session_async(token)
+    assert await get_from_redis_session_async(token) is first
+
+    # Another worker logs the session out.
+    await redis.delete(token)
+    await redis.publish(SESSION_INVALIDATION_CHANNEL, token)
+
+    await _until(lambda: local_sessions.get(token) is None)
+    assert await get_from_redis_session_async(token) is None
+
+
+async def test_a_read_racing_a_logout_is_not_cached(local_sessions, redis, monkeypatch):
+    token = await create_redis_session_async({"id": 1})
+    read_started, logged_out = asyncio.Event(), asyncio.Event()
+    getex = redis.getex
+
+    async def slow_getex(*args, **kwargs):
+        value = await getex(*args, **kwargs)
+        read_started.set()
+        await logged_out.wait()
+        return value
+
+    monkeypatch.setattr(redis, "getex", slow_getex)
+    read = asyncio.create_task(get_from_redis_session_async(token))
+    await read_started.wait()
+    await remove_from_redis_session_async(token)
+    logged_out.set()
+
+    # The read returns what it saw, but must not resurrect the session.
+    assert (await read)["session_info"] == {"id": 1}
+    assert local_sessions.get(token) is None
+    monkeypatch.setattr(redis, "getex", getex)
+    assert await get_from_redis_session_async(token) is None
+
+
+def test_puts_older_than_a_discard_are_refused(monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_LOCAL_CACHE_SIZE", 2)
+    cache = _LocalSessionCache()
+    cache.listening = True
+
+    generation = cache.generation
+    cache.discard("a")
+    cache.put("a", {}, generation)
+    cache.put("b", {}, generation)
+    assert cache.get("a") is None
+    assert cache.get("b") == {}
+
+    # Once the discard of "a" is forgotten, every older read is refused.
+    cache.discard("c")
+    cache.discard("d")
+    cache.put("e", {}, generation)
+    assert cache.get("e") is None
+    cache.put("e", {}, cache.generation)
+    assert cache.get("e") == {}
+
+
+def test_puts_older_than_a_reconnect_are_refused():
+    cache = _LocalSessionCache()
+    cache.listening = True
+    generation = cache.generation
+
+    cache.clear()
+    cache.put("a", {}, generation)
+
+    assert cache.get("a") is None
@@ -0,0 +1,90 @@
+import warnings
+
+import pytest
+
+from ehp.base.session import (
+    create_redis_session,
+    create_redis_session_async,
+    get_from_redis_session,
+    get_from_redis_session_async,
+    remove_from_redis_session_async,
+    SessionData,
+    write_to_redis_session_async,
+)
+from ehp.config import settings
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def sessions(redis, monkeypatch):
+    """Sessions read from Redis only, without the local cache."""
+    monkeypatch.setattr(settings, "SESSION_LOCAL_CACHE_SIZE", 0)
+    monkeypatch.setattr(settings, "SESSION_REFRESH_INTERVAL", 0)
+    return redis
+
+
+async def test_async_sessions_round_trip(sessions):
+    token = await create_redis_session_async({"id": 1, "user_name": "ann"})
+
+    data = await get_from_redis_session_async(token)
+    assert data["session_info"] == {"id": 1, "user_name": "ann"}
+    assert 0 < await sessions.ttl(token) <= settings.SESSION_TIMEOUT
+
+    session_data = SessionData(session_id=data["session_id"], session_info={"id": 2})
+    await write_to_redis_session_async(token, session_data)
+    assert (await get_from_redis_session_async(token))["session_info"] == {"id": 2}
+
+    await remove_from_redis_session_async(token)
+    assert await get_from_redis_session_async(token) is None
+
+
+async def test_sync_and_async_sessions_are_interchangeable(sessions):
+    token = create_redis_session({"id": 1})
+    assert (await get_from_redis_session_async(token))["session_info"] == {"id": 1}
+
+    token = await create_redis_session_async({"id": 2})
+    assert get_from_redis_session(token)["session_info"] == {"id": 2}
+
+
+async def test_unknown_tokens_have_no_session(sessions):
+    assert await get_from_redis_session_async("unknown") is None
+    assert await get_from_redis_session_async("") is None
+
+
+async def test_reads_slide_the_expiry(sessions):
+    token = await create_redis_session_async({"id": 1})
+    await sessions.expire(token, 10)
+
+    await get_from_redis_session_async(token)
+
+    assert await sessions.ttl(token) > settings.SESSION_TIMEOUT - 5
+
+
+async def test_expiry_slides_at_most_once_per_refresh_interval(sessions, monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_TIMEOUT", 1800)
+    monkeypatch.setattr(settings, "SESSION_REFRESH_INTERVAL", 60)
+    token = await create_redis_session_async({"id": 1})
+
+    # Refreshed less than the interval ago, the TTL is left alone.
+    await sessions.expire(token, settings.SESSION_TIMEOUT - 30)
+    assert (await get_from_redis_session_async(token))["session_info"] == {"id": 1}
+    assert await sessions.ttl(token) <= settings.SESSION_TIMEOUT - 30
+
+    await sessions.expire(token, settings.SESSION_TIMEOUT - 90)
+    assert get_from_redis_session(token)["session_info"] == {"id": 1}
+    assert await sessions.ttl(token) > settings.SESSION_TIMEOUT - 5
+
+    await sessions.expire(token, settings.SESSION_TIMEOUT - 90)
+    await get_from_redis_session_async(token)
+    assert await sessions.ttl(token) > settings.SESSION_TIMEOUT - 5
+
+
+async def test_session_writes_do_not_warn(sessions):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        token = await create_redis_session_async({"id": 1})
+        create_redis_session({"id": 2})
+
+    assert (await get_from_redis_session_async(token))["session_info"] == {"id": 1}
@@ -0,0 +1,133 @@
+import asyncio
+from contextlib import suppress
+import os
+import subprocess
+import sys
+import time
+
+from fastapi import HTTPException
+import jwt
+import pytest
+
+from ehp.base import session as session_module
+from ehp.base.jwt_helper import encode_token, verify_token
+from ehp.base.session import (
+    _RevokedSessions,
+    create_redis_session_async,
+    remove_from_redis_session_async,
+    verify_session_token,
+)
+from ehp.config import settings
+from ehp.utils.authentication import needs_signed_token
+
+
+pytestmark = pytest.mark.anyio
+
+
+def _token(secret=None, **claims):
+    message = {
+        settings.SESSION_COOKIE_NAME: "abc",
+        "exp": (time.time() + 3600) * 1000,
+        "iat": int(time.time()),
+        "iss": settings.APP_ISSUER,
+        **claims,
+    }
+    message = {name: value for name, value in message.items() if value is not None}
+    return jwt.encode(
+        message,
+        secret or settings.SESSION_TOKEN_SECRET,
+        algorithm=settings.APP_ENCODING_ALG,
+    )
+
+
+@pytest.fixture
+async def revocations(redis, monkeypatch):
+    """Revoked sessions synced by a listener of this test."""
+    monkeypatch.setattr(settings, "SESSION_LOCAL_CACHE_SIZE", 0)
+    monkeypatch.setattr(settings, "SESSION_REFRESH_INTERVAL", 0)
+    monkeypatch.setattr(session_module, "_revoked_sessions", _RevokedSessions())
+    monkeypatch.setattr(session_module, "_session_listener", None)
+    verify_session_token(_token())
+    for _ in range(200):
+        if session_module._revoked_sessions.synced:
+            break
+        await asyncio.sleep(0.005)
+    yield session_module._revoked_sessions
+    session_module._session_listener.cancel()
+    with suppress(asyncio.CancelledError):
+        await session_module._session_listener
+
+
+def test_tokens_are_not_signed_with_the_api_key():
+    assert settings.SESSION_TOKEN_SECRET != settings.API_KEY_VALUE
+    token = encode_token({settings.SESSION_COOKIE_NAME: "abc"})
+
+    with pytest.raises(jwt.InvalidSignatureError):
+        jwt.decode(
+            token, settings.API_KEY_VALUE, algorithms=[settings.APP_ENCODING_ALG]
+        )
+    assert verify_token(token)[settings.SESSION_COOKIE_NAME] == "abc"
+
+
+def test_a_missing_secret_fails_at_startup_with_a_clear_error():
+    env = {
+        name: value
+        for name, value in os.environ.items()
+        if name != "SESSION_TOKEN_SECRET"
+    }
+    result = subprocess.run(
+        [sys.executable, "-c", "import ehp.config"],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+
+    assert result.returncode != 0
+    assert "RuntimeError: SESSION_TOKEN_SECRET is not set" in result.stderr
+    assert "KeyError" not in result.stderr
+
+
+async def test_tokens_forged_with_the_api_key_are_rejected(revocations):
+    forged = _token(secret=settings.API_KEY_VALUE)
+
+    assert verify_token(forged) is None
+    assert verify_session_token(forged) is False
+    with pytest.raises(HTTPException):
+        await needs_signed_token(forged)
+
+
+async def test_fresh_tokens_are_trusted_until_logged_out(revocations):
+    token = await create_redis_session_async({"id": 1})
+    assert verify_session_token(token) is True
+    await needs_signed_token(token)
+
+    await remove_from_redis_session_async(token)
+
+    for _ in range(200):
+        if not verify_session_token(token):
+            break
+        await asyncio.sleep(0.005)
+    assert verify_session_token(token) is False
+    with pytest.raises(HTTPException):
+        await needs_signed_token(token)
+
+
+async def test_tokens_older_than_the_idle_timeout_need_their_session(
+    revocations, redis
+):
+    # Still unexpired, but its session may have idled out since.
+    token = _token(iat=int(time.time()) - settings.SESSION_TIMEOUT - 1)
+    assert verify_session_token(token) is None
+    with pytest.raises(HTTPException):
+        await needs_signed_token(token)
+
+    await redis.set(token, '{"session_id": "abc", "session_info": {}}')
+    await needs_signed_token(token)
+
+
+async def test_tokens_without_issue_time_need_their_session(revocations):
+    token = _token()
+    legacy = _token(iat=None)
+
+    assert verify_session_token(token) is True
+    assert verify_session_token(legacy) is None
@@ -0,0 +1,43 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from ehp.db import statement_stats
+from ehp.db.statement_stats import get_statement_statistics, instrument_statement_cache
+from tests.models import Widget
+
+
+pytestmark = pytest.mark.anyio
+
+
+def test_model_statements_are_built_once():
+    assert Widget._exists_stmt() is Widget._exists_stmt()
+    assert Widget._by_code_stmt() is Widget._by_code_stmt()
+    assert Widget._ids_by_status_stmt() is Widget._ids_by_status_stmt()
+
+
+async def test_precompiled_lookups_bind_their_values(db):
+    await Widget.bulk_insert([{"code": "a"}, {"code": "b"}])
+
+    assert await Widget.exists(2)
+    assert not await Widget.exists(3)
+    assert (await Widget.get_by_code("b")).id == 2
+    assert await Widget.get_by_code("c") is None
+
+
+async def test_compiled_cache_hits_are_counted(monkeypatch):
+    monkeypatch.setattr(statement_stats, "_statement_stats", {})
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    instrument_statement_cache(engine, "test")
+    try:
+        async with engine.connect() as connection:
+            await connection.run_sync(Widget.__table__.create)
+            for code in ["a", "b", "c"]:
+                await connection.execute(select(Widget.id).where(Widget.code == code))
+    finally:
+        await engine.dispose()
+
+    stats = get_statement_statistics()["test"]
+    assert (stats["compiled_misses"], stats["compiled_hits"]) == (1, 2)
+    assert stats["compiled_hit_ratio"] == round(2 / 3, 4)
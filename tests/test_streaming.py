@@ -0,0 +1,47 @@
+from contextlib import aclosing
+
+import pytest
+from sqlalchemy import select
+
+from tests.models import Widget
+
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def widgets(db):
+    await Widget.bulk_insert([{"code": f"w{i}"} for i in range(5)])
+
+
+async def test_iter_all_yields_every_row_in_order(widgets):
+    codes = [widget.code async for widget in Widget.iter_all(batch_size=2)]
+
+    assert codes == [f"w{i}" for i in range(5)]
+
+
+async def test_iter_batches_respects_the_batch_size(widgets):
+    sizes = [len(batch) async for batch in Widget.iter_batches(batch_size=2)]
+
+    assert sizes == [2, 2, 1]
+
+
+async def test_stream_can_yield_rows(db, widgets):
+    rows = [
+        row
+        async for row in db.stream(
+            select(Widget.id, Widget.code).order_by(Widget.id), scalars=False
+        )
+    ]
+
+    assert [tuple(row) for row in rows[:2]] == [(1, "w0"), (2, "w1")]
+
+
+async def test_stopping_early_releases_the_transaction(db, widgets):
+    async with aclosing(Widget.iter_all(batch_size=2)) as widgets_iter:
+        async for widget in widgets_iter:
+            assert db.has_scope_session()
+            break
+
+    assert not db.has_scope_session()
+    assert not db._transaction_stack
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+from ehp.utils import request as request_module
+from ehp.utils.request import make_streaming_response
+from tests.models import Widget
+
+
+pytestmark = pytest.mark.anyio
+
+
+class Countdown:
+    """An async iterator without aclose()."""
+
+    def __init__(self, start):
+        self.value = start
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.value == 0:
+            raise StopAsyncIteration
+        self.value -= 1
+        return {"n": self.value}
+
+
+async def _body(response):
+    return b"".join([chunk async for chunk in response.body_iterator])
+
+
+async def test_ndjson_lines():
+    response = make_streaming_response(Countdown(3), pagination_data={"page": 1})
+
+    body = await _body(response)
+
+    assert response.media_type == "application/x-ndjson"
+    assert json.loads(response.headers["x-pagination"]) == {"page": 1}
+    assert [json.loads(line) for line in body.splitlines()] == [
+        {"n": 2},
+        {"n": 1},
+        {"n": 0},
+    ]
+
+
+@pytest.mark.parametrize("start, expected", [(2, [{"n": 1}, {"n": 0}]), (0, [])])
+async def test_json_array(start, expected):
+    body = await _body(make_streaming_response(Countdown(start), fmt="json"))
+
+    assert json.loads(body) == expected
+
+
+async def test_items_are_sent_in_chunks(monkeypatch):
+    monkeypatch.setattr(request_module, "STREAM_CHUNK_SIZE", 10)
+
+    chunks = [
+        chunk async for chunk in make_streaming_response(Countdown(4)).body_iterator
+    ]
+
+    assert len(chunks) == 2
+
+
+async def test_generators_are_closed_when_the_client_goes_away():
+    closed = []
+
+    async def numbers():
+        try:
+            for n in range(10**6):
+                yield {"n": n}
+        finally:
+            closed.append(True)
+
+    body_iterator = make_streaming_response(numbers()).body_iterator
+    await anext(body_iterator)
+    await body_iterator.aclose()
+
+    assert closed == [True]
+
+
+async def test_model_objects_are_serialized(db):
+    await Widget.bulk_insert([{"code": "a"}])
+
+    body = await _body(make_streaming_response(Widget.iter_all()))
+
+    assert json.loads(body)["code"] == "a"
+
+
+def test_unknown_formats_are_rejected():
+    with pytest.raises(ValueError):
+        make_streaming_response(Countdown(1), fmt="xml")